@@ -5,10 +5,29 @@ con datos demo realistas para demostración del Sistema de Gestión Escolar v8.5
 """
 
 import mysql.connector
-import bcrypt
 import sys
+import argparse
 from datetime import datetime, date, timedelta
 import random
+import re
+import time
+
+from populate.benchmark import parse_points, run_benchmark
+from populate.cache import DEFAULT_CACHE_DIR
+from populate.connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, ConnectionPool
+from populate.finance import PaymentDistribution
+from populate.graph import GraphDistribution
+from populate.indexes import recover_dropped_indexes
+from populate.journal import default_journal_path
+from populate.metrics import RunMetrics
+from populate.passwords import DEFAULT_ROUNDS, hash_password
+from populate.purge import DEFAULT_CHUNK_ROWS, purge_demo_data
+from populate.schema import SchemaCatalog
+from populate.ruts import formatear_rut
+from populate.dump import DEFAULT_FILE_MB
+from populate.scale import BULK_TABLES, TABLE_ORDER, ScaleConfig, dump_scale, populate_scale
+from populate.simulation import SimulationConfig, run_simulation
+from populate.verify import verify_database
 
 # Configuración de la base de datos
 DB_CONFIG = {
@@ -20,10 +39,15 @@ DB_CONFIG = {
     'charset': 'utf8mb4'
 }
 
-def connect_database():
-    """Conectar a la base de datos MySQL"""
+# Métricas por tabla y etapa de la corrida (resumen final, --metrics-json, --metrics-prom)
+METRICS = RunMetrics()
+
+STATEMENT_TABLE = re.compile(r'\b(?:INTO|UPDATE|FROM)\s+`?(\w+)', re.IGNORECASE)
+
+def connect_database(pool):
+    """Conectar a la base de datos MySQL (conexión con reintentos del pool)"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = pool.acquire()
         print(f"✅ Conectado exitosamente a la base de datos: {DB_CONFIG['database']}")
         return connection
     except mysql.connector.Error as err:
@@ -31,49 +55,41 @@ def connect_database():
         return None
 
 def execute_query(cursor, query, params=None, description=""):
-    """Ejecutar una consulta SQL con manejo de errores"""
+    """Ejecutar una consulta SQL con manejo de errores, registrándola en las métricas de su tabla"""
     try:
+        started = time.perf_counter()
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
         
-        if description:
-            print(f"✅ {description}")
+        match = STATEMENT_TABLE.search(query)
+        if match:
+            sent = len(query) + sum(len(str(value)) for value in params or ())
+            METRICS.record(match.group(1), max(cursor.rowcount, 0), time.perf_counter() - started, sent)
         return True
     except mysql.connector.Error as err:
         print(f"❌ Error en {description}: {err}")
         return False
 
-def hash_password(password):
-    """Generar hash bcrypt para contraseña"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-def get_all_tables(cursor):
+def get_all_tables(catalog):
     """Obtener todas las tablas de la base de datos"""
-    cursor.execute("SHOW TABLES")
-    tables = [table[0] for table in cursor.fetchall()]
+    tables = catalog.table_names
     print(f"📊 Tablas encontradas: {len(tables)}")
-    for table in tables:
-        print(f"  - {table}")
     return tables
 
-def create_demo_users(cursor, connection):
+def create_demo_users(cursor, connection, catalog):
     """Crear usuarios demo con tabla usuarios si existe"""
     print("\n👥 CREANDO USUARIOS EN TABLA 'usuarios'")
     print("=" * 60)
     
     # Verificar si existe tabla usuarios
-    cursor.execute("SHOW TABLES LIKE 'usuarios'")
-    if not cursor.fetchone():
+    if not catalog.has_table('usuarios'):
         print("⚠️ Tabla 'usuarios' no existe, saltando...")
         return []
     
     # Obtener estructura de la tabla usuarios
-    cursor.execute("DESCRIBE usuarios")
-    columns = [col[0] for col in cursor.fetchall()]
+    columns = catalog.column_names('usuarios')
     print(f"📋 Columnas en 'usuarios': {columns}")
     
     # Crear usuarios básicos
@@ -116,8 +132,8 @@ def create_demo_courses(cursor, connection, user_ids):
     print("\n📚 CREANDO CURSOS DEMO COMPLETOS")
     print("=" * 60)
     
-    # Usar primer usuario como creador
-    created_by = user_ids[0] if user_ids else 'ADMIN_DEMO'
+    # Marcados como el resto de los datos demo, para que --purge los encuentre
+    created_by = 'DEMO_SYSTEM'
     
     demo_courses = [
         {
@@ -366,14 +382,13 @@ def create_demo_fees_and_payments(cursor, connection, course_ids, student_ids, a
     
     connection.commit()
 
-def create_demo_categories_and_expenses(cursor, connection, course_ids):
+def create_demo_categories_and_expenses(cursor, connection, catalog, course_ids):
     """Crear categorías de gastos y gastos demo"""
     print("\n📊 CREANDO CATEGORÍAS DE GASTOS Y GASTOS DEMO")
     print("=" * 60)
     
     # Verificar si existe tabla categorias_gastos
-    cursor.execute("SHOW TABLES LIKE 'categorias_gastos'")
-    if not cursor.fetchone():
+    if not catalog.has_table('categorias_gastos'):
         print("⚠️ Tabla 'categorias_gastos' no existe, saltando...")
         return
     
@@ -398,8 +413,7 @@ def create_demo_categories_and_expenses(cursor, connection, course_ids):
             category_ids.append(cursor.lastrowid)
     
     # Crear gastos demo si existe tabla gastos
-    cursor.execute("SHOW TABLES LIKE 'gastos'")
-    if cursor.fetchone() and category_ids and course_ids:
+    if catalog.has_table('gastos') and category_ids and course_ids:
         for i, course_id in enumerate(course_ids[:3]):  # Solo 3 cursos
             category_id = category_ids[i % len(category_ids)]
             
@@ -422,14 +436,13 @@ def create_demo_categories_and_expenses(cursor, connection, course_ids):
     
     connection.commit()
 
-def create_demo_financial_movements(cursor, connection, student_ids):
+def create_demo_financial_movements(cursor, connection, catalog, student_ids):
     """Crear movimientos financieros demo"""
     print("\n💳 CREANDO MOVIMIENTOS FINANCIEROS DEMO")
     print("=" * 60)
     
     # Movimientos cuenta corriente alumnos
-    cursor.execute("SHOW TABLES LIKE 'movimientos_ccaa'")
-    if cursor.fetchone() and student_ids:
+    if catalog.has_table('movimientos_ccaa') and student_ids:
         for student_id in student_ids:
             movement_query = """
             INSERT INTO movimientos_ccaa (
@@ -449,8 +462,7 @@ def create_demo_financial_movements(cursor, connection, student_ids):
                          f"Movimiento CCAA creado: Alumno {student_id}")
     
     # Movimientos cuenta corriente apoderados
-    cursor.execute("SHOW TABLES LIKE 'movimientos_ccpp'")
-    if cursor.fetchone():
+    if catalog.has_table('movimientos_ccpp'):
         movement_query = """
         INSERT INTO movimientos_ccpp (
             apoderado_id, tipo_movimiento, monto, descripcion, fecha_movimiento,
@@ -470,13 +482,12 @@ def create_demo_financial_movements(cursor, connection, student_ids):
     
     connection.commit()
 
-def create_demo_cobros(cursor, connection, course_ids, student_ids):
+def create_demo_cobros(cursor, connection, catalog, course_ids, student_ids):
     """Crear cobros demo"""
     print("\n🧾 CREANDO COBROS DEMO")
     print("=" * 60)
     
-    cursor.execute("SHOW TABLES LIKE 'cobros'")
-    if not cursor.fetchone():
+    if not catalog.has_table('cobros'):
         print("⚠️ Tabla 'cobros' no existe, saltando...")
         return
     
@@ -506,43 +517,20 @@ def create_demo_cobros(cursor, connection, course_ids, student_ids):
     
     connection.commit()
 
-def verify_all_data(cursor):
+def verify(cursor, catalog, args):
     """Verificar todos los datos creados"""
-    print("\n📊 VERIFICACIÓN COMPLETA DE DATOS DEMO")
-    print("=" * 60)
-    
-    tables_to_check = [
-        ('personas', 'Personas del sistema'),
-        ('usuarios_auth', 'Autenticación de usuarios'),
-        ('persona_roles', 'Roles asignados'),
-        ('usuarios', 'Tabla usuarios'),
-        ('cursos', 'Cursos académicos'),
-        ('alumnos', 'Estudiantes'),
-        ('cuotas', 'Cuotas de pago'),
-        ('pagos', 'Pagos realizados'),
-        ('deudas_alumnos', 'Deudas pendientes'),
-        ('categorias_gastos', 'Categorías de gastos'),
-        ('gastos', 'Gastos registrados'),
-        ('movimientos_ccaa', 'Movimientos cuenta alumnos'),
-        ('movimientos_ccpp', 'Movimientos cuenta apoderados'),
-        ('cobros', 'Cobros generados'),
-        ('regiones', 'Geografía - Regiones'),
-        ('provincias', 'Geografía - Provincias'),
-        ('comunas', 'Geografía - Comunas')
-    ]
-    
-    total_records = 0
-    for table, description in tables_to_check:
-        try:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            count = cursor.fetchone()[0]
-            status = "✅" if count > 0 else "⚠️"
-            print(f"{status} {description}: {count} registros")
-            total_records += count
-        except mysql.connector.Error:
-            print(f"❌ {description}: Tabla no existe")
-    
-    print(f"\n🎯 TOTAL DE REGISTROS DEMO: {total_records}")
+    with METRICS.step('verificacion'):
+        verify_database(cursor, catalog, DB_CONFIG, exact=args.exact_counts,
+                        workers=args.count_workers, checks=not args.skip_checks)
+
+def write_metrics(args, errors=None):
+    """Escribir las métricas de la corrida en los archivos pedidos"""
+    if args.metrics_json:
+        METRICS.write_json(args.metrics_json, errors)
+        print(f"📈 Métricas JSON: {args.metrics_json}")
+    if args.metrics_prom:
+        METRICS.write_prometheus(args.metrics_prom, errors)
+        print(f"📈 Métricas Prometheus: {args.metrics_prom}")
 
 def show_demo_credentials(cursor):
     """Mostrar credenciales demo para acceso"""
@@ -577,28 +565,263 @@ def show_demo_credentials(cursor):
         print(f"   📝 Descripción: {cred['description']}")
         print()
 
+def show_scale_credentials(layout, password, limit=5):
+    """Mostrar algunas credenciales de apoderados generados en modo escala"""
+    print("\n🔐 CREDENCIALES DE APODERADOS GENERADOS (MUESTRA)")
+    print("=" * 60)
+    
+    for rut, hijos in layout.sample_credentials(limit):
+        print(f"👤 Apoderado con {hijos} hijo(s)")
+        print(f"   🆔 RUT: {formatear_rut(rut)}")
+        print(f"   🔑 Contraseña: {password}")
+        print()
+    print(f"👥 Total de apoderados generados: {layout.family_count}")
+
+def parse_args():
+    """Leer parámetros de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Poblar la base de datos con datos demo")
+    parser.add_argument('--courses', type=int, help="Activar modo escala con N cursos")
+    parser.add_argument('--students-per-course', type=int, default=30,
+                        help="Promedio de alumnos por curso (modo escala)")
+    parser.add_argument('--months', type=int, default=10,
+                        help="Meses cobrados desde marzo (modo escala)")
+    parser.add_argument('--ano-escolar', type=int, default=2025,
+                        help="Año escolar de los cursos generados (modo escala)")
+    parser.add_argument('--rut-base', type=int, default=30000000,
+                        help="RUT inicial para los apoderados generados (modo escala)")
+    parser.add_argument('--random-ruts', action='store_true',
+                        help="Asignar RUT al azar en vez de correlativos desde --rut-base (modo escala)")
+    parser.add_argument('--poblacion-comunas',
+                        help="CSV codigo_comuna,poblacion para ponderar las comunas (modo escala)")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="Filas por INSERT multi-fila (modo escala)")
+    parser.add_argument('--bulk-tables', default='',
+                        help="Tablas a cargar con LOAD DATA LOCAL INFILE, separadas por coma, "
+                             f"o 'auto' para {','.join(BULK_TABLES)}")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos de carga en paralelo, con shards por curso (modo escala)")
+    parser.add_argument('--async-connections', type=int, default=0,
+                        help="Cargar con un pipeline asíncrono y N conexiones insertando en paralelo (modo escala)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help="Reintentos de un lote ante deadlocks, esperas de lock o conexión caída")
+    parser.add_argument('--retry-backoff', type=float, default=DEFAULT_BACKOFF,
+                        help="Segundos de espera del primer reintento; se duplica en cada intento")
+    parser.add_argument('--bcrypt-rounds', type=int, default=DEFAULT_ROUNDS,
+                        help="Costo bcrypt de las contraseñas generadas (mínimo 4, modo escala)")
+    parser.add_argument('--hash-pool-size', type=int, default=16,
+                        help="Hashes distintos precalculados y repartidos entre usuarios (modo escala)")
+    parser.add_argument('--max-memory', type=int,
+                        help="Memoria máxima en MB para cada lote en vuelo; reduce el tamaño de lote (modo escala)")
+    parser.add_argument('--seed', type=int,
+                        help="Semilla para generar un dataset reproducible (modo escala)")
+    parser.add_argument('--fecha-corte', type=date.fromisoformat,
+                        help="Fecha de corte de los pagos, AAAA-MM-DD (modo escala)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Directorio del caché de datasets generados con --seed")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="No leer ni guardar el caché de datasets")
+    parser.add_argument('--snapshot-dir',
+                        help="Guardar las filas demo como snapshot y restaurarlo si ya existe (requiere --seed)")
+    parser.add_argument('--snapshot-replace-tables', action='store_true',
+                        help="Al restaurar, eliminar y recrear las tablas del snapshot (pide confirmación)")
+    parser.add_argument('--journal',
+                        help="Diario de avance para reanudar una carga interrumpida (modo escala; por defecto "
+                             "populate-journal.<base de datos>.json junto a este script)")
+    parser.add_argument('--no-journal', action='store_true',
+                        help="No llevar diario de avance")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continuar la carga registrada en el diario desde el último lote confirmado")
+    parser.add_argument('--commit-every', type=int, default=10,
+                        help="Lotes entre cada COMMIT y anotación en el diario (modo escala)")
+    parser.add_argument('--drop-indexes', action='store_true',
+                        help="Eliminar los índices secundarios antes de cargar y reconstruirlos al final (modo escala)")
+    parser.add_argument('--index-workers', type=int, default=4,
+                        help="Tablas cuyos índices se reconstruyen en paralelo")
+    parser.add_argument('--exact-counts', action='store_true',
+                        help="Verificar con COUNT(*) exactos en paralelo en vez de estimaciones")
+    parser.add_argument('--count-workers', type=int, default=4,
+                        help="Conexiones en paralelo para los conteos exactos")
+    parser.add_argument('--skip-checks', action='store_true',
+                        help="No ejecutar los chequeos de integridad al verificar")
+    parser.add_argument('--benchmark-points',
+                        help="Benchmark de reportes: puntos de escala en pagos, p. ej. 1k,100k,1m")
+    parser.add_argument('--benchmark-out', default='benchmark-report.json',
+                        help="JSON donde se escribe el reporte del benchmark")
+    parser.add_argument('--benchmark-baseline',
+                        help="Reporte anterior del benchmark para detectar regresiones")
+    parser.add_argument('--benchmark-sample', type=int, default=10,
+                        help="Cursos de muestra por consulta en el benchmark")
+    parser.add_argument('--benchmark-repeat', type=int, default=5,
+                        help="Repeticiones de cada consulta en el benchmark")
+    parser.add_argument('--payment-distribution',
+                        help="JSON con perfiles de pago, estacionalidad y probabilidad de falla (modo escala)")
+    parser.add_argument('--graph-distribution',
+                        help="JSON con hijos por apoderado, tamaño de cursos, dispersión de hermanos y "
+                             "cursos por tesorero y profesor (modo escala)")
+    parser.add_argument('--hot-spots', action='store_true',
+                        help="Agregar al grafo los casos extremos: apoderado con muchos hijos, curso "
+                             "sobredimensionado, tesorero y profesor a cargo de muchos cursos")
+    parser.add_argument('--dump-dir',
+                        help="Con --courses, escribir el dataset como archivos .sql.gz en este directorio "
+                             "en vez de cargarlo (no se conecta a la base de datos)")
+    parser.add_argument('--dump-file-mb', type=int, default=DEFAULT_FILE_MB,
+                        help="MB sin comprimir de cada archivo del volcado antes de cortar")
+    parser.add_argument('--purge', action='store_true',
+                        help="Borrar solo los datos demo (es_dato_prueba / DEMO_SYSTEM) por rangos, sin poblar")
+    parser.add_argument('--purge-chunk', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="Filas por rango (y por transacción) al purgar")
+    parser.add_argument('--purge-pause', type=float, default=0.0,
+                        help="Segundos de pausa entre rangos al purgar, para no retrasar las réplicas")
+    parser.add_argument('--simulate', type=float, metavar='SEGUNDOS',
+                        help="Tras la carga (o sobre los datos demo existentes), simular un año escolar "
+                             "durante SEGUNDOS reales: cobros mensuales, pagos y deudas saldadas")
+    parser.add_argument('--sim-days-per-second', type=float, default=1.0,
+                        help="Días simulados por segundo real en la simulación")
+    parser.add_argument('--sim-start', type=date.fromisoformat,
+                        help="Fecha de inicio del reloj simulado (YYYY-MM-DD)")
+    parser.add_argument('--sim-max-rate', type=float,
+                        help="Tope de escrituras por segundo en la simulación")
+    parser.add_argument('--metrics-json',
+                        help="Escribir al final las métricas por tabla y etapa en este JSON")
+    parser.add_argument('--metrics-prom',
+                        help="Escribir al final las métricas en formato textfile de Prometheus (.prom)")
+    parser.add_argument('--no-progress', action='store_true',
+                        help="No mostrar la línea de avance durante la carga")
+    args = parser.parse_args()
+    args.journal = args.journal or default_journal_path(DB_CONFIG['database'])
+    return args
+
+def parse_bulk_tables(value):
+    """Interpretar --bulk-tables"""
+    if value == 'auto':
+        return tuple(BULK_TABLES)
+    tables = tuple(table.strip() for table in value.split(',') if table.strip())
+    unknown = [table for table in tables if table not in TABLE_ORDER]
+    if unknown:
+        print(f"❌ Tablas desconocidas en --bulk-tables: {', '.join(unknown)}")
+        sys.exit(1)
+    return tables
+
+def scale_config(args, bulk_tables):
+    """Parámetros del modo escala desde la línea de comandos"""
+    config = ScaleConfig(
+        courses=args.courses,
+        students_per_course=args.students_per_course,
+        months=args.months,
+        ano_escolar=args.ano_escolar,
+        rut_base=args.rut_base,
+        random_ruts=args.random_ruts,
+        poblacion_comunas=args.poblacion_comunas,
+        batch_size=args.batch_size,
+        bulk_tables=bulk_tables,
+        workers=args.workers,
+        async_connections=args.async_connections,
+        bcrypt_rounds=args.bcrypt_rounds,
+        hash_pool_size=args.hash_pool_size,
+        max_memory_mb=args.max_memory,
+        seed=args.seed,
+        fecha_corte=args.fecha_corte,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        snapshot_dir=args.snapshot_dir,
+        snapshot_replace_tables=args.snapshot_replace_tables,
+        journal_path=None if args.no_journal else args.journal,
+        resume=args.resume,
+        commit_every=args.commit_every,
+        progress=not args.no_progress,
+        drop_indexes=args.drop_indexes,
+        index_workers=args.index_workers
+    )
+    if args.payment_distribution:
+        config.distribution = PaymentDistribution.from_json(args.payment_distribution)
+    if args.graph_distribution:
+        config.graph = GraphDistribution.from_json(args.graph_distribution)
+    if args.hot_spots:
+        config.graph.with_hot_spots()
+    return config
+
+def simulation_config(args):
+    """Parámetros del modo simulación desde la línea de comandos"""
+    config = SimulationConfig(
+        duration=args.simulate,
+        days_per_second=args.sim_days_per_second,
+        start=args.sim_start,
+        max_rate=args.sim_max_rate,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        progress=not args.no_progress
+    )
+    if args.payment_distribution:
+        config.distribution = PaymentDistribution.from_json(args.payment_distribution)
+    return config
+
 def main():
+    args = parse_args()
+    bulk_tables = parse_bulk_tables(args.bulk_tables)
+    
+    if args.dump_dir:
+        if not args.courses:
+            print("❌ --dump-dir requiere --courses")
+            sys.exit(1)
+        dump_scale(scale_config(args, ()), args.dump_dir, args.dump_file_mb, metrics=METRICS)
+        write_metrics(args)
+        return
+    
     print("🚀 POBLACIÓN COMPLETA DE DATOS DEMO")
     print(f"🎯 Base de datos: {DB_CONFIG['database']}")
     print("🎪 CREANDO DATOS PARA DEMOSTRACIÓN DEL SISTEMA")
     print("=" * 80)
     
     # Conectar a la base de datos
-    connection = connect_database()
+    if bulk_tables or args.snapshot_dir:
+        pool = ConnectionPool({**DB_CONFIG, 'allow_local_infile': True}, args.retries, args.retry_backoff)
+    else:
+        pool = ConnectionPool(DB_CONFIG, args.retries, args.retry_backoff)
+    connection = connect_database(pool)
     if not connection:
         sys.exit(1)
     
     cursor = connection.cursor()
     
     try:
+        # Índices que una corrida interrumpida dejó eliminados (con --drop-indexes se rehacen al final)
+        if not (args.courses and args.drop_indexes):
+            recover_dropped_indexes(cursor, DB_CONFIG['database'], pool, args.index_workers)
+        
         # Obtener todas las tablas
-        all_tables = get_all_tables(cursor)
+        catalog = SchemaCatalog.load(cursor, DB_CONFIG['database'])
+        all_tables = get_all_tables(catalog)
+        
+        if args.purge:
+            purge_demo_data(cursor, connection, catalog, args.purge_chunk, args.purge_pause, METRICS)
+            return
+        
+        if args.benchmark_points:
+            config = scale_config(args, bulk_tables)
+            run_benchmark(cursor, connection, config, catalog, parse_points(args.benchmark_points),
+                          db_config=DB_CONFIG, pool=pool, sample=args.benchmark_sample,
+                          repeat=args.benchmark_repeat, output=args.benchmark_out,
+                          baseline=args.benchmark_baseline)
+            return
+        
+        if args.courses:
+            config = scale_config(args, bulk_tables)
+            layout = populate_scale(cursor, connection, config, catalog, db_config=DB_CONFIG, pool=pool,
+                                    metrics=METRICS)
+            verify(cursor, catalog, args)
+            show_scale_credentials(layout, config.password)
+            if args.simulate:
+                run_simulation(cursor, connection, catalog, simulation_config(args), METRICS)
+            return
+        
+        if args.simulate:
+            run_simulation(cursor, connection, catalog, simulation_config(args), METRICS)
+            return
         
         # Crear datos demo paso a paso
         print("\n🎬 INICIANDO CREACIÓN DE DATOS DEMO COMPLETOS")
         
         # 1. Crear usuarios base
-        user_ids = create_demo_users(cursor, connection)
+        user_ids = create_demo_users(cursor, connection, catalog)
         
         # 2. Crear cursos
         course_ids = create_demo_courses(cursor, connection, user_ids)
@@ -610,16 +833,18 @@ def main():
         create_demo_fees_and_payments(cursor, connection, course_ids, student_ids, apoderado_ruts)
         
         # 5. Crear categorías y gastos
-        create_demo_categories_and_expenses(cursor, connection, course_ids)
+        create_demo_categories_and_expenses(cursor, connection, catalog, course_ids)
         
         # 6. Crear movimientos financieros
-        create_demo_financial_movements(cursor, connection, student_ids)
+        create_demo_financial_movements(cursor, connection, catalog, student_ids)
         
         # 7. Crear cobros
-        create_demo_cobros(cursor, connection, course_ids, student_ids)
+        create_demo_cobros(cursor, connection, catalog, course_ids, student_ids)
+        
+        METRICS.report()
         
         # Verificar todos los datos
-        verify_all_data(cursor)
+        verify(cursor, catalog, args)
         
         # Mostrar credenciales
         show_demo_credentials(cursor)
@@ -635,9 +860,13 @@ def main():
     except Exception as e:
         print(f"❌ Error general: {e}")
         connection.rollback()
+        if args.courses and not args.no_journal:
+            print(f"💾 Los lotes confirmados quedaron en {args.journal}; usa --resume para continuar")
     finally:
+        pool.stats.report()
+        write_metrics(args, pool.stats.as_dict())
         cursor.close()
-        connection.close()
+        pool.close()
         print("🔌 Conexión cerrada")
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Carga masiva de personas desde un CSV, con las mismas columnas y el mismo
+reporte de resultado que la carga masiva del backend (cargaMasivaService.js),
+pero validando y escribiendo por bloques: pensada para incorporar un colegio
+completo al inicio del año.
+
+Uso típico:
+    python import-roster.py nomina.csv --password-por-defecto Cambiar2025 --reporte resultado.json
+
+Columnas: rut, nombres, apellido_paterno, email y rol son obligatorias;
+apellido_materno, telefono, direccion, fecha_nacimiento, genero,
+codigo_comuna (o comuna_id), curso_id y password son opcionales. Las filas
+sin password reciben --password-por-defecto (o una contraseña temporal
+distinta por fila, guardada en --archivo-passwords con permisos 0600) y
+deberán cambiarla al ingresar.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import mysql.connector
+
+from populate.connection import ConnectionPool, db_config_from_env, load_env_file
+from populate.metrics import RunMetrics
+from populate.passwords import DEFAULT_ROUNDS
+from populate.roster import CHUNK_ROWS, RosterConfig, general_error, import_roster, report_result
+from populate.schema import SchemaCatalog
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Carga masiva de personas desde un CSV")
+    parser.add_argument('archivo',
+                        help="CSV con la nómina (encabezados como la plantilla de carga masiva)")
+    parser.add_argument('--reporte',
+                        help="Guardar el resultado (errores, duplicados, exitosos, resumen) en este JSON")
+    parser.add_argument('--password-por-defecto',
+                        help="Contraseña de las filas sin password")
+    parser.add_argument('--archivo-passwords',
+                        help="CSV (permisos 0600) con las contraseñas temporales de las filas sin password "
+                             "(por defecto, <archivo>-passwords.csv)")
+    parser.add_argument('--marcar-como-prueba', action='store_true',
+                        help="Marcar las personas creadas con es_dato_prueba = 1")
+    parser.add_argument('--created-by', default='CARGA_MASIVA',
+                        help="Valor de created_by de las filas creadas")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Validar e insertar dentro de la transacción y deshacerla al final")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="Filas por INSERT")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help="Filas del CSV que se validan juntas")
+    parser.add_argument('--bcrypt-rounds', type=int, default=DEFAULT_ROUNDS,
+                        help="Costo bcrypt de los hashes")
+    parser.add_argument('--hash-workers', type=int,
+                        help="Procesos del pool de hashes (por defecto, uno por CPU)")
+    parser.add_argument('--hash-pool-size', type=int, default=16,
+                        help="Hashes distintos de la contraseña por defecto, repartidos entre las filas")
+    parser.add_argument('--env-file', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'),
+                        help="Archivo .env del backend con las variables DB_*")
+    parser.add_argument('--metrics-json',
+                        help="Escribir al final las métricas por tabla y etapa en este JSON")
+    parser.add_argument('--no-progress', action='store_true',
+                        help="No mostrar la línea de avance durante la carga")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    load_env_file(args.env_file)
+
+    print("📥 CARGA MASIVA DE PERSONAS")
+    print(f"📄 Archivo: {args.archivo}")
+    print("=" * 80)
+
+    db_config = db_config_from_env()
+    pool = ConnectionPool(db_config)
+    metrics = RunMetrics()
+    config = RosterConfig(
+        batch_size=args.batch_size,
+        chunk_rows=args.chunk_rows,
+        bcrypt_rounds=args.bcrypt_rounds,
+        hash_workers=args.hash_workers,
+        password_por_defecto=args.password_por_defecto,
+        archivo_passwords=args.archivo_passwords or f"{os.path.splitext(args.archivo)[0]}-passwords.csv",
+        hash_pool_size=args.hash_pool_size,
+        marcar_como_prueba=args.marcar_como_prueba,
+        created_by=args.created_by,
+        dry_run=args.dry_run,
+        progress=not args.no_progress,
+    )
+    try:
+        connection = pool.acquire()
+        cursor = connection.cursor()
+        catalog = SchemaCatalog.load(cursor, db_config['database'])
+        resultado = import_roster(cursor, connection, catalog, args.archivo, config, metrics)
+    except mysql.connector.Error as err:
+        report_result(general_error(f"Error de conexión a {db_config['database']}: {err}"))
+        sys.exit(1)
+    finally:
+        pool.close()
+
+    report_result(resultado)
+    metrics.report()
+    if args.dry_run:
+        print("🧪 --dry-run: la transacción se deshizo, no quedó nada escrito")
+    if args.reporte:
+        with open(args.reporte, 'w', encoding='utf-8') as handle:
+            json.dump(resultado, handle, indent=2, ensure_ascii=False)
+        print(f"💾 Resultado guardado en {args.reporte}")
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, pool.stats.as_dict())
+    if not resultado['exito'] and not resultado['datos_procesados']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
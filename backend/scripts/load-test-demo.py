@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para el backend poblado con auto-populate-demo.py:
+inicia sesión con las credenciales demo (apoderados y tesoreros generados)
+y repite su tráfico en paralelo con asyncio, reportando por ruta latencias
+p50/p95/p99, throughput y tasa de error.
+
+Uso típico contra un backend local (npm run dev):
+    python load-test-demo.py --base-url http://localhost:3001/api --duration 60 --concurrency 50
+
+El limitador general del backend (1000 peticiones cada 15 minutos por IP)
+responde 429 bastante antes de terminar una prueba larga; para medir el
+backend y no el limitador hay que subir ese máximo en el entorno de prueba.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from populate.connection import db_config_from_env, load_env_file
+from populate.scale import CREATED_BY, ROL_APODERADO
+
+# Credenciales fijas que crea (y muestra) el modo demo
+ADMIN_CREDENTIALS = ('11.111.111-1', 'admin123')
+DEMO_APODERADOS = [('22.222.222-2', 'apod123'), ('12.345.678-5', 'demo123')]
+
+# Contraseña de los apoderados generados en modo escala (ScaleConfig.password)
+SCALE_PASSWORD = 'demo123'
+
+# Rutas por perfil: (plantilla, peso); la plantilla es la clave del reporte
+APODERADO_ROUTES = [
+    ('/apoderados/me/hijos', 3),
+    ('/apoderados/me/metricas', 3),
+    ('/apoderados/me/resumen', 2),
+    ('/apoderados/me/deudas-pendientes', 3),
+    ('/apoderados/me/hijos/:alumnoId/resumen', 1),
+    ('/apoderados/me/hijos/:alumnoId/deudas', 1),
+]
+TESORERO_ROUTES = [
+    ('/tesoreros/me/dashboard/kpis', 3),
+    ('/tesoreros/me/dashboard/cobros-pendientes', 2),
+    ('/tesoreros/curso/:cursoId/kpis', 2),
+    ('/tesoreros/curso/:cursoId/cobros-pendientes', 3),
+]
+ADMIN_ROUTES = [
+    ('/tesoreros/curso/:cursoId/kpis', 1),
+    ('/tesoreros/curso/:cursoId/cobros-pendientes', 1),
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+class Session:
+    """Usuario con sesión iniciada y los ids que usan sus rutas"""
+
+    def __init__(self, perfil, rut, password, routes, alumnos=(), cursos=()):
+        self.perfil = perfil
+        self.rut = rut
+        self.password = password
+        self.alumnos = list(alumnos)
+        self.cursos = list(cursos)
+        # Solo las rutas para las que el usuario tiene ids
+        self.routes = [(template, weight) for template, weight in routes
+                       if (':alumnoId' not in template or self.alumnos)
+                       and (':cursoId' not in template or self.cursos)]
+        self.token = None
+
+    def path(self, template, rng):
+        """Ruta concreta para una plantilla"""
+        path = template
+        if ':alumnoId' in path:
+            path = path.replace(':alumnoId', str(rng.choice(self.alumnos)))
+        if ':cursoId' in path:
+            path = path.replace(':cursoId', str(rng.choice(self.cursos)))
+        return path
+
+
+def discover_sessions(db_config, apoderados, tesoreros, password, seed):
+    """
+    Apoderados y tesoreros de datos demo tomados de la base, con sus alumnos
+    y cursos. Si la base no responde, solo las credenciales demo fijas.
+    """
+    rng = random.Random(seed)
+    try:
+        connection = mysql.connector.connect(**db_config)
+    except mysql.connector.Error as err:
+        print(f"⚠️ Sin acceso a la base ({err}); se usan solo las credenciales demo fijas")
+        return [Session('apoderado', rut, clave, APODERADO_ROUTES) for rut, clave in DEMO_APODERADOS]
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT rut_persona FROM persona_roles
+            WHERE rol_id = %s AND activo = 1 AND created_by = %s
+        """, (ROL_APODERADO, CREATED_BY))
+        ruts = [rut for rut, in cursor.fetchall()]
+        ruts = rng.sample(ruts, min(apoderados, len(ruts)))
+
+        hijos = {rut: [] for rut in ruts}
+        for start in range(0, len(ruts), 1000):
+            chunk = ruts[start:start + 1000]
+            cursor.execute(f"""
+                SELECT apoderado_id, id FROM alumnos
+                WHERE apoderado_id IN ({', '.join(['%s'] * len(chunk))})
+            """, chunk)
+            for rut, alumno_id in cursor.fetchall():
+                hijos[rut].append(alumno_id)
+
+        cursor.execute("""
+            SELECT tesorero_id, id FROM cursos
+            WHERE tesorero_id IS NOT NULL AND creado_por = %s
+        """, (CREATED_BY,))
+        cursos = {}
+        for rut, curso_id in cursor.fetchall():
+            cursos.setdefault(rut, []).append(curso_id)
+    finally:
+        cursor.close()
+        connection.close()
+
+    sessions = [Session('apoderado', rut, password, APODERADO_ROUTES, alumnos=hijos[rut]) for rut in ruts]
+    for rut in rng.sample(sorted(cursos), min(tesoreros, len(cursos))):
+        sessions.append(Session('tesorero', rut, password, TESORERO_ROUTES, cursos=cursos[rut]))
+    all_cursos = [curso_id for ids in cursos.values() for curso_id in ids]
+    if all_cursos:
+        sessions.append(Session('admin', *ADMIN_CREDENTIALS, ADMIN_ROUTES, cursos=all_cursos))
+    if not ruts:
+        sessions.extend(Session('apoderado', rut, clave, APODERADO_ROUTES) for rut, clave in DEMO_APODERADOS)
+    return sessions
+
+
+class HttpClient:
+    """GET/POST JSON con aiohttp si está instalado; si no, urllib en hilos"""
+
+    def __init__(self, base_url, concurrency, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = None
+        if aiohttp is not None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=concurrency),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            )
+        else:
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def request(self, method, path, token=None, body=None):
+        """(status, cuerpo JSON o None); status 0 si falló la conexión"""
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        url = self.base_url + path
+        if self.session is not None:
+            try:
+                async with self.session.request(method, url, headers=headers, json=body) as response:
+                    text = await response.text()
+                    return response.status, _parse_json(text)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return 0, None
+        return await asyncio.to_thread(self._urllib_request, method, url, headers, body)
+
+    def _urllib_request(self, method, url, headers, body):
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers = {**headers, 'Content-Type': 'application/json'}
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, _parse_json(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as err:
+            return err.code, None
+        except (urllib.error.URLError, OSError):
+            return 0, None
+
+
+def _parse_json(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class RouteStats:
+    """Latencias y códigos de respuesta de una ruta"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+
+    def record(self, status, seconds):
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not 200 <= status < 400:
+            self.errors += 1
+
+    def percentile(self, p):
+        """Percentil por rango más cercano, en milisegundos"""
+        ordered = sorted(self.latencies)
+        rank = max(1, -(-p * len(ordered) // 100))
+        return ordered[rank - 1] * 1000
+
+    def summary(self, elapsed):
+        count = len(self.latencies)
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'error_rate': self.errors / count if count else 0.0,
+            'throughput': count / elapsed if elapsed else 0.0,
+            **{f"p{p}_ms": self.percentile(p) if count else None for p in PERCENTILES},
+            'statuses': {str(status): total for status, total in sorted(self.statuses.items())},
+        }
+
+
+async def login_all(client, sessions, concurrency):
+    """Iniciar sesión con cada usuario; devuelve los que obtuvieron token"""
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = RouteStats()
+
+    async def login(session):
+        async with semaphore:
+            started = time.perf_counter()
+            status, body = await client.request(
+                'POST', '/auth/login', body={'rut': str(session.rut), 'password': session.password})
+            stats.record(status, time.perf_counter() - started)
+            if status == 200 and body:
+                session.token = (body.get('data') or {}).get('token')
+
+    await asyncio.gather(*(login(session) for session in sessions))
+    return [session for session in sessions if session.token], stats
+
+
+async def virtual_user(client, sessions, stats, deadline, rng):
+    """Elegir un usuario y una ruta ponderada, pedirla y repetir hasta deadline"""
+    while time.perf_counter() < deadline:
+        session = rng.choice(sessions)
+        templates = [template for template, _ in session.routes]
+        weights = [weight for _, weight in session.routes]
+        template = rng.choices(templates, weights)[0]
+        path = session.path(template, rng)
+        started = time.perf_counter()
+        status, _ = await client.request('GET', path, token=session.token)
+        stats.setdefault(template, RouteStats()).record(status, time.perf_counter() - started)
+
+
+async def run_load(args, sessions):
+    client = HttpClient(args.base_url, args.concurrency, args.timeout)
+    try:
+        print(f"🔐 Iniciando sesión con {len(sessions)} usuarios...")
+        started = time.perf_counter()
+        active, login_stats = await login_all(client, sessions, args.concurrency)
+        login_elapsed = time.perf_counter() - started
+        print(f"✅ {len(active)}/{len(sessions)} sesiones activas en {login_elapsed:.1f}s")
+        if not active:
+            return None
+
+        print(f"🚦 {args.concurrency} usuarios virtuales durante {args.duration}s contra {args.base_url}")
+        stats = {}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, active, stats, deadline, random.Random(args.seed * 1000003 + worker))
+            for worker in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+
+    return {
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'duration_s': elapsed,
+        'sessions': {perfil: sum(1 for session in active if session.perfil == perfil)
+                     for perfil in ('apoderado', 'tesorero', 'admin')},
+        'login': login_stats.summary(login_elapsed),
+        'routes': {template: route.summary(elapsed) for template, route in sorted(stats.items())},
+    }
+
+
+def print_report(report):
+    print("\n📈 RESULTADOS POR RUTA")
+    print("=" * 110)
+    print(f"{'Ruta':<48} {'Req':>7} {'Req/s':>8} {'Error':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [('POST /auth/login', report['login'])]
+    rows.extend((f"GET {template}", summary) for template, summary in report['routes'].items())
+    for name, summary in rows:
+        latencies = ''.join(f"{summary[f'p{p}_ms'] or 0:>10.1f}" for p in PERCENTILES)
+        print(f"{name:<48} {summary['requests']:>7} {summary['throughput']:>8.1f} "
+              f"{summary['error_rate']:>7.1%}{latencies}")
+        failed = {status: total for status, total in summary['statuses'].items() if not status.startswith(('2', '3'))}
+        if failed:
+            print(f"   ↳ respuestas con error: {', '.join(f'{status}×{total}' for status, total in failed.items())}")
+
+    total = sum(summary['requests'] for summary in report['routes'].values())
+    errors = sum(summary['errors'] for summary in report['routes'].values())
+    print("=" * 110)
+    print(f"🎯 {total} peticiones en {report['duration_s']:.1f}s: "
+          f"{total / report['duration_s']:.1f} req/s, {errors / total if total else 0:.1%} con error")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Prueba de carga con tráfico de apoderados y tesoreros demo")
+    parser.add_argument('--base-url', default=f"http://localhost:{os.environ.get('PORT', 3001)}/api",
+                        help="URL base de la API del backend")
+    parser.add_argument('--duration', type=float, default=30,
+                        help="Segundos de tráfico (sin contar el inicio de sesión)")
+    parser.add_argument('--concurrency', type=int, default=20,
+                        help="Usuarios virtuales simultáneos")
+    parser.add_argument('--apoderados', type=int, default=200,
+                        help="Apoderados generados a usar")
+    parser.add_argument('--tesoreros', type=int, default=50,
+                        help="Tesoreros de curso generados a usar")
+    parser.add_argument('--password', default=SCALE_PASSWORD,
+                        help="Contraseña de los usuarios generados")
+    parser.add_argument('--timeout', type=float, default=30,
+                        help="Segundos máximos por petición")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="Semilla para elegir usuarios y rutas")
+    parser.add_argument('--env-file', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'),
+                        help="Archivo .env del backend con las variables DB_*")
+    parser.add_argument('--json-out',
+                        help="Guardar el reporte en JSON en este archivo")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    load_env_file(args.env_file)
+
+    print("🚀 PRUEBA DE CARGA DEL BACKEND DEMO")
+    if aiohttp is None:
+        print("ℹ️ aiohttp no está instalado; se usa urllib en hilos")
+    print("=" * 80)
+
+    db_config = db_config_from_env()
+    sessions = discover_sessions(db_config, args.apoderados, args.tesoreros, args.password, args.seed)
+    report = asyncio.run(run_load(args, sessions))
+    if report is None:
+        print("❌ Ningún usuario pudo iniciar sesión; revisa --base-url y --password")
+        sys.exit(1)
+
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"💾 Reporte guardado en {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Módulos de apoyo para auto-populate-demo.py: generación de datos demo a escala
+para pruebas de carga del Sistema de Gestión Escolar.
+"""
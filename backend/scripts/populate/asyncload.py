@@ -0,0 +1,155 @@
+"""
+Carga asíncrona: por cada tabla, una corrutina genera y agrupa las filas en
+lotes y varias conexiones los insertan a la vez, unidas por una cola acotada
+que frena la generación cuando las conexiones no dan abasto. Así el
+siguiente lote se genera mientras el anterior viaja al servidor.
+
+Las llamadas de mysql.connector son bloqueantes y corren en hilos, que
+liberan el GIL mientras esperan la red. Cada commit_every lotes el
+productor espera a que la cola se vacíe, confirma todas las conexiones a la
+vez y anota en el diario las filas enviadas: lo confirmado es siempre un
+prefijo de la tabla, así que --resume salta exactamente esas filas. Al
+terminar la tabla se confirma igual, antes de pasar a la siguiente, para
+que las llaves foráneas vean las filas de las otras conexiones. Las
+conexiones salen del pool y sus transacciones quedan cortas, así que un
+lote que choca con un lock se reintenta (o se repite la transacción) con
+backoff.
+"""
+
+import asyncio
+import time
+
+from .pipeline import run_table, table_rows
+from .writer import insert_statement, statement_bytes
+
+# Lotes en cola por conexión antes de frenar la generación
+QUEUE_BATCHES_PER_CONNECTION = 2
+
+
+class _Coordinator:
+    """Confirmar todas las conexiones juntas y anotar en el diario las filas confirmadas"""
+
+    def __init__(self, connections, journal, table, skip):
+        self.connections = connections
+        self.journal = journal
+        self.table = table
+        self.skip = skip
+
+    async def commit(self, rows, done=False):
+        await asyncio.gather(*(asyncio.to_thread(connection.commit) for connection in self.connections))
+        if self.journal:
+            self.journal.mark(self.table, self.skip + rows, done=done)
+
+
+async def _produce(queue, rows, inserter, consumers, coordinator, every):
+    """
+    Agrupar las filas en lotes y encolarlos; cada every lotes, y al final,
+    esperar a que las conexiones los inserten y confirmar. None avisa el fin
+    a cada conexión.
+    """
+    batch = []
+    limit = None
+    batches = 0
+    sent = 0
+    for row in rows:
+        if limit is None:
+            limit = inserter.batch_limit(row)
+        batch.append(row)
+        if len(batch) >= limit:
+            await queue.put(batch)
+            sent += len(batch)
+            batches += 1
+            batch = []
+            if batches % every == 0:
+                await queue.join()
+                await coordinator.commit(sent)
+            # Ceder el turno para que las conexiones tomen el lote
+            await asyncio.sleep(0)
+    if batch:
+        await queue.put(batch)
+        sent += len(batch)
+    await queue.join()
+    await coordinator.commit(sent, done=True)
+    for _ in range(consumers):
+        await queue.put(None)
+
+
+async def _consume(queue, connection, inserter, table, columns):
+    """Insertar lotes de la cola en una conexión; el productor confirma"""
+    cursor = connection.cursor()
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+            query, params = insert_statement(table, columns, batch, inserter.ignore)
+            started = time.perf_counter()
+            await asyncio.to_thread(cursor.execute, query, params)
+            inserter.record(table, len(batch), time.perf_counter() - started, statement_bytes(query, params))
+            queue.task_done()
+    finally:
+        cursor.close()
+
+
+async def _load_table(connections, inserter, plan, rows, journal, skip, every):
+    queue = asyncio.Queue(maxsize=QUEUE_BATCHES_PER_CONNECTION * len(connections))
+    coordinator = _Coordinator(connections, journal, plan.table, skip)
+    tasks = [asyncio.create_task(_produce(queue, rows, inserter, len(connections), coordinator, max(1, every)))]
+    tasks.extend(asyncio.create_task(_consume(queue, connection, inserter, plan.table, plan.columns))
+                 for connection in connections)
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _run(pool, connections_count, connection, cursor, inserter, plan, generators, bulk_tables,
+               bulk_available, rejected, cache, journal, commit_every, block_generators):
+    connections = [pool.acquire() for _ in range(connections_count)]
+    try:
+        for table, table_plan in plan.items():
+            skip, done = journal.table(table) if journal else (0, False)
+            if done:
+                continue
+            if bulk_available and table in bulk_tables:
+                bulk_available = run_table(cursor, inserter, table_plan, generators[table],
+                                           bulk_tables, bulk_available, rejected, cache,
+                                           generate_blocks=block_generators.get(table))
+                connection.commit()
+                if journal:
+                    stats = inserter.stats.get(table)
+                    journal.mark(table, skip + (stats.rows if stats else 0), done=True)
+            else:
+                cache_path = cache.path(table, table_plan.columns) if cache else None
+                rows = table_rows(table_plan, generators[table], rejected, cache_path,
+                                  tee=bool(cache_path), skip=skip)
+                # Los lotes viajan en paralelo: filas/s contra el tiempo de pared de la tabla
+                with inserter.measure(table):
+                    await _load_table(connections, inserter, table_plan, rows, journal, skip, commit_every)
+    except BaseException:
+        for pooled in connections:
+            pooled.rollback()
+        raise
+    finally:
+        for pooled in connections:
+            pool.release(pooled)
+    return bulk_available
+
+
+def run_async(pool, connections, connection, cursor, inserter, plan, generators, bulk_tables=(),
+              bulk_available=False, rejected=None, cache=None, journal=None, commit_every=10,
+              block_generators=None):
+    """
+    Cargar las tablas de plan en orden con connections conexiones en
+    paralelo por tabla, confirmando cada commit_every lotes.
+    generators[table]() entrega las filas de la tabla. Las tablas de
+    bulk_tables se siguen cargando con LOAD DATA por cursor, por bloques de
+    columnas si block_generators[table]() existe.
+    """
+    rejected = {} if rejected is None else rejected
+    return asyncio.run(_run(pool, connections, connection, cursor, inserter, plan, generators,
+                            bulk_tables, bulk_available, rejected, cache, journal, commit_every,
+                            block_generators or {}))
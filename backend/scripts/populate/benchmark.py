@@ -0,0 +1,286 @@
+"""
+Benchmark de las consultas de los reportes de tesorero a distintas escalas:
+hace crecer el dataset demo hasta cada punto (1k, 100k, 1M pagos), ejecuta
+el SQL equivalente a los reportes de ingresos, egresos y KPI de
+reporteTesoreroService.js, mide tiempos, guarda el EXPLAIN de cada consulta
+y escribe un reporte JSON comparable entre corridas. Los egresos no se
+miden: el modo escala no genera gastos y sus tiempos saldrían de una tabla
+vacía.
+"""
+
+import json
+import math
+import statistics
+import time
+from dataclasses import replace
+from datetime import datetime
+
+from .finance import CREATED_BY, ESTADO_PAGO_PAGADO
+from .purge import DEMO_FILTERS
+from .scale import populate_scale
+
+# Puntos de escala por cantidad de pagos
+SCALE_POINTS = {'1k': 1000, '100k': 100000, '1m': 1000000}
+
+# Una consulta es más lenta que en el reporte base si supera este factor
+REGRESSION_FACTOR = 1.2
+
+
+class ReportQuery:
+    """
+    Consulta de un reporte. Las por curso reciben el id del curso en cada
+    %s; las globales se ejecutan una sola vez.
+    """
+
+    def __init__(self, name, report, sql, tables, per_course=True):
+        self.name = name
+        self.report = report
+        self.sql = sql
+        self.tables = tables
+        self.per_course = per_course
+
+    def available(self, catalog):
+        return all(catalog.has_table(table) for table in self.tables)
+
+    def params(self, curso_id):
+        return (curso_id,) * self.sql.count('%s') if self.per_course else ()
+
+
+# Consultas de reporteTesoreroService.js que leen gastos, tabla que el modo
+# escala no genera: se informan como omitidas en el reporte
+OMITTED_QUERIES = {
+    'total_egresos': 'gastos no se genera en el modo escala',
+    'egresos_por_categoria': 'gastos no se genera en el modo escala',
+    'principales_gastos': 'gastos no se genera en el modo escala',
+}
+
+# Equivalentes en SQL de reporteTesoreroService.js. El servicio agrega en
+# JavaScript filas de MovimientoCuenta por CuentaCurso, modelos que no están
+# en este esquema: los ingresos salen de pagos.
+REPORT_QUERIES = [
+    ReportQuery('metricas_principales', 'kpi', f"""
+        SELECT COALESCE(SUM(p.monto_pagado), 0) AS total_ingresos
+        FROM pagos p
+        JOIN alumnos a ON a.id = p.alumno_id
+        WHERE a.curso_id = %s AND p.estado_id = {ESTADO_PAGO_PAGADO}
+    """, ['pagos', 'alumnos']),
+    ReportQuery('deudas_curso', 'kpi', """
+        SELECT COUNT(*), COALESCE(SUM(d.monto_adeudado), 0),
+               SUM(CASE WHEN d.estado = 'pendiente' THEN 1 ELSE 0 END)
+        FROM deudas_alumnos d
+        JOIN alumnos a ON a.id = d.alumno_id
+        WHERE a.curso_id = %s
+    """, ['deudas_alumnos', 'alumnos']),
+    ReportQuery('cuenta_corriente_curso', 'kpi', """
+        SELECT m.tipo_movimiento, COUNT(*), SUM(m.monto)
+        FROM movimientos_ccaa m
+        JOIN alumnos a ON a.id = m.alumno_id
+        WHERE a.curso_id = %s
+        GROUP BY m.tipo_movimiento
+    """, ['movimientos_ccaa', 'alumnos']),
+    ReportQuery('ingresos_detalle', 'ingresos', f"""
+        SELECT p.id, p.monto_pagado, p.metodo_pago, p.fecha_pago
+        FROM pagos p
+        JOIN alumnos a ON a.id = p.alumno_id
+        WHERE a.curso_id = %s AND p.estado_id = {ESTADO_PAGO_PAGADO}
+        ORDER BY p.fecha_pago DESC
+    """, ['pagos', 'alumnos']),
+    ReportQuery('ingresos_por_metodo', 'ingresos', f"""
+        SELECT p.metodo_pago, COUNT(*), SUM(p.monto_pagado), AVG(p.monto_pagado)
+        FROM pagos p
+        JOIN alumnos a ON a.id = p.alumno_id
+        WHERE a.curso_id = %s AND p.estado_id = {ESTADO_PAGO_PAGADO}
+        GROUP BY p.metodo_pago
+    """, ['pagos', 'alumnos']),
+    ReportQuery('top_contribuyentes', 'ingresos', f"""
+        SELECT a.apoderado_id, SUM(p.monto_pagado) AS total_aportado, COUNT(*) AS cantidad_pagos
+        FROM pagos p
+        JOIN alumnos a ON a.id = p.alumno_id
+        WHERE a.curso_id = %s AND p.estado_id = {ESTADO_PAGO_PAGADO}
+        GROUP BY a.apoderado_id
+        ORDER BY total_aportado DESC
+        LIMIT 5
+    """, ['pagos', 'alumnos']),
+    # Lo que el servicio hace con una consulta por curso, en una sola pasada
+    ReportQuery('ingresos_todos_los_cursos', 'kpi', f"""
+        SELECT a.curso_id, COUNT(*), SUM(p.monto_pagado)
+        FROM pagos p
+        JOIN alumnos a ON a.id = p.alumno_id
+        WHERE p.estado_id = {ESTADO_PAGO_PAGADO}
+        GROUP BY a.curso_id
+    """, ['pagos', 'alumnos'], per_course=False),
+]
+
+
+def parse_points(value):
+    """'1k,100k' -> [('1k', 1000), ('100k', 100000)]; acepta también números"""
+    points = []
+    for label in (item.strip().lower() for item in value.split(',') if item.strip()):
+        if label in SCALE_POINTS:
+            points.append((label, SCALE_POINTS[label]))
+        elif label.isdigit():
+            points.append((label, int(label)))
+        else:
+            raise ValueError(f"Punto de escala desconocido: {label} (use {', '.join(SCALE_POINTS)} o un número)")
+    return sorted(points, key=lambda point: point[1])
+
+
+def expected_payments_per_course(config):
+    """Pagos esperados por curso según la distribución de pagos (sin fecha de corte)"""
+    profiles = config.distribution.profiles
+    total_weight = sum(profile.weight for profile in profiles)
+    pay = sum(profile.weight * profile.pay_probability for profile in profiles) / total_weight
+    return config.students_per_course * config.months * pay * (1 + config.distribution.failure_probability)
+
+
+def demo_counts(cursor):
+    """(cursos demo, pagos demo) existentes, con el mismo filtro de pagos demo que la purga"""
+    cursor.execute("SELECT COUNT(*) FROM cursos WHERE creado_por = %s", (CREATED_BY,))
+    courses = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COUNT(*) FROM pagos WHERE {DEMO_FILTERS['pagos']}", (CREATED_BY,))
+    return courses, cursor.fetchone()[0]
+
+
+def sample_courses(cursor, limit):
+    """Cursos demo repartidos en todo el rango de ids"""
+    cursor.execute("SELECT id FROM cursos WHERE creado_por = %s ORDER BY id", (CREATED_BY,))
+    ids = [curso_id for curso_id, in cursor.fetchall()]
+    if len(ids) <= limit:
+        return ids
+    step = len(ids) / limit
+    return [ids[int(i * step)] for i in range(limit)]
+
+
+def explain(cursor, query, params):
+    """Filas de EXPLAIN como diccionarios, más las tablas leídas sin índice"""
+    cursor.execute(f"EXPLAIN {query.sql}", params)
+    columns = [column[0] for column in cursor.description]
+    plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    full_scans = sorted({row.get('table') for row in plan
+                         if row.get('type') == 'ALL' and row.get('table')})
+    return plan, full_scans
+
+
+def time_query(cursor, query, courses, repeat):
+    """Ejecutar la consulta (por cada curso de la muestra) repeat veces"""
+    targets = courses if query.per_course else [None]
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        for curso_id in targets:
+            started = time.perf_counter()
+            cursor.execute(query.sql, query.params(curso_id))
+            rows += len(cursor.fetchall())
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'executions': len(timings),
+        'rows_per_execution': rows / len(timings) if timings else 0,
+        'min_ms': timings[0],
+        'median_ms': statistics.median(timings),
+        'p95_ms': timings[max(0, math.ceil(0.95 * len(timings)) - 1)],
+        'max_ms': timings[-1],
+    }
+
+
+def benchmark_queries(cursor, catalog, courses, repeat):
+    """Medir y explicar cada consulta disponible en el esquema"""
+    results = {}
+    for query in REPORT_QUERIES:
+        if not query.available(catalog):
+            print(f"⚠️ {query.name}: faltan tablas ({', '.join(query.tables)}), saltando...")
+            continue
+        if query.per_course and not courses:
+            continue
+        timing = time_query(cursor, query, courses, repeat)
+        plan, full_scans = explain(cursor, query, query.params(courses[0] if courses else None))
+        results[query.name] = {'report': query.report, **timing, 'full_scans': full_scans,
+                               'explain': plan}
+        scans = f" | ⚠️ sin índice: {', '.join(full_scans)}" if full_scans else ''
+        print(f"   ⏱️ {query.name}: mediana {timing['median_ms']:.2f} ms, "
+              f"p95 {timing['p95_ms']:.2f} ms{scans}")
+    return results
+
+
+def grow_to(cursor, connection, config, catalog, target, index, db_config=None, pool=None):
+    """
+    Agregar cursos demo hasta llegar a unos target pagos. La cantidad de
+    cursos se estima con los pagos por curso ya cargados o, si no hay, con
+    la distribución de pagos. Devuelve los segundos de carga.
+    """
+    courses, payments = demo_counts(cursor)
+    if payments >= target:
+        return 0.0
+    per_course = payments / courses if courses and payments else expected_payments_per_course(config)
+    missing = max(1, math.ceil((target - payments) / per_course))
+    seed = (config.seed or 0) + index
+    print(f"\n📈 Creciendo a ~{target} pagos: {missing} cursos más (semilla {seed})")
+    started = time.perf_counter()
+    populate_scale(cursor, connection, replace(config, courses=missing, seed=seed, resume=False),
+                   catalog, db_config=db_config, pool=pool)
+    connection.commit()
+    return time.perf_counter() - started
+
+
+def server_version(cursor):
+    cursor.execute("SELECT VERSION()")
+    return cursor.fetchone()[0]
+
+
+def run_benchmark(cursor, connection, config, catalog, points, db_config=None, pool=None,
+                  sample=10, repeat=5, output=None, baseline=None):
+    """Recorrer los puntos de escala, medir las consultas y escribir el reporte"""
+    print("\n🏁 BENCHMARK DE REPORTES DE TESORERO")
+    print("=" * 60)
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'database': catalog.database,
+        'server_version': server_version(cursor),
+        'sample_courses': sample,
+        'repeat': repeat,
+        'omitted_queries': OMITTED_QUERIES,
+        'points': [],
+    }
+    print(f"⏭️ Egresos omitidos ({', '.join(OMITTED_QUERIES)}): el modo escala no genera gastos")
+    for index, (label, target) in enumerate(points):
+        load_seconds = grow_to(cursor, connection, config, catalog, target, index, db_config, pool)
+        analyzed = [table for table in ('pagos', 'alumnos') if catalog.has_table(table)]
+        if analyzed:
+            cursor.execute(f"ANALYZE TABLE {', '.join(analyzed)}")
+            cursor.fetchall()
+        courses, payments = demo_counts(cursor)
+        print(f"\n📊 Punto {label}: {payments} pagos demo, {courses} cursos demo")
+        results = benchmark_queries(cursor, catalog, sample_courses(cursor, sample), repeat)
+        report['points'].append({
+            'label': label, 'target_payments': target, 'payments': payments,
+            'courses': courses, 'load_seconds': load_seconds, 'queries': results,
+        })
+
+    if baseline:
+        compare_reports(report, baseline)
+    if output:
+        with open(output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, default=str)
+        print(f"💾 Reporte del benchmark en {output}")
+    return report
+
+
+def compare_reports(report, baseline_path):
+    """Mostrar las consultas más lentas que en un reporte anterior"""
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    previous = {point['label']: point['queries'] for point in baseline.get('points', [])}
+    print(f"\n🔁 Comparación con {baseline_path}")
+    regressions = 0
+    for point in report['points']:
+        for name, result in point['queries'].items():
+            before = previous.get(point['label'], {}).get(name)
+            if not before or not before['median_ms']:
+                continue
+            factor = result['median_ms'] / before['median_ms']
+            if factor > REGRESSION_FACTOR:
+                regressions += 1
+                print(f"❌ {point['label']} {name}: {before['median_ms']:.2f} → "
+                      f"{result['median_ms']:.2f} ms (x{factor:.2f})")
+    if not regressions:
+        print("✅ Sin regresiones")
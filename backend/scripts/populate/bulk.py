@@ -0,0 +1,221 @@
+"""
+Carga masiva con LOAD DATA LOCAL INFILE: las filas se escriben en streaming
+a un archivo TSV temporal y se cargan en una sola instrucción. Las tablas
+generadas con NumPy pueden escribirse por bloques de columnas en lugar de
+fila a fila (write_tsv_columns).
+"""
+
+import gzip
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import repeat
+
+import mysql.connector
+
+from .streams import np
+
+# Errores que indican que el servidor o el cliente no permiten LOCAL INFILE
+LOCAL_INFILE_ERRORS = {
+    1148,  # ER_NOT_ALLOWED_COMMAND
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+    3950,  # ER_LOAD_DATA_INFILE_REJECTED
+}
+
+TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+TSV_UNESCAPES = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r', '0': '\0'}
+TSV_SPECIALS = ('\\', '\t', '\n', '\r', '\0')
+
+
+def tsv_value(value):
+    """Convertir un valor al formato por defecto de LOAD DATA"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('utf-8')
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return str(value).translate(TSV_ESCAPES)
+
+
+def write_tsv(handle, rows):
+    """Escribir filas en streaming; devuelve la cantidad de filas escritas"""
+    count = 0
+    for row in rows:
+        handle.write('\t'.join([tsv_value(value) for value in row]))
+        handle.write('\n')
+        count += 1
+    return count
+
+
+def tsv_column(values):
+    """
+    Versión por columnas de tsv_value: la lista de textos de un arreglo
+    NumPy, o el texto de un valor constante.
+    """
+    if np is None or not isinstance(values, np.ndarray):
+        return tsv_value(values)
+    if not len(values):
+        return []
+    kind = values.dtype.kind
+    if kind == 'M':
+        if np.datetime_data(values.dtype)[0] == 'D':
+            return np.datetime_as_string(values).tolist()
+        # 'YYYY-MM-DDTHH:MM:SS' de ancho fijo: basta cambiar la T por un espacio
+        text = np.datetime_as_string(values.astype('datetime64[s]'))
+        text.view('U1').reshape(len(text), -1)[:, 10] = ' '
+        return text.tolist()
+    if kind == 'b':
+        return np.where(values, '1', '0').tolist()
+    if kind in 'iuf':
+        return values.astype(str).tolist()
+    if kind == 'U':
+        texts = values.tolist()
+        joined = ''.join(texts)
+        if any(special in joined for special in TSV_SPECIALS):
+            texts = [text.translate(TSV_ESCAPES) for text in texts]
+        return texts
+    return [tsv_value(value) for value in values.tolist()]
+
+
+def write_tsv_columns(handle, blocks):
+    """
+    Escribir bloques de columnas (listas de arreglos NumPy o valores
+    constantes, ver finance.pagos_blocks) sin pasar valor a valor por
+    tsv_value. Devuelve la cantidad de filas escritas.
+    """
+    count = 0
+    for block in blocks:
+        texts = [tsv_column(column) for column in block]
+        size = max((len(text) for text in texts if isinstance(text, list)), default=0)
+        if not size:
+            continue
+        columns = [text if isinstance(text, list) else repeat(text, size) for text in texts]
+        handle.write('\n'.join(map('\t'.join, zip(*columns))))
+        handle.write('\n')
+        count += size
+    return count
+
+
+def tsv_field(field):
+    """Convertir un campo TSV de vuelta a valor (texto o None)"""
+    if field == '\\N':
+        return None
+    if '\\' not in field:
+        return field
+    chars = []
+    escaped = False
+    for char in field:
+        if escaped:
+            chars.append(TSV_UNESCAPES.get(char, char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        else:
+            chars.append(char)
+    return ''.join(chars)
+
+
+def read_tsv(path):
+    """Leer en streaming un archivo escrito por write_tsv (o su versión .gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as handle:
+        for line in handle:
+            yield tuple(tsv_field(field) for field in line.rstrip('\n').split('\t'))
+
+
+def write_tsv_file(path, rows, write=write_tsv):
+    """Escribir filas a path de forma atómica (archivo temporal y rename)"""
+    partial = f"{path}.partial"
+    with open(partial, 'w', encoding='utf-8', newline='') as handle:
+        count = write(handle, rows)
+    os.replace(partial, path)
+    return count
+
+
+def count_lines(path):
+    """Cantidad de filas de un archivo TSV"""
+    with open(path, 'rb') as handle:
+        return sum(1 for _ in handle)
+
+
+def local_infile_enabled(cursor):
+    """Consultar si el servidor acepta LOAD DATA LOCAL INFILE"""
+    cursor.execute("SHOW VARIABLES LIKE 'local_infile'")
+    row = cursor.fetchone()
+    return bool(row) and str(row[1]).upper() in ('ON', '1')
+
+
+@contextmanager
+def session_settings(cursor, **settings):
+    """
+    Cambiar variables de sesión (unique_checks, foreign_key_checks, ...)
+    durante el bloque y volver después a los valores que tenían, para no
+    pisar lo que haya configurado quien llama.
+    """
+    names = list(settings)
+    cursor.execute("SELECT " + ', '.join(f"@@SESSION.{name}" for name in names))
+    previous = tuple(cursor.fetchone())
+    assignments = ', '.join(f"{name} = %s" for name in names)
+    cursor.execute(f"SET SESSION {assignments}", tuple(settings.values()))
+    try:
+        yield
+    finally:
+        cursor.execute(f"SET SESSION {assignments}", previous)
+
+
+def load_data_infile(cursor, table, columns, rows, tmpdir=None, path=None, write=write_tsv):
+    """
+    Cargar filas con LOAD DATA LOCAL INFILE relajando unique_checks y
+    foreign_key_checks durante la carga (y dejándolos como estaban). Devuelve (filas, segundos, bytes
+    del archivo) o None si el servidor rechaza LOCAL INFILE.
+
+    Con path, el TSV se conserva en esa ruta (caché); si ya existe, se
+    carga directamente sin consumir rows. write escribe rows al TSV
+    (write_tsv_columns si rows son bloques de columnas).
+    """
+    keep = path is not None
+    if keep and os.path.exists(path):
+        count = count_lines(path)
+    elif keep:
+        count = write_tsv_file(path, rows, write)
+    else:
+        handle = tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', newline='', suffix=f'.{table}.tsv', dir=tmpdir, delete=False)
+        with handle:
+            count = write(handle, rows)
+        path = handle.name
+    try:
+        infile = os.path.abspath(path).replace('\\', '/')
+        query = (
+            f"LOAD DATA LOCAL INFILE '{infile}' INTO TABLE {table} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})"
+        )
+
+        try:
+            with session_settings(cursor, unique_checks=0, foreign_key_checks=0):
+                started = time.perf_counter()
+                cursor.execute(query)
+                elapsed = time.perf_counter() - started
+        except mysql.connector.Error as err:
+            if err.errno in LOCAL_INFILE_ERRORS:
+                print(f"⚠️ LOAD DATA LOCAL INFILE rechazado para {table}: {err}")
+                return None
+            raise
+
+        return count, elapsed, os.path.getsize(path)
+    finally:
+        if not keep:
+            os.unlink(path)
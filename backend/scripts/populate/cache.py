@@ -0,0 +1,28 @@
+"""
+Caché local de datasets generados: archivos TSV por tabla y shard, guardados
+bajo la huella del dataset para reutilizarlos en lugar de volver a generar.
+"""
+
+import hashlib
+import os
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'cuotify-populate')
+
+
+class DatasetCache:
+    """Archivos TSV de un dataset identificado por su huella"""
+
+    def __init__(self, root, fingerprint):
+        self.root = root
+        self.fingerprint = fingerprint
+        self.directory = os.path.join(root, fingerprint)
+
+    def path(self, table, columns, shard=None):
+        """Ruta del TSV de una tabla (y shard) con un conjunto de columnas"""
+        os.makedirs(self.directory, exist_ok=True)
+        columns_hash = hashlib.sha256(','.join(columns).encode('utf-8')).hexdigest()[:8]
+        part = f"{shard[0]}of{shard[1]}" if shard else 'all'
+        return os.path.join(self.directory, f"{table}-{columns_hash}-{part}.tsv")
+
+    def has(self, table, columns, shard=None):
+        return os.path.exists(self.path(table, columns, shard))
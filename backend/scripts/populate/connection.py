@@ -0,0 +1,342 @@
+"""
+Conexiones resistentes a fallas transitorias de un servidor remoto:
+reconexión automática, reintento con backoff exponencial de la transacción
+en curso ante deadlocks, esperas de lock agotadas y conexiones caídas, y
+contadores por tipo de error para el resumen final.
+"""
+
+import os
+import random
+import time
+
+import mysql.connector
+
+# Errores que deshacen solo la instrucción: basta con repetirla
+STATEMENT_ERRORS = {
+    1205: 'lock_wait_timeout',  # ER_LOCK_WAIT_TIMEOUT
+}
+
+# Errores que deshacen la transacción completa: hay que repetirla entera
+TRANSACTION_ERRORS = {
+    1213: 'deadlock',  # ER_LOCK_DEADLOCK
+}
+
+# Conexión perdida: reconectar y repetir la transacción
+CONNECTION_ERRORS = {
+    2002: 'connection_refused',  # CR_CONNECTION_ERROR
+    2003: 'connection_refused',  # CR_CONN_HOST_ERROR
+    2006: 'server_gone',         # CR_SERVER_GONE_ERROR
+    2013: 'lost_connection',     # CR_SERVER_LOST
+    2055: 'lost_connection',     # CR_SERVER_LOST_EXTENDED
+}
+
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+
+# Instrucciones de escritura guardadas para repetir la transacción; pasado
+# este límite sin COMMIT, un deadlock o una caída ya no se pueden reintentar
+REPLAY_LIMIT = 50
+
+READ_PREFIXES = ('SELECT', 'SHOW', 'EXPLAIN', 'DESCRIBE', 'ANALYZE', 'SET')
+
+# DDL hace COMMIT implícito en MySQL: lo anterior ya quedó confirmado
+DDL_PREFIXES = ('ALTER', 'DROP', 'CREATE', 'TRUNCATE', 'RENAME')
+
+
+def statement_verb(query):
+    """Primera palabra de la instrucción, en mayúsculas"""
+    words = query.lstrip()[:16].split(None, 1)
+    return words[0].upper() if words else ''
+
+
+def is_session_set(query):
+    """SET de variables de sesión que una conexión nueva no conserva"""
+    words = query.lstrip()[:32].upper().split()
+    return len(words) > 1 and words[0] == 'SET' and words[1] not in ('GLOBAL', 'PERSIST', 'TRANSACTION')
+
+
+def db_config_from_env():
+    """Conexión a la misma base que usa el backend (variables DB_* de su .env)"""
+    return {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'port': int(os.environ.get('DB_PORT', 3306)),
+        'user': os.environ.get('DB_USER', 'root'),
+        'password': os.environ.get('DB_PASSWORD', ''),
+        'database': os.environ.get('DB_NAME', 'sistema_gestion_escolar'),
+        'charset': 'utf8mb4',
+    }
+
+
+def load_env_file(path):
+    """Cargar un .env (CLAVE=valor) sin pisar variables ya definidas"""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                os.environ.setdefault(key.strip(), value.strip().strip('"\''))
+
+
+def error_class(err, connected=True):
+    """Tipo de error transitorio de una excepción, o None si no es transitorio"""
+    errno = getattr(err, 'errno', None)
+    if errno in STATEMENT_ERRORS:
+        return STATEMENT_ERRORS[errno]
+    if errno in TRANSACTION_ERRORS:
+        return TRANSACTION_ERRORS[errno]
+    if errno in CONNECTION_ERRORS:
+        return CONNECTION_ERRORS[errno]
+    if isinstance(err, (mysql.connector.OperationalError, mysql.connector.InterfaceError)) and not connected:
+        return 'lost_connection'
+    return None
+
+
+class ErrorStats:
+    """Contadores de errores transitorios por tipo y resultado de los reintentos"""
+
+    def __init__(self):
+        self.errors = {}
+        self.retries = 0
+        self.recovered = 0
+        self.failed = 0
+        self.reconnects = 0
+
+    def as_dict(self):
+        return {'errors': dict(self.errors), 'retries': self.retries, 'recovered': self.recovered,
+                'failed': self.failed, 'reconnects': self.reconnects}
+
+    def merge(self, data):
+        """Sumar contadores de otro proceso (en el formato de as_dict)"""
+        for kind, count in data['errors'].items():
+            self.errors[kind] = self.errors.get(kind, 0) + count
+        for name in ('retries', 'recovered', 'failed', 'reconnects'):
+            setattr(self, name, getattr(self, name) + data[name])
+
+    def report(self):
+        """Mostrar los errores transitorios de la corrida, si hubo"""
+        if not self.errors:
+            return
+        print("\n🛡️ ERRORES TRANSITORIOS DE MYSQL")
+        print("=" * 60)
+        for kind, count in sorted(self.errors.items()):
+            print(f"⚠️ {kind}: {count}")
+        print(f"🔁 {self.retries} reintentos, {self.reconnects} reconexiones: "
+              f"{self.recovered} lotes recuperados, {self.failed} sin recuperar")
+
+
+def backoff_delay(attempt, backoff):
+    """Espera exponencial con jitter antes del intento attempt (desde 1)"""
+    return min(MAX_BACKOFF, backoff * 2 ** (attempt - 1)) * random.uniform(1.0, 1.5)
+
+
+class ResilientCursor:
+    """Cursor que ejecuta a través de su conexión resistente; el resto se delega"""
+
+    def __init__(self, connection, **options):
+        self.connection = connection
+        self.options = options
+        self.generation = connection.generation
+        self.raw = connection.raw.cursor(**options)
+
+    def refresh(self):
+        """Abrir un cursor nuevo si la conexión se rehízo"""
+        if self.generation != self.connection.generation:
+            self.raw = self.connection.raw.cursor(**self.options)
+            self.generation = self.connection.generation
+
+    def execute(self, query, params=None):
+        self.connection.execute(self, query, params)
+
+    def executemany(self, query, seq_params):
+        self.connection.execute(self, query, list(seq_params), many=True)
+
+    def close(self):
+        try:
+            self.raw.close()
+        except mysql.connector.Error:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ResilientConnection:
+    """
+    Conexión que guarda las escrituras desde el último COMMIT; ante un error
+    transitorio espera con backoff, reconecta si hace falta y repite la
+    transacción (o solo la instrucción, si el servidor deshizo solo esa).
+    El DDL cuenta como COMMIT, y los SET de sesión se reaplican al reconectar.
+    """
+
+    def __init__(self, db_config, stats=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.db_config = db_config
+        self.stats = stats or ErrorStats()
+        self.retries = retries
+        self.backoff = backoff
+        self.generation = 0
+        self.pending = []
+        self.replayable = True
+        self.session = {}
+        self.raw = self._connect()
+
+    def _connect(self):
+        attempt = 0
+        while True:
+            try:
+                return mysql.connector.connect(**self.db_config)
+            except mysql.connector.Error as err:
+                kind = error_class(err, connected=False)
+                if kind is None or attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.stats.errors[kind] = self.stats.errors.get(kind, 0) + 1
+                time.sleep(backoff_delay(attempt, self.backoff))
+
+    def reconnect(self):
+        try:
+            self.raw.close()
+        except mysql.connector.Error:
+            pass
+        self.raw = self._connect()
+        self.generation += 1
+        self.stats.reconnects += 1
+        if self.session:
+            cursor = self.raw.cursor()
+            try:
+                for query, params in self.session.values():
+                    cursor.execute(query, params)
+            finally:
+                cursor.close()
+
+    def cursor(self, **options):
+        return ResilientCursor(self, **options)
+
+    def _log(self, query, params, many=False):
+        """Guardar una escritura para poder repetir la transacción"""
+        verb = statement_verb(query)
+        if verb == 'SET' and is_session_set(query):
+            # La última vez al final: al reconectar se aplican en orden
+            self.session.pop(query, None)
+            self.session[query] = (query, params)
+            return
+        if verb in DDL_PREFIXES:
+            self.pending = []
+            self.replayable = True
+            return
+        if not self.replayable or verb in READ_PREFIXES:
+            return
+        # LOAD DATA lee un archivo que puede no existir al reintentar
+        if len(self.pending) >= REPLAY_LIMIT or 'INFILE' in query[:40].upper():
+            self.pending = []
+            self.replayable = False
+            return
+        self.pending.append((query, params, many))
+
+    def execute(self, cursor, query, params=None, many=False):
+        """Ejecutar con reintentos; un lote que falla se repite completo"""
+        attempt = 0
+        replay = False
+        while True:
+            cursor.refresh()
+            try:
+                if replay:
+                    for pending_query, pending_params, pending_many in self.pending:
+                        if pending_many:
+                            cursor.raw.executemany(pending_query, pending_params)
+                        else:
+                            cursor.raw.execute(pending_query, pending_params)
+                    replay = False
+                if many:
+                    cursor.raw.executemany(query, params)
+                else:
+                    cursor.raw.execute(query, params)
+                break
+            except mysql.connector.Error as err:
+                kind = error_class(err, self._connected())
+                rolled_back = kind is not None and kind not in STATEMENT_ERRORS.values()
+                if kind is None or attempt >= self.retries or (rolled_back and not self.replayable):
+                    if kind is not None:
+                        self.stats.errors[kind] = self.stats.errors.get(kind, 0) + 1
+                        self.stats.failed += 1
+                    raise
+                attempt += 1
+                self.stats.errors[kind] = self.stats.errors.get(kind, 0) + 1
+                self.stats.retries += 1
+                time.sleep(backoff_delay(attempt, self.backoff))
+                if kind in CONNECTION_ERRORS.values() or not self._connected():
+                    self.reconnect()
+                elif rolled_back:
+                    self.raw.rollback()
+                replay = rolled_back and bool(self.pending)
+        if attempt:
+            self.stats.recovered += 1
+        self._log(query, params, many)
+
+    def _connected(self):
+        try:
+            return self.raw.is_connected()
+        except mysql.connector.Error:
+            return False
+
+    def commit(self):
+        self.raw.commit()
+        self.pending = []
+        self.replayable = True
+
+    def rollback(self):
+        self.pending = []
+        self.replayable = True
+        try:
+            self.raw.rollback()
+        except mysql.connector.Error:
+            if self._connected():
+                raise
+
+    def close(self):
+        self.raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ConnectionPool:
+    """
+    Conexiones resistentes reutilizables que comparten sus contadores de
+    errores; acquire() entrega una libre o abre una nueva.
+    """
+
+    def __init__(self, db_config, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.db_config = db_config
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = ErrorStats()
+        self.idle = []
+        self.connections = []
+
+    @property
+    def settings(self):
+        """Parámetros para abrir conexiones equivalentes en otro proceso"""
+        return {'retries': self.retries, 'backoff': self.backoff}
+
+    def acquire(self):
+        if self.idle:
+            return self.idle.pop()
+        connection = ResilientConnection(self.db_config, self.stats, self.retries, self.backoff)
+        self.connections.append(connection)
+        return connection
+
+    def release(self, connection):
+        connection.rollback()
+        self.idle.append(connection)
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.close()
+            except mysql.connector.Error:
+                pass
+        self.connections = []
+        self.idle = []
@@ -0,0 +1,164 @@
+"""
+Volcado SQL sin conexión: destino de BatchInserter que escribe cada lote
+como INSERT multi-fila en archivos .sql.gz por tabla, cortados por tamaño
+y numerados en orden de llaves foráneas, para cargarlos después con el
+cliente mysql. Generar un volcado no toca ninguna base de datos.
+"""
+
+import gzip
+import json
+import math
+import numbers
+import os
+import re
+from datetime import date, datetime, time as datetime_time, timedelta
+from decimal import Decimal
+
+MANIFEST = 'manifest.json'
+
+# Tamaño sin comprimir de cada archivo del volcado antes de abrir el siguiente
+DEFAULT_FILE_MB = 64
+COMPRESS_LEVEL = 1
+
+FILE_HEADER = (
+    "SET NAMES utf8mb4;\n"
+    "SET foreign_key_checks = 0;\n"
+    "SET unique_checks = 0;\n"
+    "SET autocommit = 0;\n"
+)
+FILE_FOOTER = (
+    "COMMIT;\n"
+    "SET unique_checks = 1;\n"
+    "SET foreign_key_checks = 1;\n"
+)
+
+# Escapes de cadenas del servidor (mismos que mysql_real_escape_string)
+ESCAPES = str.maketrans({
+    '\\': '\\\\', "'": "\\'", '\0': '\\0', '\n': '\\n', '\r': '\\r', '\x1a': '\\Z',
+})
+NEEDS_ESCAPE = re.compile('[\\\\\'\0\n\r\x1a]')
+
+
+def _string(value):
+    if NEEDS_ESCAPE.search(value):
+        value = value.translate(ESCAPES)
+    return f"'{value}'"
+
+
+def _float(value):
+    return repr(float(value)) if math.isfinite(value) else 'NULL'
+
+
+def _bytes(value):
+    return "X'" + bytes(value).hex() + "'"
+
+
+# Literal por tipo exacto; los tipos no listados pasan por sql_literal completo
+LITERALS = {
+    str: _string,
+    int: str,
+    float: _float,
+    bool: lambda value: '1' if value else '0',
+    type(None): lambda value: 'NULL',
+    Decimal: str,
+    datetime: lambda value: f"'{value:%Y-%m-%d %H:%M:%S}'",
+    date: lambda value: f"'{value.isoformat()}'",
+    datetime_time: lambda value: f"'{value.isoformat()}'",
+    timedelta: lambda value: f"'{value}'",
+    bytes: _bytes,
+    bytearray: _bytes,
+    memoryview: _bytes,
+}
+
+
+def sql_literal(value):
+    """Literal SQL de un valor de Python"""
+    render = LITERALS.get(type(value))
+    if render:
+        return render(value)
+    for kind, render in LITERALS.items():
+        if isinstance(value, kind):
+            return render(value)
+    # Escalares de NumPy y otros números
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, numbers.Real):
+        return _float(value)
+    return _string(str(value))
+
+
+def insert_sql(table, columns, rows, ignore=False):
+    """INSERT multi-fila con los valores escritos como literales"""
+    verb = 'INSERT IGNORE' if ignore else 'INSERT'
+    values = ',\n'.join('(' + ', '.join(map(sql_literal, row)) + ')' for row in rows)
+    return f"{verb} INTO {table} ({', '.join(columns)}) VALUES\n{values};\n"
+
+
+class DumpSink:
+    """
+    Escribe cada lote como un INSERT multi-fila en archivos
+    NN_tabla.NNNN.sql.gz de directory. NN es la posición de la tabla en
+    order (orden de llaves foráneas), así que cargar los archivos en orden
+    alfabético respeta las dependencias. Cada archivo es autónomo: abre con
+    los SET de la sesión de carga y termina con COMMIT.
+    """
+
+    def __init__(self, directory, order, max_bytes=DEFAULT_FILE_MB * 1024 * 1024,
+                 compresslevel=COMPRESS_LEVEL):
+        self.directory = directory
+        self.order = list(order)
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.handles = {}
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self, table):
+        files = self.files.setdefault(table, [])
+        position = self.order.index(table) + 1 if table in self.order else len(self.order) + 1
+        name = f"{position:02d}_{table}.{len(files) + 1:04d}.sql.gz"
+        handle = gzip.open(os.path.join(self.directory, name), 'wt', encoding='utf-8',
+                           compresslevel=self.compresslevel)
+        handle.write(FILE_HEADER)
+        files.append({'file': name, 'rows': 0, 'bytes': len(FILE_HEADER)})
+        self.handles[table] = handle
+        return handle
+
+    def _close(self, table):
+        handle = self.handles.pop(table, None)
+        if handle:
+            handle.write(FILE_FOOTER)
+            handle.close()
+
+    def write(self, table, columns, rows, ignore=False):
+        """Agregar un lote al archivo de la tabla; devuelve los bytes escritos sin comprimir"""
+        sql = insert_sql(table, columns, rows, ignore)
+        handle = self.handles.get(table)
+        if handle is None:
+            handle = self._open(table)
+        elif self.files[table][-1]['bytes'] + len(sql) > self.max_bytes:
+            self._close(table)
+            handle = self._open(table)
+        handle.write(sql)
+        current = self.files[table][-1]
+        current['rows'] += len(rows)
+        current['bytes'] += len(sql)
+        return len(sql)
+
+    @property
+    def file_names(self):
+        """Archivos en orden de carga"""
+        return sorted(entry['file'] for files in self.files.values() for entry in files)
+
+    def close(self):
+        """Cerrar los archivos y escribir el manifiesto con el orden de carga"""
+        for table in list(self.handles):
+            self._close(table)
+        manifest = {
+            'load_order': self.file_names,
+            'tables': {table: files for table, files in self.files.items()},
+        }
+        partial = os.path.join(self.directory, f"{MANIFEST}.partial")
+        with open(partial, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2)
+        os.replace(partial, os.path.join(self.directory, MANIFEST))
@@ -0,0 +1,382 @@
+"""
+Simulación financiera del modo escala: montos, fechas de pago, estados de
+pago y deudas. Con NumPy se calcula columna a columna por bloques de
+familias; sin NumPy se usa el mismo cálculo fila a fila. Los *_blocks
+entregan esos bloques de columnas tal cual, para que LOAD DATA escriba el
+TSV sin armar una tupla por fila.
+
+Los números aleatorios salen de populate.streams, indexados por evento,
+así que ambas versiones producen exactamente las mismas filas y el
+resultado no depende de los shards.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import repeat
+
+from .streams import np, stream_key, uniform, uniform_array
+
+# Estados según scripts/init-payment-states.sql
+ESTADO_PAGO_PENDIENTE = 1
+ESTADO_PAGO_PAGADO = 2
+ESTADO_PAGO_FALLIDO = 5
+
+METODOS_PAGO = ['Transferencia Bancaria', 'WebPay', 'Khipu', 'Efectivo']
+NOMBRES_MES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+    'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
+]
+
+CREATED_BY = 'DEMO_SYSTEM'
+
+# Familias por bloque en la versión NumPy (acota la memoria por bloque)
+CHUNK_FAMILIES = 20000
+
+# Flujo de pagos y sorteos dentro de él
+STREAM_PAGOS = 3
+DRAW_METODO = 0
+DRAW_PAGA = 1
+DRAW_DIAS = 2
+DRAW_FRACCION = 3
+DRAW_HORA = 4
+DRAW_MINUTO = 5
+DRAW_FALLA = 6
+
+
+@dataclass
+class PaymentProfile:
+    """Comportamiento de pago de un tipo de familia"""
+    name: str
+    weight: float
+    pay_probability: float
+    days: tuple              # (mín, máx) días respecto de fecha_limite_pago
+    fraction: tuple = (1.0, 1.0)  # fracción de la cuota que se paga
+
+
+def default_profiles():
+    return [
+        PaymentProfile('al_dia', 0.72, 0.97, (-15, 0)),
+        PaymentProfile('atrasado', 0.15, 0.90, (1, 45)),
+        PaymentProfile('parcial', 0.08, 0.80, (-5, 20), (0.3, 0.8)),
+        PaymentProfile('moroso', 0.05, 0.15, (30, 90)),
+    ]
+
+
+def default_seasonality():
+    # Meses de mayor gasto familiar (útiles en marzo, vacaciones de invierno
+    # en julio, fin de año en diciembre) bajan la probabilidad de pagar
+    return {3: 0.92, 7: 0.96, 12: 0.90}
+
+
+@dataclass
+class PaymentDistribution:
+    """Distribuciones configurables de la simulación de pagos"""
+    profiles: list = field(default_factory=default_profiles)
+    seasonality: dict = field(default_factory=default_seasonality)
+    failure_probability: float = 0.01
+
+    @classmethod
+    def from_json(cls, path):
+        """
+        Leer la distribución desde un JSON con las mismas claves; las que no
+        vengan mantienen su valor por defecto.
+        """
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        distribution = cls()
+        if 'profiles' in data:
+            distribution.profiles = [
+                PaymentProfile(item['name'], float(item['weight']), float(item['pay_probability']),
+                               tuple(item['days']), tuple(item.get('fraction', (1.0, 1.0))))
+                for item in data['profiles']
+            ]
+        if 'seasonality' in data:
+            distribution.seasonality = {int(month): float(factor)
+                                        for month, factor in data['seasonality'].items()}
+        if 'failure_probability' in data:
+            distribution.failure_probability = float(data['failure_probability'])
+        return distribution
+
+
+def month_labels(layout):
+    return [f"{NOMBRES_MES[month - 1]} {year}" for year, month, _ in layout.months]
+
+
+def monto_cuota(nivel_id):
+    """Monto mensual según nivel, redondeado a $500"""
+    return float(round((30000 + nivel_id * 2500) / 500) * 500)
+
+
+def payment_events(layout, family):
+    """
+    Simular los pagos de una familia fila a fila. Devuelve el método de pago
+    y una lista de (alumno_id, curso, mes, monto, intento, aplicado, estado,
+    momento): intento es lo que se pagó (0 si no hubo pago) y aplicado lo que
+    efectivamente abona a la cuota (0 si el pago falló).
+    """
+    distribution = layout.distribution
+    profile = distribution.profiles[layout.family_profile[family]]
+    keys = [stream_key(layout.seed, STREAM_PAGOS, draw) for draw in range(DRAW_FALLA + 1)]
+    metodo = METODOS_PAGO[int(uniform(keys[DRAW_METODO], family) * len(METODOS_PAGO))]
+    months = len(layout.months)
+    dias_min, dias_max = profile.days
+    fraccion_min, fraccion_max = profile.fraction
+
+    events = []
+    base = layout.id_bases['alumnos']
+    for slot in range(layout.family_start[family], layout.family_start[family + 1]):
+        course = layout.slot_course[slot]
+        monto = monto_cuota(layout.course_nivel[course])
+        for month, (_, month_number, fecha_limite) in enumerate(layout.months):
+            event = slot * months + month
+            intento = 0.0
+            aplicado = 0.0
+            estado = None
+            momento = None
+            probability = profile.pay_probability * distribution.seasonality.get(month_number, 1.0)
+            if uniform(keys[DRAW_PAGA], event) < probability:
+                dias = dias_min + int(uniform(keys[DRAW_DIAS], event) * (dias_max - dias_min + 1))
+                fecha_pago = fecha_limite + timedelta(days=dias)
+                if fecha_pago <= layout.fecha_corte:
+                    fraccion = fraccion_min + uniform(keys[DRAW_FRACCION], event) * (fraccion_max - fraccion_min)
+                    intento = float(round(monto * fraccion / 500) * 500)
+                    momento = datetime.combine(fecha_pago, datetime.min.time()) + timedelta(
+                        minutes=(8 + int(uniform(keys[DRAW_HORA], event) * 15)) * 60
+                        + int(uniform(keys[DRAW_MINUTO], event) * 60))
+                    if uniform(keys[DRAW_FALLA], event) < distribution.failure_probability:
+                        estado = ESTADO_PAGO_FALLIDO
+                    else:
+                        estado = ESTADO_PAGO_PAGADO
+                        aplicado = intento
+            events.append((base + slot + 1, course, month, monto, intento, aplicado, estado, momento))
+    return metodo, events
+
+
+def _view(values):
+    """Copiar un array.array a un arreglo NumPy de int64"""
+    return np.frombuffer(values, dtype=f"u{values.itemsize}").astype(np.int64)
+
+
+def payment_columns(layout, shard=None):
+    """
+    Versión NumPy de payment_events(): entrega, por bloques de familias, un
+    diccionario de columnas con un elemento por (alumno, mes).
+    """
+    distribution = layout.distribution
+    months = len(layout.months)
+    starts = _view(layout.family_start)
+    slot_course = _view(layout.slot_course)
+    course_nivel = _view(layout.course_nivel)
+    profile_index = _view(layout.family_profile)
+    keys = [stream_key(layout.seed, STREAM_PAGOS, draw) for draw in range(DRAW_FALLA + 1)]
+
+    profiles = distribution.profiles
+    pay_probability = np.array([profile.pay_probability for profile in profiles])
+    dias_min = np.array([profile.days[0] for profile in profiles], dtype=np.int64)
+    dias_span = np.array([profile.days[1] - profile.days[0] + 1 for profile in profiles], dtype=np.int64)
+    fraccion_min = np.array([profile.fraction[0] for profile in profiles])
+    fraccion_span = np.array([profile.fraction[1] - profile.fraction[0] for profile in profiles])
+    seasonality = np.array([distribution.seasonality.get(month_number, 1.0)
+                            for _, month_number, _ in layout.months])
+    fecha_limite = np.array([limit for _, _, limit in layout.months], dtype='datetime64[D]')
+    fecha_corte = np.datetime64(layout.fecha_corte, 'D')
+    montos = np.round((30000 + course_nivel * 2500) / 500) * 500
+
+    families = np.arange(layout.family_count, dtype=np.int64)
+    if shard is not None:
+        families = families[slot_course[starts[:-1]] % shard[1] == shard[0]]
+
+    for first in range(0, len(families), CHUNK_FAMILIES):
+        block = families[first:first + CHUNK_FAMILIES]
+        sizes = starts[block + 1] - starts[block]
+        block_offsets = np.cumsum(sizes) - sizes
+        slot = np.repeat(starts[block], sizes) + np.arange(sizes.sum()) - np.repeat(block_offsets, sizes)
+        family = np.repeat(block, sizes)
+
+        family = np.repeat(family, months)
+        slot = np.repeat(slot, months)
+        month = np.tile(np.arange(months), len(slot) // months if months else 0)
+        course = slot_course[slot]
+        profile = profile_index[family]
+        event = slot * months + month
+        monto = montos[course]
+
+        paga = uniform_array(keys[DRAW_PAGA], event) < pay_probability[profile] * seasonality[month]
+        dias = dias_min[profile] + (uniform_array(keys[DRAW_DIAS], event) * dias_span[profile]).astype(np.int64)
+        fecha_pago = fecha_limite[month] + dias
+        paga &= fecha_pago <= fecha_corte
+
+        fraccion = fraccion_min[profile] + uniform_array(keys[DRAW_FRACCION], event) * fraccion_span[profile]
+        intento = np.where(paga, np.round(monto * fraccion / 500) * 500, 0.0)
+        minutos = ((8 + (uniform_array(keys[DRAW_HORA], event) * 15).astype(np.int64)) * 60
+                   + (uniform_array(keys[DRAW_MINUTO], event) * 60).astype(np.int64))
+        momento = fecha_pago.astype('datetime64[m]') + minutos.astype('timedelta64[m]')
+        falla = paga & (uniform_array(keys[DRAW_FALLA], event) < distribution.failure_probability)
+        estado = np.where(falla, ESTADO_PAGO_FALLIDO, ESTADO_PAGO_PAGADO)
+        aplicado = np.where(falla, 0.0, intento)
+        metodo = (uniform_array(keys[DRAW_METODO], family) * len(METODOS_PAGO)).astype(np.int64)
+
+        yield {
+            'family': family, 'alumno': layout.id_bases['alumnos'] + slot + 1, 'course': course,
+            'month': month, 'monto': monto, 'intento': intento, 'aplicado': aplicado,
+            'estado': estado, 'momento': momento, 'metodo': metodo,
+        }
+
+
+def _rut_strings(layout, family):
+    return _view(layout.family_rut)[family].astype(str)
+
+
+def _block_rows(blocks):
+    """Filas de una tabla a partir de sus bloques de columnas (ver pagos_blocks)"""
+    for block in blocks:
+        yield from zip(*[column.tolist() if isinstance(column, np.ndarray) else repeat(column)
+                         for column in block])
+
+
+def pagos_blocks(layout, shard=None):
+    """
+    Pagos por bloques de familias: una lista de columnas NumPy (o valores
+    constantes) en el orden de las filas de generate_pagos, para escribirlas
+    directo al TSV de LOAD DATA sin armar una tupla por fila.
+    """
+    months = len(layout.months)
+    metodos = np.array(METODOS_PAGO)
+    for columns in payment_columns(layout, shard):
+        mask = columns['intento'] > 0
+        alumno = columns['alumno'][mask]
+        cuota = layout.id_bases['cuotas'] + columns['course'][mask] * months + columns['month'][mask] + 1
+        txn = np.char.add(np.char.add(np.char.add('DEMO_TXN_', alumno.astype(str)), '_'), cuota.astype(str))
+        yield [
+            columns['intento'][mask], metodos[columns['metodo'][mask]], cuota, alumno,
+            _rut_strings(layout, columns['family'][mask]), columns['momento'][mask],
+            columns['estado'][mask], txn,
+        ]
+
+
+def generate_pagos(layout, shard=None):
+    if np is None:
+        for family in layout.families(shard):
+            rut = layout.rut(family)
+            metodo, events = payment_events(layout, family)
+            for alumno, course, month, _, intento, _, estado, momento in events:
+                if intento:
+                    cuota = layout.cuota_id(course, month)
+                    yield (
+                        intento, metodo, cuota, alumno, str(rut),
+                        momento, estado, f"DEMO_TXN_{alumno}_{cuota}",
+                    )
+        return
+
+    yield from _block_rows(pagos_blocks(layout, shard))
+
+
+def deudas_alumnos_blocks(layout, shard=None):
+    """Deudas por bloques de columnas, como pagos_blocks"""
+    months = len(layout.months)
+    for columns in payment_columns(layout, shard):
+        aplicado = columns['aplicado']
+        mask = aplicado < columns['monto']
+        cobro = layout.id_bases['cobros'] + columns['course'][mask] * months + columns['month'][mask] + 1
+        estado = np.where(aplicado[mask] > 0, 'parcialmente_pagado', 'pendiente')
+        yield [
+            columns['alumno'][mask], cobro, columns['monto'][mask] - aplicado[mask], estado,
+            CREATED_BY, layout.now,
+        ]
+
+
+def generate_deudas_alumnos(layout, shard=None):
+    now = layout.now
+    if np is None:
+        for family in layout.families(shard):
+            _, events = payment_events(layout, family)
+            for alumno, course, month, monto, _, aplicado, _, _ in events:
+                if aplicado < monto:
+                    estado = 'parcialmente_pagado' if aplicado else 'pendiente'
+                    yield (
+                        alumno, layout.cobro_id(course, month), monto - aplicado, estado,
+                        CREATED_BY, now,
+                    )
+        return
+
+    yield from _block_rows(deudas_alumnos_blocks(layout, shard))
+
+
+def movimientos_ccaa_blocks(layout, shard=None):
+    """Movimientos de cuenta corriente de alumnos por bloques de columnas, como pagos_blocks"""
+    prefixes = np.array([f"Pago {label} - Alumno " for label in month_labels(layout)])
+    for columns in payment_columns(layout, shard):
+        mask = columns['aplicado'] > 0
+        alumno = columns['alumno'][mask]
+        descripcion = np.char.add(prefixes[columns['month'][mask]], alumno.astype(str))
+        yield [
+            alumno, 'PAGO', columns['aplicado'][mask], descripcion, columns['momento'][mask],
+            CREATED_BY, layout.now,
+        ]
+
+
+def generate_movimientos_ccaa(layout, shard=None):
+    now = layout.now
+    labels = month_labels(layout)
+    if np is None:
+        for family in layout.families(shard):
+            _, events = payment_events(layout, family)
+            for alumno, _, month, _, _, aplicado, _, momento in events:
+                if aplicado:
+                    yield (
+                        alumno, 'PAGO', aplicado, f"Pago {labels[month]} - Alumno {alumno}",
+                        momento, CREATED_BY, now,
+                    )
+        return
+
+    yield from _block_rows(movimientos_ccaa_blocks(layout, shard))
+
+
+def movimientos_ccpp_blocks(layout, shard=None):
+    """Movimientos de cuenta corriente de apoderados por bloques de columnas, como pagos_blocks"""
+    months = len(layout.months)
+    suffixes = np.array([f" hijo(s) - {label}" for label in month_labels(layout)])
+    for columns in payment_columns(layout, shard):
+        mask = columns['aplicado'] > 0
+        if not mask.any():
+            continue
+        # Agrupar por (familia, mes) conservando el orden de los hijos
+        key = columns['family'][mask] * months + columns['month'][mask]
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        total = np.add.reduceat(columns['aplicado'][mask][order], starts)
+        cantidad = np.diff(np.r_[starts, len(key)])
+        momento = np.maximum.reduceat(columns['momento'][mask][order].view(np.int64), starts)
+        family = key[starts] // months
+        month = key[starts] % months
+        descripcion = np.char.add(np.char.add('Pago cuotas ', cantidad.astype(str)), suffixes[month])
+        yield [
+            _rut_strings(layout, family), np.where(cantidad > 1, 'PAGO_MULTIPLE', 'PAGO'), total,
+            descripcion, momento.view('datetime64[m]'), CREATED_BY, layout.now,
+        ]
+
+
+def generate_movimientos_ccpp(layout, shard=None):
+    now = layout.now
+    labels = month_labels(layout)
+    if np is None:
+        for family in layout.families(shard):
+            _, events = payment_events(layout, family)
+            by_month = {}
+            for _, _, month, _, _, aplicado, _, momento in events:
+                if aplicado:
+                    entry = by_month.setdefault(month, [0.0, 0, momento])
+                    entry[0] += aplicado
+                    entry[1] += 1
+                    entry[2] = max(entry[2], momento)
+            for month, (total, cantidad, momento) in sorted(by_month.items()):
+                yield (
+                    str(layout.rut(family)), 'PAGO_MULTIPLE' if cantidad > 1 else 'PAGO', total,
+                    f"Pago cuotas {cantidad} hijo(s) - {labels[month]}",
+                    momento, CREATED_BY, now,
+                )
+        return
+
+    yield from _block_rows(movimientos_ccpp_blocks(layout, shard))
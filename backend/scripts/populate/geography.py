@@ -0,0 +1,142 @@
+"""
+Índice en memoria de la división político-administrativa (CUT 2018):
+comunas con su provincia y región, y muestreo de comunas ponderado por
+población sin consultar la base de datos por cada fila.
+"""
+
+import bisect
+import csv
+import hashlib
+import os
+import re
+from array import array
+
+from .streams import np
+
+DEFAULT_SQL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'insert-geografia-chile-cut2018.sql')
+
+# Población por región según el Censo 2017
+POBLACION_REGION = {
+    1: 330558, 2: 607534, 3: 286168, 4: 757586, 5: 1815902, 6: 914555,
+    7: 1044950, 8: 1556805, 9: 957224, 10: 828708, 11: 103158, 12: 166533,
+    13: 7112808, 14: 384837, 15: 226068, 16: 480609,
+}
+
+# Peso relativo de la comuna cabecera de provincia (código terminado en 01)
+# frente al resto de las comunas de su región
+PESO_CABECERA = 3.0
+
+INSERT_PATTERN = re.compile(r"INSERT INTO (\w+)")
+COMUNA_PATTERN = re.compile(r"^\((\d+), '((?:[^']|'')*)', (\d+), (\d+),")
+
+
+class GeoIndex:
+    """
+    Comunas en arreglos paralelos (código, provincia, región, nombre) y sus
+    pesos acumulados para muestrear con una búsqueda binaria.
+    """
+
+    def __init__(self, comunas, poblacion=None):
+        comunas = sorted(comunas)
+        self.codigo = array('I', [comuna[0] for comuna in comunas])
+        self.provincia = array('I', [comuna[2] for comuna in comunas])
+        self.region = array('B', [comuna[3] for comuna in comunas])
+        self.nombre = [comuna[1] for comuna in comunas]
+        self.cumulative = self._cumulative_weights(poblacion or {})
+
+    @classmethod
+    def from_sql(cls, path=DEFAULT_SQL_PATH, poblacion=None):
+        """Leer las comunas desde el script de inserción CUT 2018"""
+        comunas = []
+        section = None
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                match = INSERT_PATTERN.match(line)
+                if match:
+                    section = match.group(1)
+                    continue
+                if section != 'comunas':
+                    continue
+                match = COMUNA_PATTERN.match(line)
+                if match:
+                    codigo, nombre, provincia, region = match.groups()
+                    comunas.append((int(codigo), nombre.replace("''", "'"), int(provincia), int(region)))
+        return cls(comunas, poblacion)
+
+    @classmethod
+    def from_database(cls, cursor, catalog, poblacion=None):
+        """Leer las comunas activas ya cargadas, o None si la tabla no existe o está vacía"""
+        if not catalog.has_table('comunas'):
+            return None
+        cursor.execute("""
+            SELECT codigo, nombre, codigo_provincia, codigo_region
+            FROM comunas WHERE activo = true
+        """)
+        comunas = [(int(codigo), nombre, int(provincia), int(region))
+                   for codigo, nombre, provincia, region in cursor.fetchall()]
+        return cls(comunas, poblacion) if comunas else None
+
+    @classmethod
+    def load(cls, cursor, catalog, sql_path=DEFAULT_SQL_PATH, poblacion_path=None):
+        """
+        Índice desde la tabla comunas si ya está poblada (así los códigos
+        calzan con las llaves foráneas) o, si no, desde el script SQL.
+        """
+        poblacion = read_poblacion(poblacion_path) if poblacion_path else None
+        return cls.from_database(cursor, catalog, poblacion) or cls.from_sql(sql_path, poblacion)
+
+    def _cumulative_weights(self, poblacion):
+        """
+        Peso de cada comuna: su población si viene en poblacion; si no, la
+        población de su región repartida entre sus comunas, con más peso
+        para las cabeceras de provincia.
+        """
+        shares = {}
+        for codigo, region in zip(self.codigo, self.region):
+            if codigo not in poblacion:
+                shares[region] = shares.get(region, 0.0) + (PESO_CABECERA if codigo % 100 == 1 else 1.0)
+
+        cumulative = array('d')
+        total = 0.0
+        for codigo, region in zip(self.codigo, self.region):
+            if codigo in poblacion:
+                weight = float(poblacion[codigo])
+            else:
+                factor = PESO_CABECERA if codigo % 100 == 1 else 1.0
+                weight = POBLACION_REGION.get(region, 0) * factor / shares[region]
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def __len__(self):
+        return len(self.codigo)
+
+    @property
+    def digest(self):
+        """Huella de códigos y pesos (identifica el índice en la huella del dataset)"""
+        payload = self.codigo.tobytes() + self.cumulative.tobytes()
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def pick(self, u):
+        """Índice de comuna para un número u en [0, 1)"""
+        return min(bisect.bisect_right(self.cumulative, u * self.cumulative[-1]), len(self) - 1)
+
+    def pick_array(self, u):
+        """Versión NumPy de pick()"""
+        cumulative = np.frombuffer(self.cumulative, dtype=np.float64)
+        return np.minimum(np.searchsorted(cumulative, u * cumulative[-1], side='right'), len(self) - 1)
+
+    def location(self, index):
+        """(codigo_comuna, codigo_provincia, codigo_region) de una comuna"""
+        return self.codigo[index], self.provincia[index], self.region[index]
+
+
+def read_poblacion(path):
+    """Leer un CSV codigo_comuna,poblacion"""
+    poblacion = {}
+    with open(path, encoding='utf-8', newline='') as handle:
+        for row in csv.reader(handle):
+            if row and row[0].strip().isdigit():
+                poblacion[int(row[0])] = float(row[1])
+    return poblacion
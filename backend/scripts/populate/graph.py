@@ -0,0 +1,312 @@
+"""
+Grafo apoderado–alumno–curso del modo escala: tamaño de cada curso, curso
+de cada alumno, hijos de cada apoderado, tesorero y profesor de cada curso.
+Todo vive en arreglos de enteros (un elemento por curso, alumno o familia),
+así que alcanza para cientos de miles de familias.
+
+Las distribuciones son configurables y, con los casos extremos activados,
+el grafo incluye los que más castigan a las consultas: un apoderado con
+muchos hijos, un curso muy grande, un tesorero y un profesor a cargo de
+muchos cursos. Los sorteos salen de populate.streams, así que la versión
+NumPy y la escalar construyen el mismo grafo.
+"""
+
+import bisect
+import json
+from array import array
+from dataclasses import dataclass, field, fields
+
+from .streams import np, stream_key, uniform, uniform_array
+
+STREAM_GRAFO = 7
+DRAW_TAMANO = 0
+DRAW_ORDEN = 1
+DRAW_HIJOS = 2
+DRAW_TESORERO = 3
+DRAW_PROFESOR = 4
+DRAW_PERFIL = 5
+DRAW_GRUPO_TESORERO = 6
+
+# Familias sorteadas por vuelta al repartir los cupos con NumPy
+FAMILY_BLOCK = 65536
+
+# Valores de los casos extremos que activa with_hot_spots()
+HOT_SPOTS = {
+    'hot_family_children': 12,
+    'hot_course_factor': 4.0,
+    'hot_tesorero_courses': 8,
+    'hot_profesor_courses': 10,
+}
+
+
+def default_children():
+    # Hijos por apoderado: (cantidad, probabilidad)
+    return [(1, 0.55), (2, 0.30), (3, 0.12), (4, 0.03)]
+
+
+def default_tesorero_courses():
+    # Cursos a cargo de un mismo tesorero: (cantidad, probabilidad)
+    return [(1, 0.85), (2, 0.12), (3, 0.03)]
+
+
+def default_profesor_courses():
+    # Cursos a cargo de un mismo profesor: (cantidad, probabilidad)
+    return [(1, 0.45), (2, 0.40), (3, 0.15)]
+
+
+@dataclass
+class GraphDistribution:
+    """
+    Distribuciones del grafo. course_size es el rango del factor que escala
+    students_per_course en cada curso; sibling_spread va de 0 (hermanos
+    juntos en el mismo curso) a 1 (hermanos repartidos en cursos distintos).
+    Los campos hot_* agregan los casos extremos (0 o 1.0 los desactiva).
+    """
+    children: list = field(default_factory=default_children)
+    course_size: tuple = (0.85, 1.15)
+    sibling_spread: float = 1.0
+    tesorero_courses: list = field(default_factory=default_tesorero_courses)
+    profesor_courses: list = field(default_factory=default_profesor_courses)
+    hot_family_children: int = 0
+    hot_course_factor: float = 1.0
+    hot_tesorero_courses: int = 0
+    hot_profesor_courses: int = 0
+
+    @classmethod
+    def from_json(cls, path):
+        """
+        Leer la distribución desde un JSON con las mismas claves; las que no
+        vengan mantienen su valor por defecto.
+        """
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        distribution = cls()
+        for item in fields(cls):
+            if item.name not in data:
+                continue
+            value = data[item.name]
+            if item.name in ('children', 'tesorero_courses', 'profesor_courses'):
+                value = [(int(count), float(weight)) for count, weight in value]
+            elif item.name == 'course_size':
+                value = (float(value[0]), float(value[1]))
+            else:
+                value = type(getattr(distribution, item.name))(value)
+            setattr(distribution, item.name, value)
+        return distribution
+
+    def with_hot_spots(self):
+        """Activar los casos extremos que no vengan ya configurados"""
+        defaults = type(self)()
+        for name, value in HOT_SPOTS.items():
+            if getattr(self, name) == getattr(defaults, name):
+                setattr(self, name, value)
+        return self
+
+
+def _cumulative(choices):
+    values = [value for value, _ in choices]
+    cumulative = []
+    total = 0.0
+    for _, weight in choices:
+        total += weight
+        cumulative.append(total)
+    return values, cumulative
+
+
+def weighted_pick(u, choices):
+    """Valor de choices [(valor, peso)] para un número u en [0, 1)"""
+    values, cumulative = _cumulative(choices)
+    return values[min(bisect.bisect_right(cumulative, u * cumulative[-1]), len(values) - 1)]
+
+
+def weighted_pick_array(u, choices):
+    """Versión NumPy de weighted_pick()"""
+    values, cumulative = _cumulative(choices)
+    index = np.minimum(np.searchsorted(np.array(cumulative), u * cumulative[-1], side='right'),
+                       len(values) - 1)
+    return np.array(values)[index]
+
+
+def _groups(key, count, choices, first):
+    """Partir range(count) en grupos consecutivos: el primero de tamaño first (si hay) y el resto sorteado"""
+    owner = array('I', [0] * count)
+    position = 0
+    group = 0
+    while position < count:
+        size = first if group == 0 and first else weighted_pick(uniform(key, group), choices)
+        for index in range(position, min(count, position + size)):
+            owner[index] = group
+        position += size
+        group += 1
+    return owner
+
+
+class CourseGraph:
+    """
+    course_size[c] alumnos por curso; slot_course[s] curso del cupo s; los
+    hijos de la familia f son los cupos [family_start[f], family_start[f + 1]);
+    course_tesorero[c] es la familia tesorera del curso y course_profesor[c]
+    el índice de su profesor.
+    """
+
+    def __init__(self, course_size, slot_course, family_start, course_tesorero, course_profesor):
+        self.course_size = course_size
+        self.slot_course = slot_course
+        self.family_start = family_start
+        self.course_tesorero = course_tesorero
+        self.course_profesor = course_profesor
+
+    @classmethod
+    def build(cls, seed, courses, students_per_course, distribution):
+        course_size = cls._course_sizes(seed, courses, students_per_course, distribution)
+        slot_course = cls._slot_courses(seed, course_size, distribution.sibling_spread)
+        family_start = cls._family_starts(seed, len(slot_course), distribution)
+        course_tesorero = cls._tesoreros(seed, courses, course_size, slot_course, family_start, distribution)
+        course_profesor = _groups(stream_key(seed, STREAM_GRAFO, DRAW_PROFESOR), courses,
+                                  distribution.profesor_courses, distribution.hot_profesor_courses)
+        return cls(course_size, slot_course, family_start, course_tesorero, course_profesor)
+
+    @staticmethod
+    def _course_sizes(seed, courses, students_per_course, distribution):
+        """Tamaño de cada curso; con hot_course_factor el primero es el curso sobredimensionado"""
+        key = stream_key(seed, STREAM_GRAFO, DRAW_TAMANO)
+        low, high = distribution.course_size
+        sizes = array('I')
+        for course in range(courses):
+            factor = low + uniform(key, course) * (high - low)
+            if course == 0 and distribution.hot_course_factor > 1.0:
+                factor *= distribution.hot_course_factor
+            sizes.append(max(1, round(students_per_course * factor)))
+        return sizes
+
+    @staticmethod
+    def _slot_courses(seed, course_size, spread):
+        """
+        Ordenar los cupos para que las familias, que toman cupos contiguos,
+        queden repartidas: cada curso se intercala a lo largo de toda la
+        secuencia en proporción a su tamaño (spread 1) o sus cupos van juntos
+        (spread 0).
+        """
+        key = stream_key(seed, STREAM_GRAFO, DRAW_ORDEN)
+        courses = len(course_size)
+        if np is not None:
+            sizes = np.frombuffer(course_size, dtype=np.uint32).astype(np.int64)
+            course = np.repeat(np.arange(courses, dtype=np.int64), sizes)
+            offsets = np.cumsum(sizes) - sizes
+            rank = np.arange(len(course), dtype=np.int64) - np.repeat(offsets, sizes)
+            position = (rank + uniform_array(key, np.arange(len(course)))) / sizes[course]
+            order = np.argsort(spread * position + (1 - spread) * (course + position) / courses, kind='stable')
+            return array('I', course[order].astype(np.uint32).tobytes())
+
+        course = []
+        sort_keys = []
+        slot = 0
+        for index, size in enumerate(course_size):
+            for rank in range(size):
+                position = (rank + uniform(key, slot)) / size
+                course.append(index)
+                sort_keys.append(spread * position + (1 - spread) * (index + position) / courses)
+                slot += 1
+        order = sorted(range(len(course)), key=sort_keys.__getitem__)
+        return array('I', (course[slot] for slot in order))
+
+    @staticmethod
+    def _family_starts(seed, total, distribution):
+        """Inicio de los cupos de cada familia; con hot_family_children la primera es la familia numerosa"""
+        key = stream_key(seed, STREAM_GRAFO, DRAW_HIJOS)
+        family_start = array('I', [0])
+        position = 0
+        if distribution.hot_family_children:
+            position = min(total, distribution.hot_family_children)
+            family_start.append(position)
+        family = len(family_start) - 1
+        if np is not None:
+            while position < total:
+                sizes = weighted_pick_array(uniform_array(key, np.arange(family, family + FAMILY_BLOCK)),
+                                            distribution.children)
+                ends = np.minimum(position + np.cumsum(sizes), total)
+                ends = ends[:np.searchsorted(ends, total) + 1]
+                family_start.extend(ends.astype(np.uint32).tolist())
+                family += len(ends)
+                position = int(ends[-1])
+            return family_start
+
+        while position < total:
+            position = min(total, position + weighted_pick(uniform(key, family), distribution.children))
+            family_start.append(position)
+            family += 1
+        return family_start
+
+    @staticmethod
+    def _tesoreros(seed, courses, course_size, slot_course, family_start, distribution):
+        """
+        Los cursos se agrupan de a varios por tesorero; el tesorero del grupo
+        es un apoderado sorteado entre los que tienen un hijo en el primer
+        curso del grupo.
+        """
+        key = stream_key(seed, STREAM_GRAFO, DRAW_TESORERO)
+        # Cupo sorteado de cada curso: el rank-ésimo de ese curso en slot_course
+        rank = [int(uniform(key, course) * size) for course, size in enumerate(course_size)]
+        if np is not None:
+            sizes = np.frombuffer(course_size, dtype=np.uint32).astype(np.int64)
+            by_course = np.argsort(np.frombuffer(slot_course, dtype=np.uint32), kind='stable')
+            chosen = by_course[np.cumsum(sizes) - sizes + np.array(rank, dtype=np.int64)]
+            families = np.searchsorted(np.frombuffer(family_start, dtype=np.uint32), chosen, side='right') - 1
+            course_family = families.tolist()
+        else:
+            seen = [0] * courses
+            course_family = [0] * courses
+            family = 0
+            for slot, course in enumerate(slot_course):
+                while family_start[family + 1] <= slot:
+                    family += 1
+                if seen[course] == rank[course]:
+                    course_family[course] = family
+                seen[course] += 1
+
+        group = _groups(stream_key(seed, STREAM_GRAFO, DRAW_GRUPO_TESORERO), courses,
+                        distribution.tesorero_courses, distribution.hot_tesorero_courses)
+        leader = {}
+        return array('i', (leader.setdefault(group[course], course_family[course]) for course in range(courses)))
+
+    @property
+    def family_count(self):
+        return len(self.family_start) - 1
+
+    @property
+    def student_count(self):
+        return len(self.slot_course)
+
+    def summary(self):
+        """Cifras de los extremos del grafo"""
+        children = {}
+        siblings_same_course = 0
+        for family in range(self.family_count):
+            start, end = self.family_start[family], self.family_start[family + 1]
+            children[end - start] = children.get(end - start, 0) + 1
+            if len({self.slot_course[slot] for slot in range(start, end)}) < end - start:
+                siblings_same_course += 1
+        tesoreros = {}
+        for tesorero in self.course_tesorero:
+            tesoreros[tesorero] = tesoreros.get(tesorero, 0) + 1
+        profesores = {}
+        for profesor in self.course_profesor:
+            profesores[profesor] = profesores.get(profesor, 0) + 1
+        return {
+            'children': dict(sorted(children.items())),
+            'siblings_same_course': siblings_same_course,
+            'course_size': (min(self.course_size, default=0), max(self.course_size, default=0)),
+            'max_tesorero_courses': max(tesoreros.values(), default=0),
+            'max_profesor_courses': max(profesores.values(), default=0),
+            'profesores': len(profesores),
+        }
+
+    def report(self):
+        summary = self.summary()
+        hijos = ', '.join(f"{count}: {families}" for count, families in summary['children'].items())
+        print(f"🕸️ Hijos por apoderado {{{hijos}}}; "
+              f"{summary['siblings_same_course']} familias con hermanos en el mismo curso")
+        low, high = summary['course_size']
+        print(f"🕸️ Cursos de {low} a {high} alumnos; {summary['profesores']} profesores "
+              f"(hasta {summary['max_profesor_courses']} cursos), tesoreros hasta "
+              f"{summary['max_tesorero_courses']} cursos")
@@ -0,0 +1,164 @@
+"""
+Índices secundarios alrededor de una carga grande: se capturan sus
+definiciones desde el catálogo, se eliminan antes de cargar y se vuelven a
+crear al final, un ALTER TABLE por tabla (InnoDB arma todos los índices de
+la tabla ordenando una sola vez) y varias tablas en paralelo.
+
+Se conservan la llave primaria, los índices únicos (sostienen INSERT
+IGNORE y validan duplicados) y los que respaldan una llave foránea (MySQL
+no permite eliminarlos). Las definiciones quedan en un archivo hasta que
+se reconstruyen, para no perderlas si la carga se interrumpe; la próxima
+corrida las reconstruye al iniciar (o al final de la carga, con
+--drop-indexes). Reconstruir salta los índices que ya existen.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .connection import ResilientConnection
+
+# Junto a los scripts y no en el directorio de trabajo, uno por base de datos
+STATE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REBUILD_WORKERS = 4
+
+INDEX_KINDS = {'FULLTEXT': 'FULLTEXT INDEX', 'SPATIAL': 'SPATIAL INDEX'}
+
+
+def secondary_indexes(catalog, table):
+    """Índices de la tabla que se pueden eliminar durante la carga: {nombre: definición}"""
+    foreign_columns = {fk['column'] for fk in catalog.foreign_keys.get(table, [])}
+    indexes = {}
+    for name, entry in catalog.indexes.get(table, {}).items():
+        columns = entry['columns']
+        if name == 'PRIMARY' or entry['unique'] or not columns:
+            continue
+        # Índices funcionales (sin columna) y los que respaldan una llave foránea se conservan
+        if any(column is None for column, _ in columns) or columns[0][0] in foreign_columns:
+            continue
+        indexes[name] = {'type': entry.get('type'), 'columns': [list(column) for column in columns]}
+    return indexes
+
+
+def index_clause(name, definition):
+    """Cláusula ADD ... de ALTER TABLE que recrea un índice"""
+    kind = INDEX_KINDS.get(definition.get('type'), 'INDEX')
+    columns = ', '.join(f"`{column}`({sub_part})" if sub_part else f"`{column}`"
+                        for column, sub_part in definition['columns'])
+    return f"ADD {kind} `{name}` ({columns})"
+
+
+def index_state_path(database):
+    """Archivo con las definiciones pendientes de reconstruir en database"""
+    return os.path.join(STATE_DIR, f"populate-indexes.{database}.json")
+
+
+def load_pending(path):
+    """Índices eliminados por una corrida anterior y aún sin reconstruir"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def _save_pending(path, dropped):
+    partial = f"{path}.partial"
+    with open(partial, 'w', encoding='utf-8') as handle:
+        json.dump(dropped, handle, indent=2)
+    os.replace(partial, path)
+
+
+def drop_secondary_indexes(cursor, catalog, tables, path=None):
+    """
+    Eliminar los índices secundarios de tables, guardando antes sus
+    definiciones en path (junto con las pendientes de una corrida anterior).
+    Devuelve {tabla: {nombre: definición}} de todo lo que hay que reconstruir.
+    """
+    path = path or index_state_path(catalog.database)
+    dropped = load_pending(path)
+    if dropped:
+        print(f"⚠️ {sum(len(indexes) for indexes in dropped.values())} índices pendientes de "
+              f"una corrida anterior ({path}) se reconstruirán al final")
+    drop_now = {}
+    for table in tables:
+        indexes = {name: definition for name, definition in secondary_indexes(catalog, table).items()
+                   if name not in dropped.get(table, {})}
+        if indexes:
+            drop_now[table] = indexes
+            dropped.setdefault(table, {}).update(indexes)
+    _save_pending(path, dropped)
+
+    for table, indexes in drop_now.items():
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(f"DROP INDEX `{name}`" for name in indexes))
+        print(f"🔻 {table}: {len(indexes)} índices eliminados ({', '.join(indexes)})")
+    return dropped
+
+
+def _add_missing(cursor, table, indexes):
+    """Recrear en un ALTER TABLE los índices de la tabla que no existen; devuelve los segundos"""
+    cursor.execute(f"SHOW INDEX FROM {table}")
+    existing = {row[2] for row in cursor.fetchall()}
+    clauses = [index_clause(name, definition) for name, definition in indexes.items() if name not in existing]
+    started = time.perf_counter()
+    if clauses:
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(clauses))
+    return time.perf_counter() - started
+
+
+def _rebuild_table(db_config, settings, table, indexes):
+    connection = ResilientConnection(db_config, **settings)
+    try:
+        cursor = connection.cursor()
+        elapsed = _add_missing(cursor, table, indexes)
+        cursor.close()
+        return table, elapsed
+    finally:
+        connection.close()
+
+
+def rebuild_secondary_indexes(pool, dropped, path, workers=DEFAULT_REBUILD_WORKERS, cursor=None):
+    """
+    Recrear los índices de dropped, cada tabla en su propia conexión y hasta
+    workers tablas a la vez (o en serie por cursor, sin pool). Borra path al
+    terminar. Devuelve {tabla: segundos}.
+    """
+    seconds = {}
+    tables = [table for table, indexes in dropped.items() if indexes]
+    if pool is None:
+        for table in tables:
+            seconds[table] = _add_missing(cursor, table, dropped[table])
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = executor.map(
+                lambda table: _rebuild_table(pool.db_config, pool.settings, table, dropped[table]), tables)
+            seconds = dict(results)
+    if os.path.exists(path):
+        os.unlink(path)
+    return seconds
+
+
+def recover_dropped_indexes(cursor, database, pool=None, workers=DEFAULT_REBUILD_WORKERS):
+    """
+    Reconstruir los índices que dejó eliminados una corrida interrumpida
+    antes de hacer cualquier otra cosa. Devuelve {tabla: segundos}.
+    """
+    path = index_state_path(database)
+    dropped = load_pending(path)
+    if not dropped:
+        return {}
+    count = sum(len(indexes) for indexes in dropped.values())
+    print(f"⚠️ {count} índices eliminados por una corrida interrumpida ({path}); reconstruyendo...")
+    seconds = rebuild_secondary_indexes(pool, dropped, path, workers, cursor=cursor)
+    print(f"🔺 Índices de {len(seconds)} tablas reconstruidos en {sum(seconds.values()):.1f}s")
+    return seconds
+
+
+def report_rebuild(dropped, seconds, metrics):
+    """Comparar por tabla el tiempo de carga sin índices con el de reconstruirlos"""
+    print("\n🏗️ ÍNDICES SECUNDARIOS: CARGA VS RECONSTRUCCIÓN")
+    print("=" * 60)
+    for table, elapsed in seconds.items():
+        load = metrics.tables[table].wall_seconds if table in metrics.tables else 0.0
+        print(f"📦 {table}: carga {load:.2f}s + reconstrucción {elapsed:.2f}s "
+              f"({len(dropped[table])} índices) = {load + elapsed:.2f}s")
@@ -0,0 +1,168 @@
+"""
+Diario de avance para reanudar cargas largas: guarda el estado del dataset
+(semilla, fechas, ids base y RUT asignados) y, por tabla y shard, cuántas
+filas quedaron confirmadas. Con --resume la carga vuelve a generar las
+mismas filas y salta las que ya están en la base de datos.
+"""
+
+import json
+import os
+from array import array
+from datetime import date, datetime
+
+# Junto a los scripts y no en el directorio de trabajo, uno por base de datos
+JOURNAL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Parámetros que pueden cambiar entre la corrida original y la reanudación
+RESUMABLE_FIELDS = {
+    'batch_size', 'bulk_tables', 'async_connections', 'max_memory_mb', 'cache_dir', 'snapshot_dir',
+    'snapshot_replace_tables', 'journal_path', 'resume', 'commit_every', 'progress', 'drop_indexes', 'index_workers',
+}
+
+
+def default_journal_path(database):
+    """Diario de avance de las cargas sobre database"""
+    return os.path.join(JOURNAL_DIR, f"populate-journal.{database}.json")
+
+
+def _normalize(params):
+    """Parámetros tal como quedan guardados en JSON, para compararlos"""
+    return json.loads(json.dumps(params, default=str))
+
+
+def _write_json(path, data):
+    """Escribir un JSON de forma atómica"""
+    partial = f"{path}.partial"
+    with open(partial, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, indent=2, default=str)
+    os.replace(partial, path)
+
+
+class Journal:
+    """
+    Encabezado del diario (estado del dataset) más un archivo de avance por
+    shard, para que cada proceso de la carga paralela escriba solo el suyo.
+    """
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.progress = {}
+
+    @classmethod
+    def create(cls, path, params, layout):
+        """Iniciar un diario nuevo para el dataset de layout"""
+        journal = cls(path, {
+            'params': _normalize(params),
+            'seed': layout.seed,
+            'fecha_corte': layout.fecha_corte.isoformat(),
+            'now': layout.now.isoformat(),
+            'id_bases': layout.id_bases,
+        })
+        journal.discard()
+        with open(journal.ruts_path, 'wb') as handle:
+            layout.family_rut.tofile(handle)
+        _write_json(path, journal.header)
+        return journal
+
+    @classmethod
+    def open(cls, path):
+        """Abrir un diario existente"""
+        with open(path, encoding='utf-8') as handle:
+            return cls(path, json.load(handle))
+
+    @property
+    def ruts_path(self):
+        return f"{self.path}.ruts"
+
+    def progress_path(self, shard=None):
+        part = f"{shard[0]}of{shard[1]}" if shard else 'all'
+        return f"{self.path}.{part}.progress"
+
+    def mismatches(self, params):
+        """Parámetros que difieren de los de la corrida original"""
+        original = self.header['params']
+        params = _normalize(params)
+        return sorted(key for key in set(original) | set(params)
+                      if key not in RESUMABLE_FIELDS and original.get(key) != params.get(key))
+
+    def state(self):
+        """Semilla, fecha de corte, momento de creación, ids base y RUT del dataset"""
+        family_rut = array('I')
+        with open(self.ruts_path, 'rb') as handle:
+            family_rut.frombytes(handle.read())
+        return {
+            'seed': self.header['seed'],
+            'fecha_corte': date.fromisoformat(self.header['fecha_corte']),
+            'now': datetime.fromisoformat(self.header['now']),
+            'id_bases': self.header['id_bases'],
+            'family_rut': family_rut,
+        }
+
+    def _load_progress(self, shard):
+        key = tuple(shard) if shard else None
+        if key not in self.progress:
+            path = self.progress_path(shard)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as handle:
+                    self.progress[key] = json.load(handle)
+            else:
+                self.progress[key] = {}
+        return self.progress[key]
+
+    def table(self, table, shard=None):
+        """(filas confirmadas, terminada) de una tabla"""
+        entry = self._load_progress(shard).get(table, {})
+        return entry.get('rows', 0), entry.get('done', False)
+
+    def mark(self, table, rows, done=False, shard=None):
+        """Anotar filas confirmadas de una tabla; se llama después de cada COMMIT"""
+        progress = self._load_progress(shard)
+        progress[table] = {'rows': rows, 'done': done}
+        _write_json(self.progress_path(shard), progress)
+
+    def discard(self):
+        """Borrar el diario y sus archivos de avance"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        prefix = os.path.basename(self.path) + '.'
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.progress'):
+                os.remove(os.path.join(directory, name))
+        for path in (self.path, self.ruts_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.progress = {}
+
+
+class Checkpointer:
+    """
+    Confirmar la transacción cada every lotes y, si hay diario, anotar el
+    avance en él. Sin diario solo acota el tamaño de cada transacción.
+    """
+
+    def __init__(self, connection, journal, every=10, shard=None):
+        self.connection = connection
+        self.journal = journal
+        self.every = max(1, every)
+        self.shard = shard
+        self.rows = {}
+        self.batches = {}
+
+    def start(self, table):
+        """Filas ya confirmadas de la tabla (a saltar) y si está terminada"""
+        rows, done = self.journal.table(table, self.shard) if self.journal else (0, False)
+        self.rows[table] = rows
+        self.batches[table] = 0
+        return rows, done
+
+    def batch(self, table, rows):
+        """Registrar un lote enviado; cada every lotes se confirma"""
+        self.rows[table] = self.rows.get(table, 0) + rows
+        self.batches[table] = self.batches.get(table, 0) + 1
+        if self.batches[table] % self.every == 0:
+            self.commit(table)
+
+    def commit(self, table, done=False):
+        self.connection.commit()
+        if self.journal:
+            self.journal.mark(table, self.rows.get(table, 0), done, self.shard)
@@ -0,0 +1,256 @@
+"""
+Métricas de la carga: por tabla, filas, lotes, bytes enviados, tiempo de
+pared, tiempo de CPU y filas por segundo; por etapa (hashes, verificación,
+snapshot), tiempo de pared y de CPU. Durante la carga se muestra una sola
+línea de avance y al final un resumen, que también puede escribirse como
+JSON o en formato textfile de Prometheus (node_exporter).
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Segundos mínimos entre redibujos de la línea de avance
+PROGRESS_INTERVAL = 0.5
+
+METRIC_PREFIX = 'populate'
+
+
+def cpu_time():
+    """Segundos de CPU del proceso y de sus hijos ya terminados (pools de procesos)"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class TableMetrics:
+    """
+    Contadores de carga de una tabla. seconds suma el tiempo escribiendo al
+    destino en cada lote; wall_seconds y cpu_seconds miden la tabla completa,
+    generación incluida.
+    """
+
+    FIELDS = ('rows', 'batches', 'bytes', 'seconds', 'wall_seconds', 'cpu_seconds')
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def add(self, rows, seconds, sent=0):
+        """Registrar un lote enviado"""
+        self.rows += rows
+        self.batches += 1
+        self.seconds += seconds
+        self.bytes += sent
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.wall_seconds or self.seconds
+        return self.rows / elapsed if elapsed else 0.0
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data['rows_per_second'] = self.rows_per_second
+        return data
+
+    def merge(self, data, concurrent=False):
+        """
+        Sumar contadores de otro proceso (en el formato de as_dict). Con
+        concurrent, la tabla se cargó a la vez en ambos y el tiempo de pared
+        es el del más lento.
+        """
+        for name in self.FIELDS:
+            if concurrent and name == 'wall_seconds':
+                self.wall_seconds = max(self.wall_seconds, data[name])
+            else:
+                setattr(self, name, getattr(self, name) + data[name])
+
+
+class Progress:
+    """
+    Línea de avance en stderr que se reescribe en su lugar, a lo más cada
+    PROGRESS_INTERVAL segundos. No escribe nada si stderr no es una terminal,
+    para no llenar los logs.
+    """
+
+    def __init__(self, enabled=True, stream=None, interval=PROGRESS_INTERVAL):
+        self.stream = stream or sys.stderr
+        self.enabled = enabled and self.stream.isatty()
+        self.interval = interval
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.shown = 0.0
+        self.width = 0
+
+    def advance(self, table, rows):
+        self.rows += rows
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self.shown < self.interval:
+            return
+        self.shown = now
+        rate = self.rows / (now - self.started) if now > self.started else 0.0
+        line = f"⏳ {table}: {self.rows:,} filas · {rate:,.0f} filas/s"
+        self.stream.write('\r' + line.ljust(self.width))
+        self.stream.flush()
+        self.width = len(line)
+
+    def close(self):
+        """Borrar la línea antes de imprimir el resumen"""
+        if self.enabled and self.width:
+            self.stream.write('\r' + ' ' * self.width + '\r')
+            self.stream.flush()
+            self.width = 0
+
+
+def _format_bytes(count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:,.0f} {unit}" if unit == 'B' else f"{count:,.1f} {unit}"
+        count /= 1024
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _write_atomic(path, text):
+    """Escribir con archivo temporal y rename, para que un lector nunca vea un archivo a medias"""
+    partial = f"{path}.partial"
+    with open(partial, 'w', encoding='utf-8') as handle:
+        handle.write(text)
+    os.replace(partial, path)
+
+
+class RunMetrics:
+    """Métricas de una corrida: tablas cargadas y etapas medidas"""
+
+    def __init__(self):
+        self.tables = {}
+        self.steps = {}
+        self.started = time.time()
+        self.wall_started = time.perf_counter()
+        self.cpu_started = cpu_time()
+
+    def table(self, table):
+        metrics = self.tables.get(table)
+        if metrics is None:
+            metrics = self.tables[table] = TableMetrics()
+        return metrics
+
+    def record(self, table, rows, seconds, sent=0):
+        """Registrar una instrucción ejecutada fuera de un BatchInserter (su tiempo es el de pared)"""
+        metrics = self.table(table)
+        metrics.add(rows, seconds, sent)
+        metrics.wall_seconds += seconds
+
+    def add_tables(self, stats):
+        """Sumar las tablas de un BatchInserter"""
+        for table, metrics in stats.items():
+            self.table(table).merge(metrics.as_dict())
+
+    def merge_tables(self, data, concurrent=False):
+        """Sumar tablas de otro proceso ({tabla: as_dict()})"""
+        for table, values in data.items():
+            self.table(table).merge(values, concurrent)
+
+    @contextmanager
+    def step(self, name):
+        """Medir tiempo de pared y de CPU de una etapa"""
+        wall, cpu = time.perf_counter(), cpu_time()
+        try:
+            yield
+        finally:
+            self.add_step(name, time.perf_counter() - wall, cpu_time() - cpu)
+
+    def add_step(self, name, wall_seconds, cpu_seconds=0.0):
+        """Sumar a una etapa medida por fuera (p. ej. en otro hilo)"""
+        step = self.steps.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+        step['wall_seconds'] += wall_seconds
+        step['cpu_seconds'] += cpu_seconds
+
+    @property
+    def total_rows(self):
+        return sum(metrics.rows for metrics in self.tables.values())
+
+    def as_dict(self, errors=None):
+        data = {
+            'started_at': self.started,
+            'wall_seconds': time.perf_counter() - self.wall_started,
+            'cpu_seconds': cpu_time() - self.cpu_started,
+            'rows': self.total_rows,
+            'tables': {table: metrics.as_dict() for table, metrics in self.tables.items()},
+            'steps': {name: dict(step) for name, step in self.steps.items()},
+        }
+        if errors is not None:
+            data['errors'] = errors
+        return data
+
+    def report(self):
+        """Mostrar filas, lotes, bytes, tiempos y filas por segundo de cada tabla"""
+        if not self.tables and not self.steps:
+            return
+        print("\n⏱️ RENDIMIENTO DE CARGA POR TABLA")
+        print("=" * 60)
+        for table, metrics in self.tables.items():
+            print(f"📦 {table}: {metrics.rows:,} filas en {metrics.batches} lotes, "
+                  f"{_format_bytes(metrics.bytes)}, {metrics.wall_seconds:.2f}s "
+                  f"(CPU {metrics.cpu_seconds:.2f}s, envío {metrics.seconds:.2f}s), "
+                  f"{metrics.rows_per_second:,.0f} filas/s")
+        for name, step in self.steps.items():
+            print(f"⏲️ {name}: {step['wall_seconds']:.2f}s (CPU {step['cpu_seconds']:.2f}s)")
+
+    def write_json(self, path, errors=None):
+        _write_atomic(path, json.dumps(self.as_dict(errors), indent=2) + '\n')
+
+    def write_prometheus(self, path, errors=None):
+        """Escribir en formato textfile de Prometheus (node_exporter --collector.textfile)"""
+        data = self.as_dict(errors)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        tables = data['tables']
+        metric('rows_total', 'counter', 'Filas cargadas por tabla',
+               [({'table': t}, m['rows']) for t, m in tables.items()])
+        metric('batches_total', 'counter', 'Lotes enviados por tabla',
+               [({'table': t}, m['batches']) for t, m in tables.items()])
+        metric('bytes_sent_total', 'counter', 'Bytes aproximados enviados al servidor por tabla',
+               [({'table': t}, m['bytes']) for t, m in tables.items()])
+        metric('table_wall_seconds', 'gauge', 'Tiempo de pared de la carga de cada tabla',
+               [({'table': t}, f"{m['wall_seconds']:.6f}") for t, m in tables.items()])
+        metric('table_cpu_seconds', 'gauge', 'Tiempo de CPU de la carga de cada tabla',
+               [({'table': t}, f"{m['cpu_seconds']:.6f}") for t, m in tables.items()])
+        metric('table_send_seconds', 'gauge', 'Tiempo escribiendo los lotes en su destino por tabla',
+               [({'table': t}, f"{m['seconds']:.6f}") for t, m in tables.items()])
+        metric('rows_per_second', 'gauge', 'Filas por segundo de cada tabla',
+               [({'table': t}, f"{m['rows_per_second']:.3f}") for t, m in tables.items()])
+        metric('step_wall_seconds', 'gauge', 'Tiempo de pared de cada etapa',
+               [({'step': s}, f"{v['wall_seconds']:.6f}") for s, v in data['steps'].items()])
+        metric('step_cpu_seconds', 'gauge', 'Tiempo de CPU de cada etapa',
+               [({'step': s}, f"{v['cpu_seconds']:.6f}") for s, v in data['steps'].items()])
+        if errors is not None:
+            metric('transient_errors_total', 'counter', 'Errores transitorios de MySQL por tipo',
+                   [({'kind': kind}, count) for kind, count in sorted(errors['errors'].items())])
+            metric('retries_total', 'counter', 'Reintentos por errores transitorios',
+                   [({}, errors['retries'])])
+            metric('reconnects_total', 'counter', 'Reconexiones al servidor', [({}, errors['reconnects'])])
+        metric('run_wall_seconds', 'gauge', 'Tiempo de pared de la corrida',
+               [({}, f"{data['wall_seconds']:.6f}")])
+        metric('run_cpu_seconds', 'gauge', 'Tiempo de CPU de la corrida',
+               [({}, f"{data['cpu_seconds']:.6f}")])
+        metric('last_run_timestamp_seconds', 'gauge', 'Inicio de la última corrida (epoch)',
+               [({}, f"{data['started_at']:.0f}")])
+        _write_atomic(path, '\n'.join(lines) + '\n')
@@ -0,0 +1,106 @@
+"""
+Carga paralela por shards de curso: un pool de procesos, cada uno con su
+propia conexión, genera e inserta su shard fase por fase respetando las
+llaves foráneas.
+"""
+
+import multiprocessing
+import time
+
+from .connection import ErrorStats, ResilientConnection
+from .journal import Checkpointer
+from .pipeline import report_rejected, run_table
+from .writer import BatchInserter
+
+_connection = None
+_context = None
+
+
+def _init_worker(db_config, settings, layout, generators, block_generators, plan, cache, journal, commit_every):
+    """Abrir la conexión propia de cada proceso del pool"""
+    global _connection, _context
+    _connection = ResilientConnection(db_config, **settings)
+    _context = (layout, generators, block_generators, plan, cache, journal, commit_every)
+
+
+def _insert_shard(task):
+    """Generar e insertar las tablas de una fase para un shard"""
+    worker_id, workers, phase, batch_size, bulk_tables, max_bytes = task
+    layout, generators, block_generators, plan, cache, journal, commit_every = _context
+    shard = (worker_id, workers)
+    cursor = _connection.cursor()
+    checkpoint = Checkpointer(_connection, journal, commit_every, shard)
+    inserter = BatchInserter(cursor, batch_size=batch_size, max_bytes=max_bytes, checkpoint=checkpoint)
+    bulk_available = bool(bulk_tables)
+    rejected = {}
+
+    started = time.perf_counter()
+    for table in phase:
+        generate_blocks = ((lambda table=table: block_generators[table](layout, shard))
+                           if table in block_generators else None)
+        bulk_available = run_table(cursor, inserter, plan[table],
+                                   lambda table=table: generators[table](layout, shard),
+                                   bulk_tables, bulk_available, rejected, cache, shard, checkpoint,
+                                   generate_blocks)
+    _connection.commit()
+    cursor.close()
+
+    rows = sum(table_stats.rows for table_stats in inserter.stats.values())
+    tables = {table: table_stats.as_dict() for table, table_stats in inserter.stats.items()}
+    errors = _connection.stats.as_dict()
+    _connection.stats = ErrorStats()
+    return worker_id, rows, time.perf_counter() - started, rejected, errors, tables
+
+
+def run_parallel(pool, layout, generators, plan, phases, workers, batch_size,
+                 bulk_tables=(), max_bytes=None, cache=None, journal=None, commit_every=10, metrics=None,
+                 block_generators=None):
+    """
+    Ejecutar las fases en orden; dentro de cada fase los shards van en
+    paralelo. Cada proceso abre su conexión con la configuración de pool y
+    sus errores transitorios se suman a los contadores del pool; sus
+    métricas por tabla, a metrics. block_generators[table](layout, shard)
+    entrega bloques de columnas para LOAD DATA (ver pipeline.run_table).
+    """
+    db_config = pool.db_config
+    if bulk_tables:
+        db_config = {**db_config, 'allow_local_infile': True}
+
+    print(f"\n⚡ CARGA PARALELA CON {workers} PROCESOS")
+    print("=" * 60)
+
+    totals = {worker_id: [0, 0.0] for worker_id in range(workers)}
+    rejected = {}
+    started = time.perf_counter()
+    initargs = (db_config, pool.settings, layout, generators, block_generators or {}, plan, cache, journal,
+                commit_every)
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as processes:
+        for phase in phases:
+            phase_started = time.perf_counter()
+            tasks = [(worker_id, workers, phase, batch_size, bulk_tables, max_bytes)
+                     for worker_id in range(workers)]
+            phase_rows = 0
+            results = processes.imap_unordered(_insert_shard, tasks)
+            for worker_id, rows, elapsed, worker_rejected, errors, tables in results:
+                totals[worker_id][0] += rows
+                totals[worker_id][1] += elapsed
+                phase_rows += rows
+                for table, count in worker_rejected.items():
+                    rejected[table] = rejected.get(table, 0) + count
+                pool.stats.merge(errors)
+                if metrics:
+                    metrics.merge_tables(tables, concurrent=True)
+            phase_elapsed = time.perf_counter() - phase_started
+            print(f"✅ Fase {' + '.join(phase)}: {phase_rows} registros en {phase_elapsed:.2f}s")
+
+    elapsed = time.perf_counter() - started
+    print("\n⏱️ RENDIMIENTO POR PROCESO")
+    print("=" * 60)
+    for worker_id, (rows, seconds) in totals.items():
+        rate = rows / seconds if seconds else 0.0
+        print(f"🧵 Worker {worker_id}: {rows} filas en {seconds:.2f}s ({rate:,.0f} filas/s)")
+    total_rows = sum(rows for rows, _ in totals.values())
+    rate = total_rows / elapsed if elapsed else 0.0
+    print(f"🚀 Total: {total_rows} filas en {elapsed:.2f}s ({rate:,.0f} filas/s)")
+    report_rejected(rejected)
+    return total_rows
@@ -0,0 +1,52 @@
+"""
+Hashes bcrypt para datos generados: se calcula un pool de hashes por
+(contraseña, costo) una sola vez y se reutiliza en todos los usuarios.
+"""
+
+import base64
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# Mismo costo que usa el backend (models/usuarioAuth.js)
+DEFAULT_ROUNDS = 12
+
+# Alfabeto base64 estándar y el que usa bcrypt para la sal
+B64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+BCRYPT_ALPHABET = b'./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+BCRYPT_TRANSLATION = bytes.maketrans(B64_ALPHABET, BCRYPT_ALPHABET)
+
+_hash_cache = {}
+
+
+def seeded_salt(rounds, seed, index):
+    """Sal bcrypt reproducible derivada de la semilla del dataset"""
+    raw = random.Random(f"bcrypt:{seed}:{index}").randbytes(16)
+    encoded = base64.b64encode(raw)[:22].translate(BCRYPT_TRANSLATION)
+    return b'$2b$%02d$' % rounds + encoded
+
+
+def hash_password(password, rounds=DEFAULT_ROUNDS, salt=None):
+    """Generar hash bcrypt para contraseña"""
+    salt = salt or bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def password_hashes(password, rounds=DEFAULT_ROUNDS, pool_size=1, processes=None, seed=None):
+    """
+    Devolver pool_size hashes distintos de la misma contraseña. Los que
+    falten en el caché se calculan en un pool de procesos. Con seed, las
+    sales (y por lo tanto los hashes) son reproducibles.
+    """
+    cached = _hash_cache.setdefault((password, rounds, seed), [])
+    start = len(cached)
+    missing = pool_size - start
+    salts = [seeded_salt(rounds, seed, index) if seed is not None else None
+             for index in range(start, pool_size)]
+    if missing == 1:
+        cached.append(hash_password(password, rounds, salts[0]))
+    elif missing > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            cached.extend(executor.map(hash_password, [password] * missing, [rounds] * missing, salts))
+    return cached[:pool_size]
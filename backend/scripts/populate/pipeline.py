@@ -0,0 +1,159 @@
+"""
+Pipeline por tabla: generar → validar → agrupar en lotes → enviar. Las filas
+fluyen como iteradores, así que la memoria queda acotada por el tamaño de lote.
+"""
+
+import os
+from dataclasses import dataclass
+from itertools import islice
+
+from .bulk import read_tsv, write_tsv
+from .streams import np
+from .writer import load_table
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class TablePlan:
+    """Columnas a insertar de una tabla y cómo obtenerlas de la fila generada"""
+    table: str
+    columns: list
+    indices: list
+    rules: list
+    width: int
+
+
+def prepare_rows(plan, rows, rejected):
+    """Proyectar cada fila a las columnas de la tabla y descartar las inválidas"""
+    project = len(plan.indices) != plan.width
+    for row in rows:
+        if project:
+            row = tuple(row[i] for i in plan.indices)
+        for position, not_null, max_length in plan.rules:
+            value = row[position]
+            if value is None:
+                if not_null:
+                    break
+            elif max_length and isinstance(value, str) and len(value) > max_length:
+                break
+        else:
+            yield row
+            continue
+        rejected[plan.table] = rejected.get(plan.table, 0) + 1
+
+
+def prepare_blocks(plan, blocks, rejected):
+    """
+    Versión por columnas de prepare_rows para bloques de arreglos NumPy (o
+    valores constantes): proyecta las columnas y filtra con una máscara.
+    """
+    for block in blocks:
+        block = [block[i] for i in plan.indices]
+        size = max(len(column) for column in block if isinstance(column, np.ndarray))
+        keep = np.ones(size, dtype=bool)
+        for position, not_null, max_length in plan.rules:
+            column = block[position]
+            if isinstance(column, np.ndarray):
+                if max_length and column.dtype.kind == 'U':
+                    keep &= np.char.str_len(column) <= max_length
+            elif column is None:
+                if not_null:
+                    keep[:] = False
+            elif max_length and isinstance(column, str) and len(column) > max_length:
+                keep[:] = False
+        dropped = size - int(keep.sum())
+        if dropped:
+            rejected[plan.table] = rejected.get(plan.table, 0) + dropped
+            block = [column[keep] if isinstance(column, np.ndarray) else column for column in block]
+        yield block
+
+
+def cache_rows(rows, path):
+    """Dejar pasar las filas copiándolas a un TSV de caché"""
+    partial = f"{path}.partial"
+    with open(partial, 'w', encoding='utf-8', newline='') as handle:
+        for row in rows:
+            write_tsv(handle, (row,))
+            yield row
+    os.replace(partial, path)
+
+
+def table_rows(plan, generate, rejected, cache_path=None, tee=False, skip=0):
+    """
+    Filas validadas de una tabla: desde el TSV de caché si existe o, si no,
+    desde generate(), copiándolas al caché con tee. Se saltan las primeras
+    skip filas (ya confirmadas según el diario).
+    """
+    if cache_path and os.path.exists(cache_path):
+        rows = read_tsv(cache_path)
+    else:
+        rejected[plan.table] = 0
+        rows = prepare_rows(plan, generate(), rejected)
+        if tee:
+            rows = cache_rows(rows, cache_path)
+    return islice(rows, skip, None) if skip else rows
+
+
+def table_blocks(plan, generate_blocks, rejected):
+    """Bloques de columnas validados de una tabla, desde generate_blocks()"""
+    rejected[plan.table] = 0
+    return prepare_blocks(plan, generate_blocks(), rejected)
+
+
+def run_table(cursor, inserter, plan, generate, bulk_tables=(), bulk_available=False, rejected=None,
+              cache=None, shard=None, checkpoint=None, generate_blocks=None):
+    """
+    Cargar una tabla a partir de generate(), que crea un iterador nuevo de
+    filas. Con cache, las filas se leen del TSV guardado si existe y, si no,
+    se guardan mientras se cargan. Con checkpoint, se saltan las filas que
+    el diario registra como confirmadas y la tabla se marca terminada. Con
+    generate_blocks (bloques de columnas NumPy), LOAD DATA escribe el TSV
+    por columnas en lugar de fila a fila.
+    """
+    rejected = {} if rejected is None else rejected
+    skip, done = checkpoint.start(plan.table) if checkpoint else (0, False)
+    if done:
+        return bulk_available
+    cache_path = cache.path(plan.table, plan.columns, shard) if cache else None
+    # LOAD DATA usa el TSV de caché directamente, salvo al reanudar a mitad de tabla
+    direct = cache_path and not skip
+    tee = cache_path and not (direct and bulk_available and plan.table in bulk_tables)
+
+    # Al reanudar a mitad de tabla se saltan filas: eso solo lo hace la versión fila a fila
+    blocks = (lambda: table_blocks(plan, generate_blocks, rejected)) if generate_blocks and not skip else None
+
+    with inserter.measure(plan.table):
+        bulk_available = load_table(cursor, inserter, plan.table, plan.columns,
+                                    lambda: table_rows(plan, generate, rejected, cache_path, tee, skip),
+                                    bulk_tables, bulk_available, cache_path if direct else None, blocks)
+    if checkpoint:
+        checkpoint.commit(plan.table, done=True)
+    return bulk_available
+
+
+def report_rejected(rejected):
+    """Mostrar filas descartadas por la validación"""
+    for table, count in rejected.items():
+        if count:
+            print(f"⚠️ {table}: {count} filas descartadas por validación")
+
+
+def memory_high_water_mb():
+    """Máximo de memoria residente del proceso y de sus procesos hijos, en MB"""
+    if resource is None:
+        return None, None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def report_memory():
+    """Mostrar el máximo de memoria usado durante la carga"""
+    own, children = memory_high_water_mb()
+    if own is None:
+        return
+    print(f"🧠 Memoria máxima: {own:.0f} MB (proceso principal), {children:.0f} MB (procesos hijos)")
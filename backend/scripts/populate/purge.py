@@ -0,0 +1,153 @@
+"""
+Purga de los datos generados: borra solo las filas demo (es_dato_prueba = 1
+y creadas por DEMO_SYSTEM, más los usuarios y cursos del modo demo clásico)
+en orden inverso de llaves foráneas, por rangos
+de llave primaria y con una transacción corta por rango, para limpiar
+millones de filas de una base compartida sin locks largos ni picos de
+retraso en las réplicas.
+"""
+
+import time
+
+import mysql.connector
+
+from .finance import CREATED_BY
+from .metrics import RunMetrics
+
+DEFAULT_CHUNK_ROWS = 5000
+
+# Usuarios que crea el modo demo clásico (create_demo_users en auto-populate-demo.py)
+DEMO_USER_IDS = ('ADMIN001', 'APOD001', 'PROF001')
+
+# Cursos del modo demo clásico creados antes de marcarlos con DEMO_SYSTEM:
+# creado_por era el primer usuario demo y el nombre termina en " - Demo"
+LEGACY_DEMO_CURSOS = (f"creado_por IN ({', '.join(repr(user) for user in DEMO_USER_IDS + ('ADMIN_DEMO',))}) "
+                      "AND nombre_curso LIKE '%% - Demo'")
+
+# Cómo reconocer las filas generadas de cada tabla; las tablas sin columna
+# de autoría se reconocen por la fila demo a la que pertenecen
+DEMO_FILTERS = {
+    'personas': "es_dato_prueba = 1 AND created_by = %s",
+    'usuarios_auth': "es_dato_prueba = 1 AND created_by = %s",
+    'persona_roles': "es_dato_prueba = 1 AND created_by = %s",
+    'usuarios': f"id IN ({', '.join(repr(user) for user in DEMO_USER_IDS)})",
+    'cursos': f"(creado_por = %s OR ({LEGACY_DEMO_CURSOS}))",
+    'alumnos': "creado_por = %s",
+    'cuotas': f"curso_id IN (SELECT id FROM cursos WHERE creado_por = %s OR ({LEGACY_DEMO_CURSOS}))",
+    'cobros': "creado_por = %s",
+    'pagos': "alumno_id IN (SELECT id FROM alumnos WHERE creado_por = %s)",
+    'deudas_alumnos': "creado_por = %s",
+    'gastos': "creado_por = %s",
+    'movimientos_ccaa': "creado_por = %s",
+    'movimientos_ccpp': "creado_por = %s",
+}
+
+# Columnas que cada filtro necesita en su tabla
+FILTER_COLUMNS = {
+    'personas': ('es_dato_prueba', 'created_by'),
+    'usuarios_auth': ('es_dato_prueba', 'created_by'),
+    'persona_roles': ('es_dato_prueba', 'created_by'),
+    'usuarios': ('id',),
+    'cursos': ('creado_por', 'nombre_curso'),
+    'cuotas': ('curso_id',),
+    'pagos': ('alumno_id',),
+}
+
+
+def purge_order(catalog):
+    """Tablas con filtro demo, hijas antes que padres"""
+    tables = [table for table in DEMO_FILTERS if catalog.has_table(table)
+              and set(FILTER_COLUMNS.get(table, ('creado_por',))) <= set(catalog.column_names(table))]
+    return list(reversed(catalog.topological_order(tables)))
+
+
+def primary_key(catalog, table):
+    """Columna de la llave primaria, o None si es compuesta o no existe"""
+    columns = catalog.indexes.get(table, {}).get('PRIMARY', {}).get('columns', [])
+    return columns[0][0] if len(columns) == 1 else None
+
+
+def _purge_ranges(cursor, connection, table, key, where, params, chunk_rows, pause, metrics):
+    """
+    Borrar por rangos de llave primaria: cada vuelta busca la llave que
+    cierra los próximos chunk_rows filas demo y borra hasta ella.
+    """
+    deleted = 0
+    last = None
+    while True:
+        after = f"{key} > %s AND " if last is not None else ''
+        bound = (last,) if last is not None else ()
+        cursor.execute(
+            f"SELECT MAX({key}) FROM (SELECT {key} FROM {table} WHERE {after}{where} "
+            f"ORDER BY {key} LIMIT {int(chunk_rows)}) AS chunk", bound + params)
+        row = cursor.fetchone()
+        if not row or row[0] is None:
+            return deleted
+        upper = row[0]
+        started = time.perf_counter()
+        cursor.execute(f"DELETE FROM {table} WHERE {after}{key} <= %s AND {where}", bound + (upper,) + params)
+        count = max(cursor.rowcount, 0)
+        connection.commit()
+        metrics.table(table).add(count, time.perf_counter() - started)
+        deleted += count
+        last = upper
+        if pause:
+            time.sleep(pause)
+
+
+def _purge_limited(cursor, connection, table, where, params, chunk_rows, pause, metrics):
+    """Borrar de a chunk_rows filas cuando no hay una llave primaria simple"""
+    deleted = 0
+    while True:
+        started = time.perf_counter()
+        cursor.execute(f"DELETE FROM {table} WHERE {where} LIMIT {int(chunk_rows)}", params)
+        count = max(cursor.rowcount, 0)
+        connection.commit()
+        metrics.table(table).add(count, time.perf_counter() - started)
+        deleted += count
+        if count < chunk_rows:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def purge_demo_data(cursor, connection, catalog, chunk_rows=DEFAULT_CHUNK_ROWS, pause=0.0, metrics=None):
+    """
+    Borrar las filas demo de cada tabla, de las hijas a los padres. pause
+    espera entre rangos para dar aire a las réplicas. Devuelve las filas
+    borradas por tabla.
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+    print("\n🧹 PURGA DE DATOS DEMO")
+    print("=" * 60)
+    print(f"🔪 Rangos de {chunk_rows} filas, un COMMIT por rango"
+          + (f", {pause:g}s de pausa entre rangos" if pause else ''))
+
+    deleted = {}
+    started = time.perf_counter()
+    for table in purge_order(catalog):
+        where = DEMO_FILTERS[table]
+        params = (CREATED_BY,) * where.count('%s')
+        key = primary_key(catalog, table)
+        table_started = time.perf_counter()
+        try:
+            if key:
+                count = _purge_ranges(cursor, connection, table, key, where, params, chunk_rows, pause, metrics)
+            else:
+                count = _purge_limited(cursor, connection, table, where, params, chunk_rows, pause, metrics)
+        except mysql.connector.Error as err:
+            connection.rollback()
+            print(f"❌ {table}: {err}")
+            continue
+        elapsed = time.perf_counter() - table_started
+        metrics.table(table).wall_seconds += elapsed
+        deleted[table] = count
+        rate = count / elapsed if elapsed else 0.0
+        print(f"🗑️ {table}: {count:,} filas en {elapsed:.2f}s ({rate:,.0f} filas/s)")
+
+    elapsed = time.perf_counter() - started
+    total = sum(deleted.values())
+    rate = total / elapsed if elapsed else 0.0
+    print(f"\n🎯 TOTAL BORRADO: {total:,} filas en {elapsed:.2f}s ({rate:,.0f} filas/s)")
+    return deleted
@@ -0,0 +1,523 @@
+"""
+Carga masiva de personas desde un CSV, equivalente a cargaMasivaService.js
+pero por bloques: el archivo se lee en streaming, cada bloque se valida de
+una vez (dígito verificador de RUT, duplicados en el archivo y en personas,
+email únicos, comunas, roles y cursos) y las filas válidas se escriben en
+personas, persona_roles y usuarios_auth con INSERT multi-fila. Los hashes
+bcrypt se calculan en un pool de procesos mientras avanza la lectura.
+
+Cada lote se inserta bajo un SAVEPOINT: si viola una restricción de la base,
+se deshace y se reintenta fila por fila, y la fila que falla queda como
+error "Fila N: ..." sin abortar la carga, como en el servicio JS.
+
+El resultado tiene la misma forma que procesarDatos() del servicio JS
+(exito, datos_procesados, errores, duplicados, exitosos, resumen). Las
+contraseñas temporales (una por fila sin password, como
+generarPasswordTemporal) no van en el resultado: se escriben aparte en un
+CSV de acceso restringido. Como el resto de populate, personas.rut guarda
+el cuerpo numérico del RUT y rut_formateado el RUT con puntos y guion.
+"""
+
+import csv
+import os
+import re
+import secrets
+import string
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+import mysql.connector
+
+from .geography import GeoIndex
+from .metrics import Progress, RunMetrics
+from .passwords import DEFAULT_ROUNDS, hash_password
+from .ruts import RutIndex, calcular_dv, check_digits, formatear_rut
+from .streams import np
+from .writer import BatchInserter
+
+# Filas del CSV validadas juntas
+CHUNK_ROWS = 10000
+
+FETCH_ROWS = 50000
+
+CAMPOS_REQUERIDOS = ('rut', 'nombres', 'apellido_paterno', 'email', 'rol')
+ROLES_VALIDOS = ('administrador', 'apoderado', 'profesor', 'tesorero', 'alumno')
+
+# Código en la tabla roles (scripts/init-roles-sistema.sql) de cada rol del archivo
+CODIGOS_ROL = {
+    'administrador': 'ADMINISTRADOR',
+    'apoderado': 'APODERADO',
+    'profesor': 'PROFESOR',
+    'tesorero': 'TESORERO_APODERADOS',
+    'alumno': 'ALUMNO',
+}
+
+GENEROS = {'masculino': 'M', 'femenino': 'F', 'otro': 'O', 'm': 'M', 'f': 'F', 'o': 'O'}
+
+# Columnas de comuna aceptadas en el archivo (la plantilla JS usa comuna_id)
+COLUMNAS_COMUNA = ('codigo_comuna', 'comuna_id')
+
+EMAIL_PATTERN = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
+RUT_NOISE = re.compile(r'[^0-9kK]')
+FORMATOS_FECHA = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+
+# Errores de una fila que se informan sin abortar la carga
+ROW_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError)
+
+# Largo y alfabeto de las contraseñas temporales (generarPasswordTemporal)
+PASSWORD_TEMPORAL_LARGO = 8
+PASSWORD_TEMPORAL_ALFABETO = string.ascii_letters + string.digits
+
+COLUMNS = {
+    'personas': (
+        'rut', 'rut_formateado', 'nombres', 'apellido_paterno', 'apellido_materno',
+        'fecha_nacimiento', 'genero', 'email', 'telefono', 'direccion',
+        'codigo_comuna', 'codigo_provincia', 'codigo_region',
+        'activo', 'es_dato_prueba', 'created_at', 'updated_at', 'created_by',
+    ),
+    'persona_roles': (
+        'rut_persona', 'rol_id', 'curso_id', 'fecha_inicio', 'activo',
+        'observaciones', 'es_dato_prueba', 'created_at', 'updated_at', 'created_by',
+    ),
+    'usuarios_auth': (
+        'rut_persona', 'password_hash', 'intentos_fallidos',
+        'debe_cambiar_password', 'es_dato_prueba', 'created_at', 'updated_at', 'created_by',
+    ),
+}
+
+
+@dataclass
+class RosterConfig:
+    """Parámetros de la carga masiva"""
+    batch_size: int = 1000
+    chunk_rows: int = CHUNK_ROWS
+    bcrypt_rounds: int = DEFAULT_ROUNDS
+    hash_workers: int = None
+    password_por_defecto: str = None
+    archivo_passwords: str = None
+    hash_pool_size: int = 16
+    marcar_como_prueba: bool = False
+    created_by: str = 'CARGA_MASIVA'
+    dry_run: bool = False
+    progress: bool = True
+
+
+def general_error(message):
+    """Resultado de una carga que no llegó a procesar filas"""
+    return {'exito': False, 'errores': [message], 'datos_procesados': 0}
+
+
+def generar_password_temporal():
+    return ''.join(secrets.choice(PASSWORD_TEMPORAL_ALFABETO) for _ in range(PASSWORD_TEMPORAL_LARGO))
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Leer el CSV en streaming: primero los encabezados (en minúsculas, como
+    limpiarDatos) y luego bloques de [(número de fila, {columna: valor})].
+    Las filas vacías se saltan; la fila 2 es la primera con datos.
+    """
+    with open(path, encoding='utf-8-sig', newline='') as handle:
+        reader = csv.reader(handle)
+        header = [key.strip().lower() for key in next(reader, [])]
+        yield header
+        chunk = []
+        number = 1
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            number += 1
+            chunk.append((number, {key: value.strip() for key, value in zip(header, values)}))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def limpiar_rut(value):
+    """RUT sin puntos, guion ni espacios (limpiarRUT)"""
+    return RUT_NOISE.sub('', value)
+
+
+def validate_ruts(values):
+    """
+    Validar un bloque de RUT como validarRUT: 8 o 9 caracteres tras limpiar
+    y dígito verificador correcto. Devuelve (cuerpos, válidos).
+    """
+    cleaned = [limpiar_rut(value) for value in values]
+    shaped = [8 <= len(text) <= 9 and text[:-1].isdigit() for text in cleaned]
+    bodies = [int(text[:-1]) if ok else 0 for text, ok in zip(cleaned, shaped)]
+    if np is not None:
+        expected = check_digits(np.array(bodies, dtype=np.int64)).tolist()
+    else:
+        expected = [calcular_dv(body) for body in bodies]
+    valid = [ok and text[-1].upper() == dv for text, ok, dv in zip(cleaned, shaped, expected)]
+    return bodies, valid
+
+
+def parse_fecha(value):
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(value, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+class RosterImporter:
+    """
+    Estado de una carga: RUT y emails ya usados (en la base y en lo que va
+    del archivo), comunas, roles y cursos válidos, y los hashes pendientes.
+    """
+
+    def __init__(self, cursor, catalog, config, metrics):
+        self.cursor = cursor
+        self.catalog = catalog
+        self.config = config
+        self.metrics = metrics
+        self.now = datetime.now()
+        self.columns = {table: catalog.insert_columns(table, COLUMNS[table]) for table in COLUMNS}
+        self.indices = {table: [COLUMNS[table].index(column) for column in columns]
+                        for table, columns in self.columns.items()}
+        self.rules = catalog.validation_rules('personas', self.columns['personas'])
+
+        with metrics.step('indices_existentes'):
+            self.ruts = RutIndex.load(cursor, catalog)
+            self.emails = self._fetch_set("SELECT email FROM personas WHERE email IS NOT NULL",
+                                          lambda email: email.lower())
+            geo = GeoIndex.load(cursor, catalog)
+            self.comunas = {codigo: (codigo, provincia, region)
+                            for codigo, provincia, region in zip(geo.codigo, geo.provincia, geo.region)}
+            self.roles = self._load_roles()
+            self.cursos = (self._fetch_set("SELECT id FROM cursos", int)
+                           if catalog.has_table('cursos') else set())
+
+        self.hashes = {}
+        self.default_hashes = None
+        self.temporales = []
+        self.retry = []
+
+    def _fetch_set(self, query, convert):
+        self.cursor.execute(query)
+        values = set()
+        while True:
+            rows = self.cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                return values
+            values.update(convert(value) for value, in rows)
+
+    def _load_roles(self):
+        """{rol del archivo: id en roles}, solo los que existen"""
+        if 'codigo' not in self.catalog.column_names('roles'):
+            return {}
+        self.cursor.execute("SELECT id, codigo FROM roles")
+        by_code = {codigo: rol_id for rol_id, codigo in self.cursor.fetchall()}
+        return {rol: by_code[codigo] for rol, codigo in CODIGOS_ROL.items() if codigo in by_code}
+
+    def row_errors(self, number, fila, rut_valid, comuna):
+        """Errores de una fila en el orden de validarFila, más los de la base de datos"""
+        errores = [f"Fila {number}: Campo '{campo}' es requerido"
+                   for campo in CAMPOS_REQUERIDOS if not fila.get(campo)]
+        rut, email, rol = fila.get('rut'), fila.get('email'), fila.get('rol', '').lower()
+        if rut and not rut_valid:
+            errores.append(f"Fila {number}: RUT '{rut}' no es válido")
+        if email and not EMAIL_PATTERN.match(email):
+            errores.append(f"Fila {number}: Email '{email}' no es válido")
+        if rol and rol not in ROLES_VALIDOS:
+            errores.append(f"Fila {number}: Rol '{fila['rol']}' no es válido. "
+                           f"Roles permitidos: {', '.join(ROLES_VALIDOS)}")
+        elif rol and rol not in self.roles:
+            errores.append(f"Fila {number}: Rol '{fila['rol']}' no encontrado")
+        if comuna and not (comuna.isdigit() and int(comuna) in self.comunas):
+            errores.append(f"Fila {number}: Comuna '{comuna}' no es válida")
+        fecha = fila.get('fecha_nacimiento')
+        if fecha and parse_fecha(fecha) is None:
+            errores.append(f"Fila {number}: Fecha de nacimiento '{fecha}' no es válida")
+        curso = fila.get('curso_id')
+        if curso and not (curso.isdigit() and int(curso) in self.cursos):
+            errores.append(f"Fila {number}: Curso '{curso}' no existe")
+        return errores
+
+    def persona_row(self, rut, fila, comuna):
+        codigo, provincia, region = self.comunas[int(comuna)] if comuna else (None, None, None)
+        genero = fila.get('genero', '').lower()
+        fecha = fila.get('fecha_nacimiento')
+        row = (
+            str(rut), formatear_rut(rut), fila['nombres'], fila['apellido_paterno'],
+            fila.get('apellido_materno', ''), parse_fecha(fecha) if fecha else None,
+            GENEROS.get(genero, genero.upper()[:1] or None), fila['email'].lower(),
+            fila.get('telefono') or None, fila.get('direccion') or None,
+            codigo, provincia, region,
+            1, int(self.config.marcar_como_prueba), self.now, self.now, self.config.created_by,
+        )
+        return tuple(row[i] for i in self.indices['personas'])
+
+    def rule_errors(self, number, row):
+        """Columnas NOT NULL vacías o demasiado largas según el esquema de personas"""
+        errores = []
+        for position, not_null, max_length in self.rules:
+            value = row[position]
+            column = self.columns['personas'][position]
+            if value is None and not_null:
+                errores.append(f"Fila {number}: Campo '{column}' es requerido")
+            elif max_length and isinstance(value, str) and len(value) > max_length:
+                errores.append(f"Fila {number}: Campo '{column}' supera {max_length} caracteres")
+        return errores
+
+    def validate(self, chunk, resultado):
+        """
+        Validar un bloque y devolver sus filas aceptadas [(número, fila, rut,
+        persona)]. Como en el servicio JS, una fila inválida no reserva su
+        RUT, y un RUT ya existente (en personas o antes en el archivo) va a
+        duplicados. Una fila que repite el RUT o el email de otra del mismo
+        bloque se deja para el bloque siguiente: recién entonces se sabe si
+        la primera se escribió.
+        """
+        chunk = self.retry + chunk
+        self.retry = []
+        bodies, valid = validate_ruts([fila.get('rut', '') for _, fila in chunk])
+        existing = self.ruts.contains(bodies)
+        accepted = []
+        seen = set()
+        emails = set()
+        for (number, fila), rut, rut_valid, exists in zip(chunk, bodies, valid, existing):
+            comuna = next((fila[column] for column in COLUMNAS_COMUNA if fila.get(column)), '')
+            errores = self.row_errors(number, fila, rut_valid, comuna)
+            if errores:
+                resultado['errores'].extend(errores)
+                continue
+            if exists:
+                resultado['duplicados'].append(f"Fila {number}: RUT {fila['rut']} ya existe")
+                continue
+            email = fila['email'].lower()
+            if rut in seen or email in emails:
+                self.retry.append((number, fila))
+                continue
+            if email in self.emails:
+                resultado['errores'].append(f"Fila {number}: Email '{fila['email']}' ya está registrado")
+                continue
+            persona = self.persona_row(rut, fila, comuna)
+            errores = self.rule_errors(number, persona)
+            if errores:
+                resultado['errores'].extend(errores)
+                continue
+            seen.add(rut)
+            emails.add(email)
+            self.emails.add(email)
+            accepted.append((number, fila, rut, persona))
+        self.ruts.update(seen)
+        return accepted
+
+    def queue_passwords(self, executor, accepted):
+        """
+        Encargar al pool los hashes de las contraseñas del bloque y devolver
+        sus filas como [(número, fila, rut, persona, temporal, hash futuro)].
+        Las filas sin password usan la contraseña por defecto (repartida en
+        hash_pool_size hashes con sales distintas) o, sin ella, una temporal
+        propia de cada fila.
+        """
+        rounds = self.config.bcrypt_rounds
+        default = self.config.password_por_defecto
+        queued = []
+        for number, fila, rut, persona in accepted:
+            password = fila.get('password') or None
+            temporal = None
+            if password:
+                if password not in self.hashes:
+                    self.hashes[password] = executor.submit(hash_password, password, rounds)
+                future = self.hashes[password]
+            elif default:
+                if self.default_hashes is None:
+                    self.default_hashes = [executor.submit(hash_password, default, rounds)
+                                           for _ in range(max(1, self.config.hash_pool_size))]
+                future = self.default_hashes[number % len(self.default_hashes)]
+            else:
+                temporal = generar_password_temporal()
+                future = executor.submit(hash_password, temporal, rounds)
+            queued.append((number, fila, rut, persona, temporal, future))
+        return queued
+
+    def write(self, inserter, queued, resultado):
+        """
+        Insertar las filas de un bloque en lotes de batch_size, cada uno bajo
+        un SAVEPOINT; un lote que viola una restricción se deshace y se
+        reintenta fila por fila para atribuir el error a su fila.
+        """
+        with self.metrics.step('hashes'):
+            rows = [(number, fila, rut, persona, temporal, future.result())
+                    for number, fila, rut, persona, temporal, future in queued]
+        size = max(1, self.config.batch_size)
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            self.cursor.execute("SAVEPOINT lote")
+            try:
+                self.insert_rows(inserter, batch)
+            except ROW_ERRORS:
+                inserter.discard()
+                self.cursor.execute("ROLLBACK TO SAVEPOINT lote")
+                batch = self.insert_each(inserter, batch, resultado)
+            for number, fila, rut, _, temporal, _ in batch:
+                resultado['exitosos'].append({
+                    'fila': number, 'rut': str(rut),
+                    'nombre': f"{fila['nombres']} {fila['apellido_paterno']}", 'rol': fila['rol'],
+                })
+                if temporal:
+                    self.temporales.append((number, rut, temporal))
+
+    def insert_each(self, inserter, batch, resultado):
+        """Insertar fila por fila; devuelve las filas que quedaron escritas"""
+        inserted = []
+        for row in batch:
+            self.cursor.execute("SAVEPOINT fila")
+            try:
+                self.insert_rows(inserter, [row])
+            except ROW_ERRORS as err:
+                inserter.discard()
+                self.cursor.execute("ROLLBACK TO SAVEPOINT fila")
+                resultado['errores'].append(f"Fila {row[0]}: {err.msg}")
+                # Como en el servicio JS, una fila que no se escribió no reserva su RUT ni su email
+                self.ruts.discard(row[2])
+                self.emails.discard(row[1]['email'].lower())
+            else:
+                inserted.append(row)
+        return inserted
+
+    def insert_rows(self, inserter, rows):
+        with inserter.measure('personas'):
+            inserter.insert_many('personas', self.columns['personas'],
+                                 [persona for _, _, _, persona, _, _ in rows])
+        with inserter.measure('persona_roles'):
+            inserter.insert_many('persona_roles', self.columns['persona_roles'],
+                                 [self.role_row(rut, fila) for _, fila, rut, _, _, _ in rows])
+        with inserter.measure('usuarios_auth'):
+            inserter.insert_many('usuarios_auth', self.columns['usuarios_auth'],
+                                 [self.auth_row(rut, fila.get('password'), password_hash)
+                                  for _, fila, rut, _, _, password_hash in rows])
+
+    def role_row(self, rut, fila):
+        curso = fila.get('curso_id')
+        row = (
+            str(rut), self.roles[fila['rol'].lower()], int(curso) if curso else None, self.now.date(), 1,
+            'Carga masiva', int(self.config.marcar_como_prueba), self.now, self.now, self.config.created_by,
+        )
+        return tuple(row[i] for i in self.indices['persona_roles'])
+
+    def auth_row(self, rut, password, password_hash):
+        row = (
+            str(rut), password_hash, 0, 0 if password else 1,
+            int(self.config.marcar_como_prueba), self.now, self.now, self.config.created_by,
+        )
+        return tuple(row[i] for i in self.indices['usuarios_auth'])
+
+
+def write_passwords(path, temporales):
+    """
+    Escribir las contraseñas temporales (fila, rut, password_temporal) en un
+    CSV legible solo por el usuario actual.
+    """
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, 'w', encoding='utf-8', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(('fila', 'rut', 'password_temporal'))
+        for number, rut, temporal in temporales:
+            writer.writerow((number, formatear_rut(rut), temporal))
+
+
+def import_roster(cursor, connection, catalog, path, config=None, metrics=None):
+    """
+    Importar un CSV de personas (procesarArchivo del servicio JS) en una
+    sola transacción; las filas que violan una restricción se informan como
+    errores y el resto se confirma. Devuelve el resultado con la forma del
+    servicio JS.
+    """
+    config = config or RosterConfig()
+    metrics = metrics or RunMetrics()
+    if os.path.splitext(path)[1].lower() != '.csv':
+        return general_error('Formato de archivo no soportado. Use CSV (exporte el Excel a CSV).')
+    missing = [table for table in COLUMNS if not catalog.has_table(table)]
+    if missing:
+        return general_error(f"Tablas no encontradas: {', '.join(missing)}")
+
+    resultado = {'exito': False, 'datos_procesados': 0, 'errores': [], 'duplicados': [], 'exitosos': []}
+    total_filas = 0
+    progress = Progress(config.progress)
+    try:
+        importer = RosterImporter(cursor, catalog, config, metrics)
+        inserter = BatchInserter(cursor, config.batch_size, progress=progress)
+        chunks = read_chunks(path, config.chunk_rows)
+        header = next(chunks)
+        faltantes = [campo for campo in CAMPOS_REQUERIDOS if campo not in header]
+        if faltantes:
+            connection.rollback()
+            return general_error('; '.join(f"Columna requerida '{campo}' no encontrada" for campo in faltantes))
+
+        # Cada bloque se escribe después de leer el siguiente, mientras el
+        # pool calcula sus hashes, y antes de validarlo: así el siguiente ve
+        # libres los RUT y emails de las filas que no se pudieron escribir
+        with ProcessPoolExecutor(max_workers=config.hash_workers) as executor:
+            previous = None
+            for chunk in chunks:
+                total_filas += len(chunk)
+                if previous is not None:
+                    importer.write(inserter, previous, resultado)
+                with metrics.step('validacion'):
+                    accepted = importer.validate(chunk, resultado)
+                previous = importer.queue_passwords(executor, accepted)
+            if total_filas == 0:
+                connection.rollback()
+                return general_error('El archivo está vacío o no contiene datos válidos.')
+            if previous is not None:
+                importer.write(inserter, previous, resultado)
+            # Filas que repetían el RUT o el email de otra del último bloque
+            while importer.retry:
+                with metrics.step('validacion'):
+                    accepted = importer.validate([], resultado)
+                importer.write(inserter, importer.queue_passwords(executor, accepted), resultado)
+    except Exception as err:
+        connection.rollback()
+        return general_error(f"Error general: {err}")
+    finally:
+        progress.close()
+
+    if config.dry_run:
+        connection.rollback()
+    else:
+        connection.commit()
+        if importer.temporales and config.archivo_passwords:
+            write_passwords(config.archivo_passwords, importer.temporales)
+            print(f"🔑 {len(importer.temporales):,} contraseñas temporales guardadas en "
+                  f"{config.archivo_passwords} (deberán cambiarlas al ingresar)")
+    metrics.add_tables(inserter.stats)
+
+    exitosos = len(resultado['exitosos'])
+    resultado.update({
+        'exito': not resultado['errores'],
+        'datos_procesados': exitosos,
+        'resumen': {
+            'total_filas': total_filas,
+            'exitosos': exitosos,
+            'errores': len(resultado['errores']),
+            'duplicados': len(resultado['duplicados']),
+        },
+    })
+    return resultado
+
+
+def report_result(resultado, limit=10):
+    """Mostrar el resumen y los primeros errores y duplicados"""
+    print("\n📋 RESULTADO DE LA CARGA MASIVA")
+    print("=" * 60)
+    resumen = resultado.get('resumen')
+    if resumen:
+        print(f"📄 Filas: {resumen['total_filas']:,} | ✅ Creados: {resumen['exitosos']:,} | "
+              f"❌ Errores: {resumen['errores']:,} | 🔁 Duplicados: {resumen['duplicados']:,}")
+    for titulo, mensajes in (('❌ Errores', resultado['errores']), ('🔁 Duplicados', resultado.get('duplicados', []))):
+        if not mensajes:
+            continue
+        print(f"{titulo}:")
+        for mensaje in mensajes[:limit]:
+            print(f"   {mensaje}")
+        if len(mensajes) > limit:
+            print(f"   ... y {len(mensajes) - limit:,} más")
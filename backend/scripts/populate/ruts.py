@@ -0,0 +1,221 @@
+"""
+RUT chilenos en volumen: dígito verificador módulo 11 y formato calculados
+sobre arreglos, y un mapa de bits de RUT usados (un bit por número) para
+asignar RUT nuevos sin chocar con los que ya existen en personas.
+"""
+
+from array import array
+
+from .streams import np, stream_key, uniform, uniform_array
+
+RUT_MAX = 99999999
+
+# Rango de RUT de personas adultas para el muestreo aleatorio
+RUT_RANGE = (5000000, 26000000)
+
+# Flujo de números aleatorios del muestreo de RUT
+STREAM_RUTS = 4
+
+# Candidatos por ronda al asignar o muestrear RUT
+ALLOCATE_BATCH = 1 << 16
+
+FETCH_ROWS = 50000
+
+
+def calcular_dv(rut):
+    """Calcular dígito verificador módulo 11 de un RUT chileno"""
+    total = 0
+    factor = 2
+    while rut > 0:
+        total += (rut % 10) * factor
+        rut //= 10
+        factor = 2 if factor == 7 else factor + 1
+    dv = 11 - total % 11
+    if dv == 11:
+        return '0'
+    if dv == 10:
+        return 'K'
+    return str(dv)
+
+
+def formatear_rut(rut):
+    """Formatear RUT como 12.345.678-5"""
+    return f"{rut:,}".replace(',', '.') + f"-{calcular_dv(rut)}"
+
+
+def parse_rut(value):
+    """Cuerpo numérico de un RUT con o sin puntos y guion, o None si no es válido"""
+    text = str(value).strip().replace('.', '')
+    if '-' in text:
+        text = text.split('-', 1)[0]
+    return int(text) if text.isdigit() else None
+
+
+# Dígito verificador según 11 - (suma % 11), para valores 1..11
+DV_CHARS = [None, '1', '2', '3', '4', '5', '6', '7', '8', '9', 'K', '0']
+
+
+def check_digits(ruts):
+    """Dígitos verificadores de un arreglo de RUT (versión NumPy de calcular_dv)"""
+    ruts = np.asarray(ruts, dtype=np.int64)
+    total = np.zeros(len(ruts), dtype=np.int64)
+    rest = ruts.copy()
+    for position in range(len(str(RUT_MAX))):
+        total += (rest % 10) * (2 + position % 6)
+        rest //= 10
+    return np.array(DV_CHARS)[11 - total % 11]
+
+
+def format_ruts(ruts):
+    """Versión NumPy de formatear_rut: (sin formato, formateado) como arreglos de texto"""
+    ruts = np.asarray(ruts, dtype=np.int64)
+    plain = ruts.astype(str)
+    millions = ruts // 1000000
+    thousands = np.char.zfill(((ruts // 1000) % 1000).astype(str), 3)
+    units = np.char.zfill((ruts % 1000).astype(str), 3)
+    body = np.char.add(np.char.add(np.char.add(millions.astype(str), '.'), thousands), '.')
+    body = np.char.add(body, units)
+    small = ruts < 1000000
+    if small.any():
+        body[small] = [f"{rut:,}".replace(',', '.') for rut in ruts[small].tolist()]
+    return plain, np.char.add(np.char.add(body, '-'), check_digits(ruts))
+
+
+def split_ruts(values):
+    """
+    Separar RUT en texto (con o sin puntos y guion) en cuerpo y dígito
+    verificador, con una máscara de los que tienen formato y dígito válidos.
+    """
+    text = np.char.upper(np.char.replace(np.char.strip(np.asarray(values, dtype=str)), '.', ''))
+    parts = np.char.partition(text, '-')
+    body = parts[:, 0]
+    dv = parts[:, 2]
+    numeric = np.char.isdigit(body) & (np.char.str_len(body) <= len(str(RUT_MAX)))
+    bodies = np.zeros(len(text), dtype=np.int64)
+    bodies[numeric] = body[numeric].astype(np.int64)
+    valid = numeric & (bodies > 0) & (parts[:, 1] == '-') & (check_digits(bodies) == dv)
+    return bodies, valid
+
+
+class RutIndex:
+    """
+    RUT usados como mapa de bits de 100 millones de bits (~12 MB). Permite
+    revisar colisiones en O(1) y asignar RUT libres en bloque.
+    """
+
+    def __init__(self, limit=RUT_MAX):
+        self.limit = limit
+        self.bits = bytearray(limit // 8 + 1)
+        self.count = 0
+
+    @classmethod
+    def load(cls, cursor, catalog):
+        """Cargar los RUT existentes en personas"""
+        index = cls()
+        if not catalog.has_table('personas'):
+            return index
+        cursor.execute("SELECT rut FROM personas")
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            index.update(parse_rut(rut) for rut, in rows)
+        return index
+
+    def __contains__(self, rut):
+        return 0 < rut <= self.limit and bool(self.bits[rut >> 3] & (1 << (rut & 7)))
+
+    def add(self, rut):
+        if not 0 < rut <= self.limit or rut in self:
+            return False
+        self.bits[rut >> 3] |= 1 << (rut & 7)
+        self.count += 1
+        return True
+
+    def discard(self, rut):
+        """Liberar un RUT reservado que finalmente no se escribió"""
+        if rut not in self:
+            return False
+        self.bits[rut >> 3] &= ~(1 << (rut & 7)) & 0xFF
+        self.count -= 1
+        return True
+
+    def update(self, ruts):
+        for rut in ruts:
+            if rut is not None:
+                self.add(rut)
+
+    def contains(self, ruts):
+        """Versión por lote de `rut in index`: una lista de booleanos"""
+        if np is None:
+            return [rut in self for rut in ruts]
+        candidates = np.asarray(ruts, dtype=np.int64)
+        inside = (candidates > 0) & (candidates <= self.limit)
+        return (inside & ~self._free(candidates)).tolist()
+
+    def _free(self, candidates):
+        """Máscara NumPy de candidatos que no están en el mapa"""
+        bits = np.frombuffer(self.bits, dtype=np.uint8)
+        inside = (candidates > 0) & (candidates <= self.limit)
+        clipped = np.where(inside, candidates, 0)
+        used = (bits[clipped >> 3] >> (clipped & 7).astype(np.uint8)) & 1
+        return inside & (used == 0)
+
+    def _mark(self, ruts):
+        bits = np.frombuffer(self.bits, dtype=np.uint8)
+        np.bitwise_or.at(bits, ruts >> 3, (1 << (ruts & 7)).astype(np.uint8))
+        self.count += len(ruts)
+
+    def allocate(self, count, start):
+        """Reservar los count primeros RUT libres desde start, en orden"""
+        ruts = array('I')
+        if np is None:
+            rut = start
+            while len(ruts) < count:
+                if rut > self.limit:
+                    raise ValueError("No quedan RUT libres en el rango")
+                if self.add(rut):
+                    ruts.append(rut)
+                rut += 1
+            return ruts
+
+        while len(ruts) < count:
+            if start > self.limit:
+                raise ValueError("No quedan RUT libres en el rango")
+            candidates = np.arange(start, min(start + ALLOCATE_BATCH, self.limit + 1), dtype=np.int64)
+            free = candidates[self._free(candidates)][:count - len(ruts)]
+            self._mark(free)
+            ruts.extend(free.tolist())
+            start = int(candidates[-1]) + 1
+        return ruts
+
+    def sample(self, count, seed, low=RUT_RANGE[0], high=RUT_RANGE[1]):
+        """
+        Reservar count RUT libres al azar en [low, high), reproducibles con
+        la semilla; un candidato repetido o ya usado se descarta.
+        """
+        if count > high - low:
+            raise ValueError("El rango de RUT es más chico que la cantidad pedida")
+        key = stream_key(seed, STREAM_RUTS)
+        span = high - low
+        ruts = array('I')
+        index = 0
+        if np is None:
+            while len(ruts) < count:
+                rut = low + int(uniform(key, index) * span)
+                if self.add(rut):
+                    ruts.append(rut)
+                index += 1
+            return ruts
+
+        while len(ruts) < count:
+            indices = np.arange(index, index + ALLOCATE_BATCH, dtype=np.int64)
+            candidates = low + (uniform_array(key, indices) * span).astype(np.int64)
+            # Primer aparición de cada candidato dentro de la ronda, en orden
+            _, first = np.unique(candidates, return_index=True)
+            candidates = candidates[np.sort(first)]
+            free = candidates[self._free(candidates)][:count - len(ruts)]
+            index += ALLOCATE_BATCH
+            self._mark(free)
+            ruts.extend(free.tolist())
+        return ruts
@@ -0,0 +1,704 @@
+"""
+Generador parametrizado de datos demo a escala (cursos, apoderados, alumnos,
+cuotas, pagos, deudas y movimientos) con llaves foráneas consistentes.
+"""
+
+import calendar
+import hashlib
+import json
+import os
+import random
+import time
+from array import array
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+
+from .asyncload import run_async
+from .bulk import local_infile_enabled
+from .cache import DatasetCache
+from .connection import ConnectionPool
+from .dump import DEFAULT_FILE_MB, DumpSink
+from .finance import (
+    CREATED_BY, PaymentDistribution, deudas_alumnos_blocks, generate_deudas_alumnos, generate_movimientos_ccaa,
+    generate_movimientos_ccpp, generate_pagos, month_labels, monto_cuota, movimientos_ccaa_blocks,
+    movimientos_ccpp_blocks, pagos_blocks,
+)
+from .geography import GeoIndex
+from .graph import DRAW_PERFIL, STREAM_GRAFO, CourseGraph, GraphDistribution, weighted_pick, weighted_pick_array
+from .indexes import drop_secondary_indexes, index_state_path, rebuild_secondary_indexes, report_rebuild
+from .journal import Checkpointer, Journal
+from .metrics import Progress, RunMetrics
+from .parallel import run_parallel
+from .passwords import DEFAULT_ROUNDS, password_hashes
+from .pipeline import TablePlan, report_memory, report_rejected, run_table
+from .ruts import RutIndex, formatear_rut
+from .schema import SchemaCatalog
+from .snapshot import restore_snapshot, save_snapshot, snapshot_exists
+from .streams import np, stream_key, uniform, uniform_array
+from .writer import BatchInserter
+
+# Rol 2 = Apoderado (mismo valor que usa create_demo_students_with_guardian)
+ROL_APODERADO = 2
+
+NOMBRES = [
+    'Sofía', 'Diego', 'Valentina', 'Benjamín', 'Isidora', 'Vicente', 'Florencia',
+    'Martín', 'Antonella', 'Matías', 'Emilia', 'Agustín', 'Catalina', 'Tomás',
+    'Josefa', 'Joaquín', 'Trinidad', 'Maximiliano', 'Amanda', 'Lucas',
+    'Fernanda', 'Cristóbal', 'Constanza', 'Sebastián', 'Javiera', 'Gaspar',
+]
+NOMBRES_ADULTOS = [
+    'Carlos Eduardo', 'María José', 'Juan Pablo', 'Ana María', 'Luis Alberto',
+    'Claudia Andrea', 'Jorge Andrés', 'Paula Francisca', 'Rodrigo Ignacio',
+    'Carolina Paz', 'Felipe Antonio', 'Daniela Alejandra', 'Patricio Javier',
+    'Marcela Soledad', 'Gonzalo Esteban', 'Lorena Beatriz',
+]
+APELLIDOS = [
+    'González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+    'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes',
+    'Hernández', 'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela',
+    'Castillo', 'Tapia', 'Reyes', 'Gutiérrez', 'Castro', 'Pizarro',
+]
+NIVELES = [
+    (1, '1° Básico'), (2, '2° Básico'), (3, '3° Básico'), (4, '4° Básico'),
+    (5, '5° Básico'), (6, '6° Básico'), (7, '7° Básico'), (8, '8° Básico'),
+    (9, '1° Medio'), (10, '2° Medio'), (11, '3° Medio'), (12, '4° Medio'),
+]
+LETRAS_CURSO = 'ABCDEFGH'
+
+COLUMNS = {
+    'personas': (
+        'rut', 'rut_formateado', 'nombres', 'apellido_paterno', 'apellido_materno',
+        'fecha_nacimiento', 'genero', 'email', 'telefono', 'direccion',
+        'codigo_comuna', 'codigo_provincia', 'codigo_region',
+        'activo', 'es_dato_prueba', 'created_at', 'updated_at', 'created_by',
+    ),
+    'usuarios_auth': (
+        'rut_persona', 'password_hash', 'ultimo_acceso', 'intentos_fallidos',
+        'debe_cambiar_password', 'es_dato_prueba', 'created_at', 'updated_at', 'created_by',
+    ),
+    'persona_roles': (
+        'rut_persona', 'rol_id', 'fecha_inicio', 'activo',
+        'observaciones', 'es_dato_prueba', 'created_at', 'updated_at', 'created_by',
+    ),
+    'cursos': (
+        'id', 'nombre_curso', 'nivel_id', 'ano_escolar', 'profesor_id', 'tesorero_id',
+        'creado_por', 'fecha_creacion',
+    ),
+    'alumnos': (
+        'id', 'nombre_completo', 'fecha_nacimiento', 'curso_id', 'apoderado_id',
+        'usuario_id', 'creado_por', 'fecha_creacion',
+    ),
+    'cuotas': (
+        'id', 'curso_id', 'nombre', 'monto', 'fecha_limite_pago', 'creado_en',
+    ),
+    'cobros': (
+        'id', 'curso_id', 'nombre', 'descripcion', 'monto', 'fecha_vencimiento',
+        'activo', 'creado_por', 'fecha_creacion',
+    ),
+    'pagos': (
+        'monto_pagado', 'metodo_pago', 'cuota_id', 'alumno_id', 'apoderado_id',
+        'fecha_pago', 'estado_id', 'transaccion_id',
+    ),
+    'deudas_alumnos': (
+        'alumno_id', 'cobro_id', 'monto_adeudado', 'estado',
+        'creado_por', 'fecha_creacion',
+    ),
+    'movimientos_ccaa': (
+        'alumno_id', 'tipo_movimiento', 'monto', 'descripcion', 'fecha_movimiento',
+        'creado_por', 'fecha_creacion',
+    ),
+    'movimientos_ccpp': (
+        'apoderado_id', 'tipo_movimiento', 'monto', 'descripcion', 'fecha_movimiento',
+        'creado_por', 'fecha_creacion',
+    ),
+}
+
+# Orden de inserción respetando llaves foráneas
+TABLE_ORDER = [
+    'personas', 'usuarios_auth', 'persona_roles', 'cursos', 'alumnos',
+    'cuotas', 'cobros', 'pagos', 'deudas_alumnos',
+    'movimientos_ccaa', 'movimientos_ccpp',
+]
+
+# Fases de la carga paralela: cada fase depende de las anteriores
+PHASES = [
+    ['personas'],
+    ['usuarios_auth', 'persona_roles', 'cursos'],
+    ['alumnos'],
+    ['cuotas', 'cobros'],
+    ['pagos', 'deudas_alumnos'],
+    ['movimientos_ccaa', 'movimientos_ccpp'],
+]
+
+# Tablas grandes candidatas a LOAD DATA LOCAL INFILE (--bulk-tables auto)
+BULK_TABLES = ['pagos', 'movimientos_ccaa', 'deudas_alumnos']
+
+# Versión del generador: cambiarla invalida las huellas y el caché de datasets
+GENERATOR_VERSION = 3
+
+# Parámetros que solo afectan cómo se carga, no qué datos se generan
+LOAD_ONLY_FIELDS = {
+    'batch_size', 'bulk_tables', 'workers', 'async_connections', 'max_memory_mb', 'cache_dir', 'snapshot_dir',
+    'snapshot_replace_tables', 'journal_path', 'resume', 'commit_every', 'progress', 'drop_indexes',
+    'index_workers',
+}
+
+# Tablas con id explícito (se referencian desde otras tablas)
+ID_TABLES = ['cursos', 'alumnos', 'cuotas', 'cobros']
+
+
+@dataclass
+class ScaleConfig:
+    """Parámetros del modo escala"""
+    courses: int = 50
+    students_per_course: int = 30
+    months: int = 10
+    ano_escolar: int = 2025
+    rut_base: int = 30000000
+    random_ruts: bool = False
+    poblacion_comunas: str = None
+    password: str = 'demo123'
+    fecha_corte: date = None
+    batch_size: int = 1000
+    bulk_tables: tuple = ()
+    workers: int = 1
+    async_connections: int = 0
+    bcrypt_rounds: int = DEFAULT_ROUNDS
+    hash_pool_size: int = 16
+    max_memory_mb: int = None
+    seed: int = None
+    cache_dir: str = None
+    snapshot_dir: str = None
+    snapshot_replace_tables: bool = False
+    distribution: PaymentDistribution = field(default_factory=PaymentDistribution)
+    graph: GraphDistribution = field(default_factory=GraphDistribution)
+    journal_path: str = None
+    resume: bool = False
+    commit_every: int = 10
+    progress: bool = True
+    drop_indexes: bool = False
+    index_workers: int = 4
+
+
+def school_months(config):
+    """Meses cobrados del año escolar a partir de marzo: [(año, mes, fecha_limite)]"""
+    months = []
+    for i in range(config.months):
+        year = config.ano_escolar + (2 + i) // 12
+        month = (2 + i) % 12 + 1
+        last_day = calendar.monthrange(year, month)[1]
+        months.append((year, month, date(year, month, last_day)))
+    return months
+
+
+def default_fecha_corte(config):
+    """Con semilla, el corte es el último vencimiento del año; si no, hoy"""
+    if config.fecha_corte:
+        return config.fecha_corte
+    if config.seed is not None:
+        return school_months(config)[-1][2] if config.months else date(config.ano_escolar, 12, 31)
+    return date.today()
+
+
+def dataset_fingerprint(config, layout):
+    """
+    Huella del dataset: los mismos parámetros, semilla, ids base, RUT
+    asignados y geografía producen exactamente las mismas filas, así que la
+    huella identifica su contenido.
+    """
+    params = {key: value for key, value in asdict(config).items() if key not in LOAD_ONLY_FIELDS}
+    params['fecha_corte'] = default_fecha_corte(config).isoformat()
+    ruts = hashlib.sha256(layout.family_rut.tobytes()).hexdigest()
+    payload = json.dumps({'version': GENERATOR_VERSION, 'params': params, 'id_bases': layout.id_bases,
+                          'ruts': ruts, 'geo': layout.geo.digest}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def get_id_bases(cursor, catalog):
+    """Obtener el mayor id existente de las tablas con id explícito"""
+    bases = {}
+    for table in ID_TABLES:
+        if not catalog.has_table(table):
+            bases[table] = 0
+            continue
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        bases[table] = int(cursor.fetchone()[0])
+    return bases
+
+
+# Flujos de números aleatorios independientes por familia
+STREAM_PERSONA = 1
+STREAM_ALUMNOS = 2
+STREAM_GEO = 5
+
+
+class ScaleLayout:
+    """
+    Estructura compacta del dataset: cursos y familias en arreglos de enteros.
+    Las filas de cada tabla se generan bajo demanda a partir de esta estructura,
+    con un generador aleatorio propio por familia, de modo que cualquier tabla
+    (o shard) puede regenerarse sin materializar las demás.
+    """
+
+    def __init__(self, config, id_bases, hashes, rut_index=None, geo=None, state=None):
+        self.config = config
+        self.id_bases = id_bases
+        self.hashes = hashes
+        if state:
+            # Reanudación: mismo dataset que la corrida registrada en el diario
+            self.seed = state['seed']
+            self.fecha_corte = state['fecha_corte']
+            self.now = state['now']
+        else:
+            self.seed = config.seed if config.seed is not None else random.randrange(2 ** 24)
+            self.fecha_corte = default_fecha_corte(config)
+            if config.seed is not None:
+                self.now = datetime.combine(self.fecha_corte, datetime.min.time()).replace(hour=23, minute=59)
+            else:
+                self.now = datetime.now()
+        self.months = school_months(config)
+        self.distribution = config.distribution
+
+        # Grafo apoderado–alumno–curso en arreglos de enteros
+        self.graph = CourseGraph.build(self.seed, config.courses, config.students_per_course, config.graph)
+        self.course_size = self.graph.course_size
+        self.slot_course = self.graph.slot_course
+        self.family_start = self.graph.family_start
+        self.course_tesorero = self.graph.course_tesorero
+        self.course_profesor = self.graph.course_profesor
+        self.course_nivel = array('B', (NIVELES[i % len(NIVELES)][0] for i in range(config.courses)))
+
+        # Perfil de pago de cada familia
+        profiles = [(index, profile.weight) for index, profile in enumerate(self.distribution.profiles)]
+        key = stream_key(self.seed, STREAM_GRAFO, DRAW_PERFIL)
+        if np is not None:
+            picks = weighted_pick_array(uniform_array(key, np.arange(self.family_count)), profiles)
+            self.family_profile = array('B', picks.astype(np.uint8).tobytes())
+        else:
+            self.family_profile = array('B', (weighted_pick(uniform(key, family), profiles)
+                                              for family in range(self.family_count)))
+
+        # RUT de cada apoderado, sin chocar con los que ya existen
+        rut_index = rut_index or RutIndex()
+        if state:
+            self.family_rut = state['family_rut']
+        elif config.random_ruts:
+            self.family_rut = rut_index.sample(self.family_count, self.seed)
+        else:
+            self.family_rut = rut_index.allocate(self.family_count, config.rut_base + 1)
+
+        # Comuna de cada familia, ponderada por población
+        self.geo = geo or GeoIndex.from_sql()
+        key = stream_key(self.seed, STREAM_GEO)
+        if np is not None:
+            picks = self.geo.pick_array(uniform_array(key, np.arange(self.family_count)))
+            self.family_comuna = array('H', picks.astype(np.uint16).tobytes())
+        else:
+            self.family_comuna = array('H', (self.geo.pick(uniform(key, family))
+                                             for family in range(self.family_count)))
+
+    @property
+    def family_count(self):
+        return len(self.family_start) - 1
+
+    @property
+    def student_count(self):
+        return len(self.slot_course)
+
+    def family_rng(self, stream, family):
+        """Generador aleatorio reproducible para un flujo de una familia"""
+        return random.Random((self.seed << 40) | (stream << 32) | family)
+
+    def rut(self, family):
+        return self.family_rut[family]
+
+    def children(self, family):
+        """Cupos de la familia: [(alumno_id, índice de curso)]"""
+        base = self.id_bases['alumnos']
+        return [(base + slot + 1, self.slot_course[slot])
+                for slot in range(self.family_start[family], self.family_start[family + 1])]
+
+    def home_course(self, family):
+        return self.slot_course[self.family_start[family]]
+
+    def course_id(self, course):
+        return self.id_bases['cursos'] + course + 1
+
+    def cuota_id(self, course, month):
+        return self.id_bases['cuotas'] + course * len(self.months) + month + 1
+
+    def cobro_id(self, course, month):
+        return self.id_bases['cobros'] + course * len(self.months) + month + 1
+
+    def courses(self, shard=None):
+        """Índices de curso, opcionalmente solo los del shard (índice, total)"""
+        for course in range(self.config.courses):
+            if shard is None or course % shard[1] == shard[0]:
+                yield course
+
+    def families(self, shard=None):
+        """Índices de familia; cada familia pertenece al shard de su primer hijo"""
+        for family in range(self.family_count):
+            if shard is None or self.home_course(family) % shard[1] == shard[0]:
+                yield family
+
+    def course_name(self, course):
+        nivel_nombre = NIVELES[course % len(NIVELES)][1]
+        seccion = course // len(NIVELES)
+        letra = LETRAS_CURSO[seccion % len(LETRAS_CURSO)]
+        sufijo = f" {seccion // len(LETRAS_CURSO) + 1}" if seccion >= len(LETRAS_CURSO) else ''
+        return f"{nivel_nombre} {letra}{sufijo} - Demo"
+
+    def sample_credentials(self, limit=5):
+        """Algunos apoderados generados: [(rut, cantidad de hijos)]"""
+        return [(self.rut(family), self.family_start[family + 1] - self.family_start[family])
+                for family in range(min(limit, self.family_count))]
+
+
+def family_surnames(layout, family):
+    """Apellidos de la familia, compartidos por apoderado y alumnos"""
+    rng = layout.family_rng(STREAM_PERSONA, family)
+    return rng, rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+
+
+def generate_personas(layout, shard=None):
+    now = layout.now
+    geo = layout.geo
+    for family in layout.families(shard):
+        rng, apellido_paterno, apellido_materno = family_surnames(layout, family)
+        rut = layout.rut(family)
+        comuna = layout.family_comuna[family]
+        yield (
+            str(rut), formatear_rut(rut), rng.choice(NOMBRES_ADULTOS),
+            apellido_paterno, apellido_materno,
+            date(rng.randint(1970, 1992), rng.randint(1, 12), rng.randint(1, 28)),
+            rng.choice('MF'), f"apoderado{rut}@demo.cl",
+            f"+569{rng.randint(10000000, 99999999)}",
+            f"Calle Demo {rng.randint(1, 9999)}, {geo.nombre[comuna]}",
+            *geo.location(comuna),
+            1, 1, now, now, CREATED_BY,
+        )
+
+
+def generate_usuarios_auth(layout, shard=None):
+    now = layout.now
+    hashes = layout.hashes
+    for family in layout.families(shard):
+        yield (
+            str(layout.rut(family)), hashes[family % len(hashes)], now, 0, 0, 1, now, now, CREATED_BY,
+        )
+
+
+def generate_persona_roles(layout, shard=None):
+    now = layout.now
+    inicio = date(layout.config.ano_escolar, 3, 1)
+    for family in layout.families(shard):
+        hijos = layout.family_start[family + 1] - layout.family_start[family]
+        yield (
+            str(layout.rut(family)), ROL_APODERADO, inicio, 1,
+            f"Apoderado demo con {hijos} hijo(s)", 1, now, now, CREATED_BY,
+        )
+
+
+def generate_cursos(layout, shard=None):
+    now = layout.now
+    for course in layout.courses(shard):
+        tesorero = layout.course_tesorero[course]
+        yield (
+            layout.course_id(course), layout.course_name(course), layout.course_nivel[course],
+            layout.config.ano_escolar, f"PROF{layout.course_profesor[course] + 1:05d}",
+            str(layout.rut(tesorero)) if tesorero >= 0 else None,
+            CREATED_BY, now,
+        )
+
+
+def generate_alumnos(layout, shard=None):
+    now = layout.now
+    ano = layout.config.ano_escolar
+    for family in layout.families(shard):
+        _, apellido_paterno, apellido_materno = family_surnames(layout, family)
+        rng = layout.family_rng(STREAM_ALUMNOS, family)
+        rut = str(layout.rut(family))
+        for alumno_id, course in layout.children(family):
+            edad = 5 + layout.course_nivel[course]
+            yield (
+                alumno_id,
+                f"{rng.choice(NOMBRES)} {apellido_paterno} {apellido_materno}",
+                date(ano - edad, rng.randint(1, 12), rng.randint(1, 28)),
+                layout.course_id(course), rut, f"ALU{alumno_id:07d}",
+                CREATED_BY, now,
+            )
+
+
+def generate_cuotas(layout, shard=None):
+    labels = month_labels(layout)
+    for course in layout.courses(shard):
+        course_id = layout.course_id(course)
+        monto = monto_cuota(layout.course_nivel[course])
+        for month, (_, _, fecha_limite) in enumerate(layout.months):
+            yield (
+                layout.cuota_id(course, month), course_id,
+                f"Cuota Mensual {labels[month]} - Curso {course_id}",
+                monto, fecha_limite, layout.now,
+            )
+
+
+def generate_cobros(layout, shard=None):
+    labels = month_labels(layout)
+    for course in layout.courses(shard):
+        course_id = layout.course_id(course)
+        monto = monto_cuota(layout.course_nivel[course])
+        for month, (_, _, fecha_limite) in enumerate(layout.months):
+            label = labels[month]
+            yield (
+                layout.cobro_id(course, month), course_id,
+                f"Cobro Mensual {label} - Curso {course_id}",
+                f"Cuota mensual {label.lower()} - Curso {course_id}",
+                monto, fecha_limite, 1, CREATED_BY, layout.now,
+            )
+
+
+GENERATORS = {
+    'personas': generate_personas,
+    'usuarios_auth': generate_usuarios_auth,
+    'persona_roles': generate_persona_roles,
+    'cursos': generate_cursos,
+    'alumnos': generate_alumnos,
+    'cuotas': generate_cuotas,
+    'cobros': generate_cobros,
+    'pagos': generate_pagos,
+    'deudas_alumnos': generate_deudas_alumnos,
+    'movimientos_ccaa': generate_movimientos_ccaa,
+    'movimientos_ccpp': generate_movimientos_ccpp,
+}
+
+# Tablas financieras por bloques de columnas, para escribir el TSV de LOAD DATA sin pasar por filas
+BLOCK_GENERATORS = {
+    'pagos': pagos_blocks,
+    'deudas_alumnos': deudas_alumnos_blocks,
+    'movimientos_ccaa': movimientos_ccaa_blocks,
+    'movimientos_ccpp': movimientos_ccpp_blocks,
+} if np is not None else {}
+
+
+def schema_plan(catalog):
+    """
+    Derivar del catálogo las tablas a cargar (en orden de llaves foráneas) y,
+    para cada una, las columnas del generador que existen en la base de datos
+    junto con las reglas de validación de esas columnas.
+    """
+    plan = {}
+    for table in catalog.topological_order(TABLE_ORDER):
+        columns = catalog.insert_columns(table, COLUMNS[table])
+        missing = catalog.missing_required(table, columns)
+        if missing:
+            print(f"⚠️ {table}: columnas obligatorias sin valor generado: {', '.join(missing)}")
+        indices = [COLUMNS[table].index(column) for column in columns]
+        plan[table] = TablePlan(table, columns, indices, catalog.validation_rules(table, columns),
+                                len(COLUMNS[table]))
+    for table in TABLE_ORDER:
+        if table not in plan:
+            print(f"⚠️ Tabla '{table}' no existe, saltando...")
+    return plan
+
+
+def open_journal(config):
+    """
+    Con --resume y un diario existente, devolver el diario y el estado del
+    dataset a reanudar; si no, (None, None).
+    """
+    if not (config.resume and config.journal_path):
+        return None, None
+    if not os.path.exists(config.journal_path):
+        print(f"⚠️ No existe el diario {config.journal_path}, se inicia una carga nueva")
+        return None, None
+    journal = Journal.open(config.journal_path)
+    mismatches = journal.mismatches(asdict(config))
+    if mismatches:
+        raise ValueError(f"Los parámetros no coinciden con la corrida a reanudar: {', '.join(mismatches)}")
+    print(f"⏯️ Reanudando desde el diario {config.journal_path}")
+    return journal, journal.state()
+
+
+def populate_scale(cursor, connection, config, catalog, db_config=None, pool=None, metrics=None):
+    """
+    Poblar la base de datos en modo escala. La carga paralela y la asíncrona
+    abren sus conexiones con db_config, o desde pool si se entrega. Las
+    tablas y etapas se miden en metrics.
+    """
+    if pool is None and db_config:
+        pool = ConnectionPool(db_config)
+    if metrics is None:
+        metrics = RunMetrics()
+    print("\n🏫 MODO ESCALA: GENERANDO DATASET PARAMETRIZADO")
+    print("=" * 60)
+    print(f"📚 Cursos: {config.courses} | 👦 Alumnos por curso: ~{config.students_per_course}"
+          f" | 📅 Meses: {config.months}")
+
+    run_started = time.perf_counter()
+    plan = schema_plan(catalog)
+    journal, state = open_journal(config)
+    if state:
+        id_bases = state['id_bases']
+        rut_index = None
+    else:
+        id_bases = get_id_bases(cursor, catalog)
+        rut_index = RutIndex.load(cursor, catalog)
+        if rut_index.count:
+            print(f"🆔 {rut_index.count} RUT existentes en personas se omitirán al asignar")
+    geo = GeoIndex.load(cursor, catalog, poblacion_path=config.poblacion_comunas)
+    layout = ScaleLayout(config, id_bases, (), rut_index, geo, state)
+    print(f"👨‍👩‍👧 {layout.family_count} apoderados, {layout.student_count} alumnos")
+    layout.graph.report()
+
+    cache = None
+    fingerprint = None
+    if config.seed is not None:
+        fingerprint = dataset_fingerprint(config, layout)
+        print(f"🧬 Semilla {config.seed}, huella del dataset: {fingerprint}")
+        if config.snapshot_dir and not state and snapshot_exists(config.snapshot_dir, fingerprint):
+            with metrics.step('restaurar_snapshot'):
+                restored = restore_snapshot(cursor, connection, catalog, config.snapshot_dir, fingerprint,
+                                            bulk=local_infile_enabled(cursor), batch_size=config.batch_size,
+                                            replace_tables=config.snapshot_replace_tables)
+            if restored is not None:
+                return layout
+        if config.cache_dir:
+            cache = DatasetCache(config.cache_dir, fingerprint)
+            print(f"🗄️ Caché de dataset: {cache.directory}")
+    elif config.snapshot_dir:
+        print("⚠️ Los snapshots requieren --seed; no se guardará ni restaurará snapshot")
+
+    if config.journal_path and journal is None:
+        journal = Journal.create(config.journal_path, asdict(config), layout)
+        print(f"💾 Diario de avance: {config.journal_path} (COMMIT cada {config.commit_every} lotes)")
+
+    with metrics.step('hashes'):
+        layout.hashes = password_hashes(config.password, config.bcrypt_rounds, config.hash_pool_size,
+                                        seed=config.seed)
+    print(f"🔑 {len(layout.hashes)} hashes bcrypt (costo {config.bcrypt_rounds}) en "
+          f"{metrics.steps['hashes']['wall_seconds']:.1f}s")
+
+    dropped = None
+    if config.drop_indexes:
+        dropped = drop_secondary_indexes(cursor, catalog, list(plan))
+
+    bulk_available = bool(config.bulk_tables) and local_infile_enabled(cursor)
+    if config.bulk_tables and not bulk_available:
+        print("⚠️ El servidor no permite LOCAL INFILE, se usarán INSERT por lotes")
+    bulk_tables = config.bulk_tables if bulk_available else ()
+
+    max_bytes = config.max_memory_mb * 1024 * 1024 if config.max_memory_mb else None
+    if config.workers > 1 and pool:
+        phases = [[table for table in phase if table in plan] for phase in PHASES]
+        total = run_parallel(pool, layout, GENERATORS, plan,
+                             [phase for phase in phases if phase],
+                             config.workers, config.batch_size, bulk_tables, max_bytes, cache,
+                             journal, config.commit_every, metrics, BLOCK_GENERATORS)
+    else:
+        progress = Progress(config.progress)
+        rejected = {}
+        try:
+            if config.async_connections and pool:
+                print(f"⚡ Carga asíncrona con {config.async_connections} conexiones por tabla")
+                inserter = BatchInserter(cursor, batch_size=config.batch_size, max_bytes=max_bytes,
+                                         progress=progress)
+                generators = {table: (lambda table=table: GENERATORS[table](layout)) for table in plan}
+                block_generators = {table: (lambda table=table: BLOCK_GENERATORS[table](layout))
+                                    for table in plan if table in BLOCK_GENERATORS}
+                run_async(pool, config.async_connections, connection, cursor, inserter, plan, generators,
+                          bulk_tables, bool(bulk_tables), rejected, cache, journal, config.commit_every,
+                          block_generators)
+            else:
+                checkpoint = Checkpointer(connection, journal, config.commit_every)
+                inserter = BatchInserter(cursor, batch_size=config.batch_size, max_bytes=max_bytes,
+                                         checkpoint=checkpoint, progress=progress)
+                for table, table_plan in plan.items():
+                    generate_blocks = ((lambda table=table: BLOCK_GENERATORS[table](layout))
+                                       if table in BLOCK_GENERATORS else None)
+                    bulk_available = run_table(cursor, inserter, table_plan,
+                                               lambda table=table: GENERATORS[table](layout),
+                                               bulk_tables, bulk_available, rejected, cache,
+                                               checkpoint=checkpoint, generate_blocks=generate_blocks)
+                    connection.commit()
+        finally:
+            progress.close()
+        metrics.add_tables(inserter.stats)
+        report_rejected(rejected)
+        total = sum(stats.rows for stats in inserter.stats.values())
+
+    if dropped:
+        print(f"\n🔺 Reconstruyendo índices de {len(dropped)} tablas ({config.index_workers} en paralelo)")
+        with metrics.step('reconstruir_indices'):
+            seconds = rebuild_secondary_indexes(pool, dropped, index_state_path(catalog.database),
+                                                config.index_workers, cursor=cursor)
+        for table, elapsed in seconds.items():
+            metrics.add_step(f"reconstruir_indices:{table}", elapsed)
+
+    metrics.report()
+    if dropped:
+        report_rebuild(dropped, seconds, metrics)
+    print(f"\n🎯 TOTAL DE REGISTROS GENERADOS: {total}")
+    report_memory()
+    if journal:
+        journal.discard()
+
+    if fingerprint and config.snapshot_dir:
+        with metrics.step('guardar_snapshot'):
+            save_snapshot(cursor, catalog, list(plan), config.snapshot_dir, fingerprint,
+                          time.perf_counter() - run_started)
+    return layout
+
+
+def dump_scale(config, directory, file_mb=DEFAULT_FILE_MB, metrics=None):
+    """
+    Generar el dataset del modo escala como volcado SQL en directory sin
+    conectarse a ninguna base de datos: ids desde 1, sin RUT existentes que
+    evitar y comunas desde el script SQL de geografía. Los mismos
+    generadores alimentan la carga en vivo.
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+    print("\n💾 MODO VOLCADO: GENERANDO DATASET COMO ARCHIVOS SQL")
+    print("=" * 60)
+    print(f"📚 Cursos: {config.courses} | 👦 Alumnos por curso: ~{config.students_per_course}"
+          f" | 📅 Meses: {config.months}")
+
+    catalog = SchemaCatalog.from_columns(None, {table: COLUMNS[table] for table in TABLE_ORDER})
+    plan = schema_plan(catalog)
+    geo = GeoIndex.load(None, catalog, poblacion_path=config.poblacion_comunas)
+    layout = ScaleLayout(config, {table: 0 for table in ID_TABLES}, (), geo=geo)
+    print(f"👨‍👩‍👧 {layout.family_count} apoderados, {layout.student_count} alumnos")
+    layout.graph.report()
+    if config.seed is not None:
+        print(f"🧬 Semilla {config.seed}, huella del dataset: {dataset_fingerprint(config, layout)}")
+
+    with metrics.step('hashes'):
+        layout.hashes = password_hashes(config.password, config.bcrypt_rounds, config.hash_pool_size,
+                                        seed=config.seed)
+    print(f"🔑 {len(layout.hashes)} hashes bcrypt (costo {config.bcrypt_rounds}) en "
+          f"{metrics.steps['hashes']['wall_seconds']:.1f}s")
+
+    max_bytes = config.max_memory_mb * 1024 * 1024 if config.max_memory_mb else None
+    sink = DumpSink(directory, list(plan), file_mb * 1024 * 1024)
+    progress = Progress(config.progress)
+    inserter = BatchInserter(None, batch_size=config.batch_size, max_bytes=max_bytes, progress=progress,
+                             sink=sink)
+    rejected = {}
+    try:
+        for table, table_plan in plan.items():
+            run_table(None, inserter, table_plan, lambda table=table: GENERATORS[table](layout),
+                      rejected=rejected)
+    finally:
+        progress.close()
+        sink.close()
+    metrics.add_tables(inserter.stats)
+    report_rejected(rejected)
+
+    metrics.report()
+    total = sum(stats.rows for stats in inserter.stats.values())
+    print(f"\n🎯 TOTAL DE REGISTROS GENERADOS: {total} en {len(sink.file_names)} archivos")
+    print(f"📁 {os.path.abspath(directory)}")
+    print(f"📥 Cargar con: cat {os.path.join(directory, '*.sql.gz')} | gunzip | mysql <base_de_datos>")
+    report_memory()
+    return layout
@@ -0,0 +1,161 @@
+"""
+Catálogo del esquema leído una sola vez desde information_schema: tablas,
+columnas, llaves foráneas e índices, y orden topológico por llaves foráneas.
+"""
+
+
+class SchemaCatalog:
+    """Estructura de la base de datos consultada en una sola pasada"""
+
+    def __init__(self, database):
+        self.database = database
+        self.tables = {}
+        self.columns = {}
+        self.foreign_keys = {}
+        self.indexes = {}
+
+    @classmethod
+    def load(cls, cursor, database):
+        """Leer tablas, columnas, llaves foráneas e índices del esquema"""
+        catalog = cls(database)
+
+        cursor.execute("""
+            SELECT TABLE_NAME, ENGINE, TABLE_ROWS
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_NAME
+        """, (database,))
+        for name, engine, table_rows in cursor.fetchall():
+            catalog.tables[name] = {'engine': engine, 'rows': int(table_rows or 0)}
+            catalog.columns[name] = {}
+            catalog.foreign_keys[name] = []
+            catalog.indexes[name] = {}
+
+        cursor.execute("""
+            SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, IS_NULLABLE,
+                   COLUMN_DEFAULT, EXTRA, COLUMN_KEY, CHARACTER_MAXIMUM_LENGTH
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, (database,))
+        for (table, name, data_type, column_type, nullable, default, extra, key,
+             max_length) in cursor.fetchall():
+            if table not in catalog.columns:
+                continue
+            catalog.columns[table][name] = {
+                'data_type': data_type,
+                'column_type': column_type,
+                'nullable': nullable == 'YES',
+                'default': default,
+                'extra': extra or '',
+                'key': key or '',
+                'max_length': int(max_length) if max_length else None,
+            }
+
+        cursor.execute("""
+            SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME,
+                   REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+            FROM information_schema.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+            ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+        """, (database,))
+        for table, constraint, column, ref_table, ref_column in cursor.fetchall():
+            if table in catalog.foreign_keys:
+                catalog.foreign_keys[table].append({
+                    'name': constraint,
+                    'column': column,
+                    'ref_table': ref_table,
+                    'ref_column': ref_column,
+                })
+
+        cursor.execute("""
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME, SUB_PART, INDEX_TYPE
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, (database,))
+        for table, index, non_unique, column, sub_part, index_type in cursor.fetchall():
+            if table not in catalog.indexes:
+                continue
+            entry = catalog.indexes[table].setdefault(index, {
+                'unique': not int(non_unique),
+                'type': index_type,
+                'columns': [],
+            })
+            entry['columns'].append((column, sub_part))
+
+        return catalog
+
+    @classmethod
+    def from_columns(cls, database, columns):
+        """
+        Catálogo sin conexión desde {tabla: columnas}, en ese orden: columnas
+        anulables y sin llaves foráneas ni índices.
+        """
+        catalog = cls(database)
+        for table, names in columns.items():
+            catalog.tables[table] = {'engine': 'InnoDB', 'rows': 0}
+            catalog.columns[table] = {
+                name: {'data_type': None, 'column_type': None, 'nullable': True, 'default': None,
+                       'extra': '', 'key': '', 'max_length': None}
+                for name in names
+            }
+            catalog.foreign_keys[table] = []
+            catalog.indexes[table] = {}
+        return catalog
+
+    @property
+    def table_names(self):
+        return list(self.tables)
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def column_names(self, table):
+        return list(self.columns.get(table, {}))
+
+    def insert_columns(self, table, wanted):
+        """Columnas de wanted que existen en la tabla, en el mismo orden"""
+        existing = self.columns.get(table, {})
+        return [column for column in wanted if column in existing]
+
+    def validation_rules(self, table, columns):
+        """Reglas por posición: [(posición, NOT NULL, largo máximo)]"""
+        rules = []
+        for position, name in enumerate(columns):
+            column = self.columns[table][name]
+            required = not column['nullable'] and 'auto_increment' not in column['extra']
+            if required or column.get('max_length'):
+                rules.append((position, required, column.get('max_length')))
+        return rules
+
+    def missing_required(self, table, provided):
+        """Columnas NOT NULL sin default ni auto_increment que no se entregan"""
+        return [
+            name for name, column in self.columns.get(table, {}).items()
+            if name not in provided and not column['nullable'] and column['default'] is None
+            and 'auto_increment' not in column['extra']
+        ]
+
+    def topological_order(self, tables=None):
+        """Ordenar tablas de modo que cada una vaya después de las que referencia"""
+        tables = [table for table in (tables or self.table_names) if table in self.tables]
+        selected = set(tables)
+        dependencies = {
+            table: {fk['ref_table'] for fk in self.foreign_keys[table]
+                    if fk['ref_table'] in selected and fk['ref_table'] != table}
+            for table in tables
+        }
+
+        ordered = []
+        done = set()
+        while len(ordered) < len(tables):
+            ready = [table for table in tables
+                     if table not in done and dependencies[table] <= done]
+            if not ready:
+                # Ciclo de llaves foráneas: se agrega el resto en el orden original
+                ready = [table for table in tables if table not in done]
+            for table in ready:
+                ordered.append(table)
+                done.add(table)
+        return ordered
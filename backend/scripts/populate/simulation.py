@@ -0,0 +1,417 @@
+"""
+Simulación continua de un año escolar sobre los datos demo ya cargados: un
+reloj simulado comprimido abre cada mes (cuotas, cobros y deudas
+pendientes por alumno) y hace llegar los pagos con picos cerca de
+fecha_limite_pago; cada pago agrega sus movimientos en las cuentas de
+alumno y apoderado y salda la deuda. Sirve para probar el backend bajo
+escritura sostenida e informa las escrituras por segundo logradas.
+"""
+
+import calendar
+import heapq
+import random
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from .finance import (
+    CREATED_BY, ESTADO_PAGO_FALLIDO, ESTADO_PAGO_PAGADO, METODOS_PAGO, NOMBRES_MES,
+    PaymentDistribution, monto_cuota,
+)
+from .metrics import Progress, RunMetrics
+from .pipeline import prepare_rows, report_rejected
+from .scale import get_id_bases, schema_plan
+from .streams import stream_key, uniform
+from .writer import BatchInserter
+
+# Flujo de la simulación y sorteos dentro de él
+STREAM_SIMULACION = 6
+DRAW_PERFIL = 0
+DRAW_METODO = 1
+DRAW_PAGA = 2
+DRAW_DIAS = 3
+DRAW_CERCANIA = 4
+DRAW_FRACCION = 5
+DRAW_HORA = 6
+DRAW_MINUTO = 7
+DRAW_FALLA = 8
+
+# Meses en que se cobra (marzo a diciembre)
+MESES_COBRO = range(3, 13)
+
+# Deudas ya vencidas hace más de estos días no se consideran al iniciar
+PENDING_WINDOW_DAYS = 90
+
+# Espera máxima cuando no hay eventos vencidos en el reloj simulado
+MAX_IDLE_SLEEP = 0.5
+
+# Tipos de evento del reloj simulado (el mes se procesa antes que los pagos del mismo instante)
+EVENT_MES = 0
+EVENT_PAGO = 1
+
+REQUIRED_TABLES = ('cursos', 'alumnos', 'cuotas', 'pagos')
+
+
+@dataclass
+class SimulationConfig:
+    """Parámetros del modo simulación"""
+    duration: float = 60.0          # segundos reales
+    days_per_second: float = 1.0    # días simulados por segundo real
+    start: date = None              # por defecto, el día siguiente al último vencimiento demo (o hoy)
+    max_rate: float = None          # tope de escrituras por segundo
+    batch_size: int = 500
+    seed: int = None
+    distribution: PaymentDistribution = field(default_factory=PaymentDistribution)
+    progress: bool = True
+
+
+@dataclass
+class Debt:
+    """Deuda de un alumno por el cobro de un mes, a la espera de su pago"""
+    alumno_id: int
+    cobro_id: int
+    cuota_id: int
+    rut: str
+    monto: float
+    fecha_limite: date
+
+
+def last_day(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def next_month(day):
+    """Primer día del mes siguiente a day"""
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def month_label(day):
+    return f"{NOMBRES_MES[day.month - 1]} {day.year}"
+
+
+def debt_update_statement(updates):
+    """
+    Un solo UPDATE para un lote de (estado, monto_adeudado, cobro_id,
+    alumno_id), unido a las deudas por cobro y alumno. Va por cursor.execute,
+    así que se reintenta y se repite con la transacción como cualquier lote.
+    """
+    select = "SELECT %s AS estado, %s AS monto_adeudado, %s AS cobro_id, %s AS alumno_id"
+    query = (
+        "UPDATE deudas_alumnos d JOIN ("
+        + " UNION ALL ".join([select] * len(updates))
+        # cobro_id tiene índice (llave foránea): cada fila revisa solo las deudas de ese cobro
+        + ") u ON d.cobro_id = u.cobro_id AND d.alumno_id = u.alumno_id "
+        "SET d.estado = u.estado, d.monto_adeudado = u.monto_adeudado"
+    )
+    return query, [value for update in updates for value in update]
+
+
+class SchoolYearSimulation:
+    """
+    Cursos, alumnos y deudas demo en memoria y una cola de eventos ordenada
+    por momento simulado. Cada vuelta procesa los eventos ya vencidos según
+    el reloj, los escribe en una transacción y mide las escrituras.
+    """
+
+    def __init__(self, cursor, connection, catalog, config, metrics=None):
+        self.cursor = cursor
+        self.connection = connection
+        self.catalog = catalog
+        self.config = config
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.seed = config.seed if config.seed is not None else random.randrange(2 ** 24)
+        self.plan = schema_plan(catalog)
+        self.inserter = BatchInserter(cursor, batch_size=config.batch_size)
+        self.rejected = {}
+        self.events = []
+        self.sequence = 0
+        self.draws = 0
+        self.courses = {}
+        self.students = {}
+        self.cuota_ids = {}
+        self.id_bases = {}
+        self.start = None
+        self.rows = {}
+        self.updates = []
+        self.family_payments = {}
+        self.counts = {'meses': 0, 'deudas': 0, 'pagos': 0, 'fallidos': 0, 'saldadas': 0}
+
+    def load(self):
+        """Leer cursos, alumnos, cuotas y deudas pendientes demo de la base de datos"""
+        self.cursor.execute("SELECT id, nivel_id FROM cursos WHERE creado_por = %s ORDER BY id", (CREATED_BY,))
+        self.courses = {int(course_id): int(nivel or 1) for course_id, nivel in self.cursor.fetchall()}
+        self.cursor.execute(
+            "SELECT id, curso_id, apoderado_id FROM alumnos WHERE creado_por = %s ORDER BY id", (CREATED_BY,))
+        for alumno_id, curso_id, rut in self.cursor.fetchall():
+            if int(curso_id) in self.courses:
+                self.students.setdefault(int(curso_id), []).append((int(alumno_id), str(rut)))
+        self.cursor.execute("""
+            SELECT q.id, q.curso_id, q.fecha_limite_pago FROM cuotas q
+            JOIN cursos c ON c.id = q.curso_id WHERE c.creado_por = %s
+        """, (CREATED_BY,))
+        for cuota_id, curso_id, fecha in self.cursor.fetchall():
+            self.cuota_ids[(int(curso_id), _as_date(fecha))] = int(cuota_id)
+        self.id_bases = get_id_bases(self.cursor, self.catalog)
+        self.start = self.config.start or self._default_start()
+        if self.catalog.has_table('deudas_alumnos') and self.catalog.has_table('cobros'):
+            self._load_pending()
+
+    def _default_start(self):
+        """Día siguiente al último vencimiento demo, sin pasar de hoy"""
+        if not self.catalog.has_table('cobros'):
+            return date.today()
+        self.cursor.execute("SELECT MAX(fecha_vencimiento) FROM cobros WHERE creado_por = %s", (CREATED_BY,))
+        row = self.cursor.fetchone()
+        if not row or row[0] is None:
+            return date.today()
+        return min(date.today(), _as_date(row[0]) + timedelta(days=1))
+
+    def _load_pending(self):
+        """Programar el pago de las deudas demo pendientes que vencieron hace poco"""
+        alumnos = {alumno_id: rut for students in self.students.values() for alumno_id, rut in students}
+        self.cursor.execute("""
+            SELECT d.alumno_id, d.cobro_id, d.monto_adeudado, c.curso_id, c.fecha_vencimiento
+            FROM deudas_alumnos d JOIN cobros c ON c.id = d.cobro_id
+            WHERE d.creado_por = %s AND d.estado IN ('pendiente', 'parcialmente_pagado')
+              AND c.fecha_vencimiento >= %s
+            ORDER BY d.cobro_id, d.alumno_id
+        """, (CREATED_BY, self.start - timedelta(days=PENDING_WINDOW_DAYS)))
+        while True:
+            rows = self.cursor.fetchmany(self.config.batch_size)
+            if not rows:
+                break
+            for alumno_id, cobro_id, monto, curso_id, fecha in rows:
+                fecha = _as_date(fecha)
+                cuota_id = self.cuota_ids.get((int(curso_id), fecha))
+                rut = alumnos.get(int(alumno_id))
+                if cuota_id is None or rut is None:
+                    continue
+                self._schedule_payment(Debt(int(alumno_id), int(cobro_id), cuota_id, rut, float(monto), fecha))
+
+    def _push(self, moment, kind, data):
+        self.sequence += 1
+        heapq.heappush(self.events, (moment, kind, self.sequence, data))
+
+    def _uniform(self, draw, index):
+        return uniform(stream_key(self.seed, STREAM_SIMULACION, draw), index)
+
+    def _profile(self, rut):
+        """Perfil de pago estable por apoderado"""
+        profiles = self.config.distribution.profiles
+        target = self._uniform(DRAW_PERFIL, zlib.crc32(rut.encode('utf-8'))) * sum(profile.weight for profile in profiles)
+        for profile in profiles:
+            target -= profile.weight
+            if target < 0:
+                return profile
+        return profiles[-1]
+
+    def _schedule_payment(self, debt):
+        """
+        Sortear si la deuda se paga y cuándo. Los días respecto del
+        vencimiento se acercan al día más próximo a fecha_limite_pago dentro
+        del rango del perfil, así los pagos se concentran cerca del plazo.
+        """
+        self.draws += 1
+        event = self.draws
+        distribution = self.config.distribution
+        profile = self._profile(debt.rut)
+        probability = profile.pay_probability * distribution.seasonality.get(debt.fecha_limite.month, 1.0)
+        if self._uniform(DRAW_PAGA, event) >= probability:
+            return
+        dias_min, dias_max = profile.days
+        anchor = min(max(0, dias_min), dias_max)
+        dias = dias_min + self._uniform(DRAW_DIAS, event) * (dias_max - dias_min)
+        dias = anchor + (dias - anchor) * self._uniform(DRAW_CERCANIA, event)
+        hora = 8 + int(self._uniform(DRAW_HORA, event) * 15)
+        minuto = int(self._uniform(DRAW_MINUTO, event) * 60)
+        moment = datetime.combine(debt.fecha_limite + timedelta(days=round(dias)), datetime.min.time()) \
+            + timedelta(hours=hora, minutes=minuto)
+        if moment.date() < self.start:
+            return
+        fraccion_min, fraccion_max = profile.fraction
+        fraccion = fraccion_min + self._uniform(DRAW_FRACCION, event) * (fraccion_max - fraccion_min)
+        monto = min(debt.monto, float(round(debt.monto * fraccion / 500) * 500) or debt.monto)
+        falla = self._uniform(DRAW_FALLA, event) < distribution.failure_probability
+        self._push(moment, EVENT_PAGO, (debt, monto, falla, event))
+
+    def _add(self, table, row):
+        if table in self.plan:
+            self.rows.setdefault(table, []).append(row)
+
+    def _open_month(self, moment):
+        """Cuota, cobro y deudas pendientes del mes en cada curso; programar el mes siguiente"""
+        day = moment.date()
+        self._push(datetime.combine(next_month(day), datetime.min.time()), EVENT_MES, None)
+        if day.month not in MESES_COBRO:
+            return
+        self.counts['meses'] += 1
+        fecha_limite = last_day(day.year, day.month)
+        label = month_label(day)
+        for curso_id, nivel in self.courses.items():
+            monto = monto_cuota(nivel)
+            self.id_bases['cuotas'] += 1
+            self.id_bases['cobros'] += 1
+            cuota_id = self.id_bases['cuotas']
+            cobro_id = self.id_bases['cobros']
+            self.cuota_ids[(curso_id, fecha_limite)] = cuota_id
+            self._add('cuotas', (cuota_id, curso_id, f"Cuota Mensual {label} - Curso {curso_id}",
+                                 monto, fecha_limite, moment))
+            self._add('cobros', (cobro_id, curso_id, f"Cobro Mensual {label} - Curso {curso_id}",
+                                 f"Cuota mensual {label.lower()} - Curso {curso_id}",
+                                 monto, fecha_limite, 1, CREATED_BY, moment))
+            for alumno_id, rut in self.students.get(curso_id, ()):
+                self._add('deudas_alumnos', (alumno_id, cobro_id, monto, 'pendiente', CREATED_BY, moment))
+                self.counts['deudas'] += 1
+                self._schedule_payment(Debt(alumno_id, cobro_id, cuota_id, rut, monto, fecha_limite))
+
+    def _pay(self, moment, debt, monto, falla, event):
+        """Pago de una deuda: pago, movimientos de ambas cuentas y deuda saldada"""
+        metodo = METODOS_PAGO[int(self._uniform(DRAW_METODO, event) * len(METODOS_PAGO))]
+        estado = ESTADO_PAGO_FALLIDO if falla else ESTADO_PAGO_PAGADO
+        self._add('pagos', (monto, metodo, debt.cuota_id, debt.alumno_id, debt.rut, moment, estado,
+                            f"DEMO_SIM_{debt.alumno_id}_{debt.cuota_id}_{event}"))
+        if falla:
+            self.counts['fallidos'] += 1
+            return
+        self.counts['pagos'] += 1
+        label = month_label(debt.fecha_limite)
+        self._add('movimientos_ccaa', (debt.alumno_id, 'PAGO', monto, f"Pago {label} - Alumno {debt.alumno_id}",
+                                       moment, CREATED_BY, moment))
+        if 'movimientos_ccpp' in self.plan:
+            # Como en el modo escala: un movimiento por apoderado y mes cobrado
+            entry = self.family_payments.setdefault((debt.rut, debt.fecha_limite), [0.0, 0, moment])
+            entry[0] += monto
+            entry[1] += 1
+            entry[2] = max(entry[2], moment)
+        restante = debt.monto - monto
+        if 'deudas_alumnos' in self.plan:
+            self.updates.append(('parcialmente_pagado' if restante > 0 else 'pagado', restante,
+                                 debt.cobro_id, debt.alumno_id))
+        if restante <= 0:
+            self.counts['saldadas'] += 1
+
+    def _group_family_payments(self):
+        """Movimientos de cuenta de los apoderados con los pagos de la vuelta, agrupados por mes"""
+        for (rut, fecha_limite), (total, cantidad, moment) in self.family_payments.items():
+            self._add('movimientos_ccpp', (rut, 'PAGO_MULTIPLE' if cantidad > 1 else 'PAGO', total,
+                                           f"Pago cuotas {cantidad} hijo(s) - {month_label(fecha_limite)}",
+                                           moment, CREATED_BY, moment))
+        self.family_payments = {}
+
+    def _write(self):
+        """Escribir lo acumulado en una transacción; devuelve las filas escritas"""
+        self._group_family_payments()
+        before = sum(stats.rows for stats in self.inserter.stats.values())
+        for table, table_plan in self.plan.items():
+            rows = self.rows.pop(table, None)
+            if rows:
+                self.inserter.insert_many(table, table_plan.columns, prepare_rows(table_plan, rows, self.rejected))
+        written = sum(stats.rows for stats in self.inserter.stats.values()) - before
+        if self.updates:
+            started = time.perf_counter()
+            # Una deuda pagada dos veces en la vuelta queda con su último estado
+            updates = list({update[2:]: update for update in self.updates}.values())
+            for start in range(0, len(updates), self.inserter.batch_size):
+                query, params = debt_update_statement(updates[start:start + self.inserter.batch_size])
+                self.cursor.execute(query, params)
+            self.metrics.record('deudas_alumnos (UPDATE)', len(updates), time.perf_counter() - started)
+            written += len(updates)
+            self.updates = []
+        self.connection.commit()
+        return written
+
+    def run(self):
+        """Avanzar el reloj simulado durante config.duration segundos reales"""
+        config = self.config
+        speed = config.days_per_second * 86400
+        origin = datetime.combine(self.start, datetime.min.time())
+        first_month = self.start if self.start.day == 1 else next_month(self.start)
+        self._push(datetime.combine(first_month, datetime.min.time()), EVENT_MES, None)
+
+        progress = Progress(config.progress)
+        per_second = []
+        written = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                elapsed = time.perf_counter() - started
+                if elapsed >= config.duration:
+                    break
+                clock = origin + timedelta(seconds=elapsed * speed)
+                while self.events and self.events[0][0] <= clock:
+                    moment, kind, _, data = heapq.heappop(self.events)
+                    if kind == EVENT_MES:
+                        self._open_month(moment)
+                    else:
+                        self._pay(moment, *data)
+                if self.rows or self.updates or self.family_payments:
+                    count = self._write()
+                    written += count
+                    second = int(time.perf_counter() - started)
+                    per_second.extend([0] * (second + 1 - len(per_second)))
+                    per_second[min(second, len(per_second) - 1)] += count
+                    progress.advance(f"{clock:%Y-%m-%d %H:%M}", count)
+                    if config.max_rate:
+                        ahead = written / config.max_rate - (time.perf_counter() - started)
+                        if ahead > 0:
+                            time.sleep(min(ahead, config.duration - elapsed))
+                    continue
+                wait = MAX_IDLE_SLEEP
+                if self.events:
+                    wait = min(wait, (self.events[0][0] - clock).total_seconds() / speed)
+                time.sleep(max(0.0, min(wait, config.duration - elapsed)))
+        finally:
+            progress.close()
+            self.metrics.add_tables(self.inserter.stats)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'written': written,
+            'seconds': elapsed,
+            'simulated_from': origin,
+            'simulated_to': origin + timedelta(seconds=elapsed * speed),
+            # Al menos un segundo, aunque la corrida no haya escrito nada
+            'per_second': per_second[:max(1, int(elapsed))] or [0],
+        }
+
+    def report(self, result):
+        """Mostrar el período simulado, la actividad y las escrituras por segundo"""
+        per_second = sorted(result['per_second'])
+        rate = result['written'] / result['seconds'] if result['seconds'] else 0.0
+        print("\n📆 SIMULACIÓN DE AÑO ESCOLAR")
+        print("=" * 60)
+        print(f"🕰️ Reloj simulado: {result['simulated_from']:%Y-%m-%d} → {result['simulated_to']:%Y-%m-%d %H:%M} "
+              f"en {result['seconds']:.1f}s ({self.config.days_per_second:g} días/s)")
+        print(f"🧾 {self.counts['meses']} meses abiertos en {len(self.courses)} cursos, "
+              f"{self.counts['deudas']} deudas nuevas")
+        print(f"💳 {self.counts['pagos']} pagos ({self.counts['fallidos']} fallidos), "
+              f"{self.counts['saldadas']} deudas saldadas")
+        for table, stats in self.inserter.stats.items():
+            print(f"📦 {table}: {stats.rows:,} filas")
+        print(f"✍️ {result['written']:,} escrituras: {rate:,.1f}/s sostenidas, "
+              f"mediana {per_second[len(per_second) // 2]:,}/s, máximo {per_second[-1]:,}/s")
+        report_rejected(self.rejected)
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def run_simulation(cursor, connection, catalog, config, metrics=None):
+    """Cargar el estado demo y simular el año escolar durante config.duration segundos"""
+    missing = [table for table in REQUIRED_TABLES if not catalog.has_table(table)]
+    if missing:
+        print(f"⚠️ Faltan tablas para simular: {', '.join(missing)}")
+        return None
+    simulation = SchoolYearSimulation(cursor, connection, catalog, config, metrics)
+    simulation.load()
+    if not simulation.courses:
+        print("⚠️ No hay cursos demo (creado_por = DEMO_SYSTEM) sobre los que simular")
+        return None
+    print(f"\n📆 Simulando desde {simulation.start} con {len(simulation.courses)} cursos y "
+          f"{sum(len(students) for students in simulation.students.values())} alumnos durante "
+          f"{config.duration:g}s ({config.days_per_second:g} días simulados por segundo)")
+    result = simulation.run()
+    simulation.report(result)
+    return result
@@ -0,0 +1,196 @@
+"""
+Snapshots de bases pobladas: las filas demo de cada tabla (las mismas que
+reconoce la purga) se guardan en trozos TSV comprimidos con gzip junto a su
+CREATE TABLE, bajo la huella del dataset. Restaurar un snapshot evita volver
+a generar los datos sin tocar las filas que no son demo; recrear las tablas
+completas exige --snapshot-replace-tables y confirmación.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from .bulk import load_data_infile, read_tsv, session_settings, write_tsv
+from .finance import CREATED_BY
+from .purge import DEMO_FILTERS, purge_demo_data
+from .writer import BatchInserter
+
+MANIFEST = 'manifest.json'
+SCHEMA = 'schema.sql'
+CHUNK_ROWS = 200000
+FETCH_ROWS = 10000
+COMPRESS_LEVEL = 1
+
+
+def snapshot_path(root, fingerprint):
+    """Directorio del snapshot de un dataset"""
+    return os.path.join(root, fingerprint)
+
+
+def snapshot_exists(root, fingerprint):
+    """Un snapshot existe si su manifiesto quedó escrito"""
+    return os.path.exists(os.path.join(snapshot_path(root, fingerprint), MANIFEST))
+
+
+def snapshot_columns(catalog, table):
+    """Columnas que se pueden volver a cargar (excluye columnas generadas)"""
+    return [name for name, column in catalog.columns[table].items()
+            if 'GENERATED' not in column['extra'].upper()]
+
+
+def confirm_replace(database, tables):
+    """Pedir que se escriba el nombre de la base antes de recrear sus tablas"""
+    print(f"⚠️ Se eliminarán y recrearán {len(tables)} tablas de {database} "
+          f"({', '.join(tables)}), incluidas sus filas que no son demo")
+    if not sys.stdin.isatty():
+        print("❌ --snapshot-replace-tables requiere confirmar desde una terminal")
+        return False
+    answer = input(f"Escribe el nombre de la base ({database}) para confirmar: ")
+    return answer.strip() == database
+
+
+def save_snapshot(cursor, catalog, tables, root, fingerprint, generation_seconds=None):
+    """Guardar las filas demo de las tablas en un snapshot"""
+    directory = snapshot_path(root, fingerprint)
+    partial = f"{directory}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+
+    print(f"\n📸 GUARDANDO SNAPSHOT {fingerprint}")
+    print("=" * 60)
+    started = time.perf_counter()
+    manifest = {
+        'fingerprint': fingerprint,
+        'database': catalog.database,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'generation_seconds': generation_seconds,
+        'demo_only': True,
+        'tables': [],
+    }
+
+    schema = []
+    for table in tables:
+        where = DEMO_FILTERS.get(table)
+        if where is None:
+            print(f"⚠️ {table}: sin filtro de filas demo, no se incluye en el snapshot")
+            continue
+        cursor.execute(f"SHOW CREATE TABLE {table}")
+        schema.append(cursor.fetchone()[1] + ';')
+
+        columns = snapshot_columns(catalog, table)
+        primary = [column for column, _ in catalog.indexes[table].get('PRIMARY', {}).get('columns', [])]
+        order = f" ORDER BY {', '.join(primary)}" if primary else ''
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {where}{order}",
+                       (CREATED_BY,) * where.count('%s'))
+
+        chunks = []
+        rows = 0
+        handle = None
+        while True:
+            batch = cursor.fetchmany(FETCH_ROWS)
+            if not batch:
+                break
+            for row in batch:
+                if handle is None or rows % CHUNK_ROWS == 0:
+                    if handle:
+                        handle.close()
+                    name = f"{table}.{len(chunks) + 1:04d}.tsv.gz"
+                    chunks.append(name)
+                    handle = gzip.open(os.path.join(partial, name), 'wt', encoding='utf-8',
+                                       newline='', compresslevel=COMPRESS_LEVEL)
+                write_tsv(handle, (row,))
+                rows += 1
+        if handle:
+            handle.close()
+
+        manifest['tables'].append({'name': table, 'columns': columns, 'rows': rows, 'chunks': chunks})
+        print(f"✅ {table}: {rows} registros en {len(chunks)} trozos")
+
+    with open(os.path.join(partial, SCHEMA), 'w', encoding='utf-8') as handle:
+        handle.write('\n\n'.join(schema) + '\n')
+    with open(os.path.join(partial, MANIFEST), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(partial, directory)
+    print(f"📸 Snapshot guardado en {directory} ({time.perf_counter() - started:.1f}s)")
+
+
+def restore_snapshot(cursor, connection, catalog, root, fingerprint, bulk=True, batch_size=1000,
+                     replace_tables=False):
+    """
+    Restaurar un snapshot: se purgan las filas demo actuales y se cargan las
+    del snapshot con LOAD DATA (o INSERT por lotes si el servidor no acepta
+    LOCAL INFILE). Con replace_tables, y previa confirmación, las tablas se
+    eliminan y recrean con el esquema guardado. Devuelve el manifiesto, o
+    None si no se restauró.
+    """
+    directory = snapshot_path(root, fingerprint)
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as handle:
+        manifest = json.load(handle)
+    with open(os.path.join(directory, SCHEMA), encoding='utf-8') as handle:
+        statements = [statement.strip() for statement in handle.read().split(';\n') if statement.strip()]
+    tables = [entry['name'] for entry in manifest['tables']]
+
+    print(f"\n♻️ RESTAURANDO SNAPSHOT {fingerprint}")
+    print("=" * 60)
+    if replace_tables:
+        if not confirm_replace(catalog.database, tables):
+            print("⏭️ Snapshot no restaurado; se generarán los datos")
+            return None
+    elif not manifest.get('demo_only'):
+        # Los snapshots anteriores guardaban las tablas completas
+        print("⚠️ El snapshot contiene tablas completas, no solo filas demo; se generarán los datos")
+        return None
+    started = time.perf_counter()
+
+    if replace_tables:
+        with session_settings(cursor, foreign_key_checks=0):
+            for table in reversed(tables):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in statements:
+                cursor.execute(statement.rstrip(';'))
+        settings = {'unique_checks': 0, 'foreign_key_checks': 0}
+    else:
+        purge_demo_data(cursor, connection, catalog)
+        settings = {'foreign_key_checks': 0}
+
+    with session_settings(cursor, **settings):
+        inserter = BatchInserter(cursor, batch_size=batch_size)
+        for entry in manifest['tables']:
+            table = entry['name']
+            for chunk in entry['chunks']:
+                chunk_path = os.path.join(directory, chunk)
+                loaded = None
+                if bulk:
+                    loaded = _load_chunk(cursor, table, entry['columns'], chunk_path)
+                    bulk = loaded is not None
+                if loaded:
+                    inserter.record(table, *loaded)
+                else:
+                    inserter.insert_many(table, entry['columns'], read_tsv(chunk_path))
+            connection.commit()
+            print(f"✅ {table}: {entry['rows']} registros")
+
+    elapsed = time.perf_counter() - started
+    print(f"♻️ Snapshot restaurado en {elapsed:.1f}s")
+    if manifest.get('generation_seconds'):
+        ratio = elapsed / manifest['generation_seconds'] * 100
+        print(f"⏱️ Generación original: {manifest['generation_seconds']:.1f}s (restaurar tomó {ratio:.0f}%)")
+    return manifest
+
+
+def _load_chunk(cursor, table, columns, chunk_path):
+    """Descomprimir un trozo y cargarlo con LOAD DATA LOCAL INFILE"""
+    handle = tempfile.NamedTemporaryFile(suffix=f'.{table}.tsv', delete=False)
+    try:
+        with handle, gzip.open(chunk_path, 'rb') as source:
+            shutil.copyfileobj(source, handle)
+        return load_data_infile(cursor, table, columns, None, path=handle.name)
+    finally:
+        os.unlink(handle.name)
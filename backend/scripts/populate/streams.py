@@ -0,0 +1,39 @@
+"""
+Números aleatorios por contador: cada valor es un hash splitmix64 de
+(semilla, flujo, sorteo, índice), así que cualquier elemento se puede
+calcular por separado y la versión NumPy coincide con la escalar.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MASK64 = (1 << 64) - 1
+GOLDEN64 = 0x9E3779B97F4A7C15
+
+
+def mix(x):
+    """Finalizador de splitmix64 sobre enteros de Python"""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def stream_key(seed, stream, draw=0):
+    """Clave de un sorteo dentro de un flujo"""
+    return mix((seed * GOLDEN64 + ((stream << 8) | draw)) & MASK64)
+
+
+def uniform(key, index):
+    """Número en [0, 1) para un índice"""
+    return (mix((index * GOLDEN64 + key) & MASK64) >> 11) * 2.0 ** -53
+
+
+def uniform_array(key, index):
+    """Versión NumPy de uniform() sobre un arreglo de índices"""
+    x = index.astype(np.uint64) * np.uint64(GOLDEN64) + np.uint64(key)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
@@ -0,0 +1,185 @@
+"""
+Verificación rápida de la base poblada: conteos estimados desde
+information_schema, conteos exactos opcionales en paralelo (una conexión
+por consulta) y chequeos de integridad por rangos de id.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from .finance import ESTADO_PAGO_PAGADO
+
+VERIFY_TABLES = [
+    ('personas', 'Personas del sistema'),
+    ('usuarios_auth', 'Autenticación de usuarios'),
+    ('persona_roles', 'Roles asignados'),
+    ('usuarios', 'Tabla usuarios'),
+    ('cursos', 'Cursos académicos'),
+    ('alumnos', 'Estudiantes'),
+    ('cuotas', 'Cuotas de pago'),
+    ('pagos', 'Pagos realizados'),
+    ('deudas_alumnos', 'Deudas pendientes'),
+    ('categorias_gastos', 'Categorías de gastos'),
+    ('gastos', 'Gastos registrados'),
+    ('movimientos_ccaa', 'Movimientos cuenta alumnos'),
+    ('movimientos_ccpp', 'Movimientos cuenta apoderados'),
+    ('cobros', 'Cobros generados'),
+    ('regiones', 'Geografía - Regiones'),
+    ('provincias', 'Geografía - Provincias'),
+    ('comunas', 'Geografía - Comunas'),
+]
+
+# Ids por consulta en los chequeos de integridad
+CHECK_BATCH = 50000
+
+# Ejemplos a mostrar por chequeo con problemas
+SAMPLE_LIMIT = 5
+
+# Diferencia tolerada al comparar montos sumados
+AMOUNT_TOLERANCE = 0.005
+
+
+def estimated_counts(cursor, database, tables):
+    """Filas estimadas por InnoDB (instantáneo, puede diferir del conteo real)"""
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders})
+    """, (database, *tables))
+    return {table: int(rows or 0) for table, rows in cursor.fetchall()}
+
+
+def _count_table(db_config, table):
+    connection = mysql.connector.connect(**db_config)
+    try:
+        cursor = connection.cursor()
+        started = time.perf_counter()
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return table, count, time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def exact_counts(db_config, tables, workers=4):
+    """COUNT(*) de cada tabla en paralelo, cada uno en su propia conexión"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = executor.map(lambda table: _count_table(db_config, table), tables)
+        return {table: (count, seconds) for table, count, seconds in results}
+
+
+def _id_ranges(cursor, table, column='id'):
+    """Rangos [inicio, fin] de CHECK_BATCH ids que cubren la tabla"""
+    cursor.execute(f"SELECT MIN({column}), MAX({column}) FROM {table}")
+    low, high = cursor.fetchone()
+    if low is None:
+        return
+    for start in range(int(low), int(high) + 1, CHECK_BATCH):
+        yield start, min(start + CHECK_BATCH - 1, int(high))
+
+
+def _run_check(cursor, table, query):
+    """
+    Ejecutar query por rangos de ids de table; cada par de %s de la consulta
+    recibe el inicio y fin del rango. Devuelve (filas con problema, ejemplos).
+    """
+    problems = 0
+    samples = []
+    pairs = query.count('%s') // 2
+    for start, end in _id_ranges(cursor, table):
+        cursor.execute(query, (start, end) * pairs)
+        rows = cursor.fetchall()
+        problems += len(rows)
+        samples.extend(rows[:SAMPLE_LIMIT - len(samples)])
+    return problems, samples
+
+
+def integrity_checks(cursor, catalog):
+    """
+    Chequeos que importan para los reportes: alumnos huérfanos, pagos de
+    cuotas inexistentes y cuenta corriente de alumnos que no cuadra con sus
+    pagos. Devuelve [(descripción, problemas, ejemplos)].
+    """
+    def has(table, *columns):
+        return catalog.has_table(table) and all(column in catalog.columns[table] for column in columns)
+
+    checks = []
+    if has('alumnos', 'id', 'curso_id') and has('cursos', 'id'):
+        checks.append(('Alumnos con curso inexistente', 'alumnos', """
+            SELECT a.id, a.curso_id FROM alumnos a
+            LEFT JOIN cursos c ON c.id = a.curso_id
+            WHERE a.id BETWEEN %s AND %s AND a.curso_id IS NOT NULL AND c.id IS NULL
+        """))
+    if has('alumnos', 'id', 'apoderado_id') and has('personas', 'rut'):
+        checks.append(('Alumnos con apoderado inexistente', 'alumnos', """
+            SELECT a.id, a.apoderado_id FROM alumnos a
+            LEFT JOIN personas p ON p.rut = a.apoderado_id
+            WHERE a.id BETWEEN %s AND %s AND a.apoderado_id IS NOT NULL AND p.rut IS NULL
+        """))
+    if has('pagos', 'id', 'cuota_id') and has('cuotas', 'id'):
+        checks.append(('Pagos de cuotas inexistentes', 'pagos', """
+            SELECT p.id, p.cuota_id FROM pagos p
+            LEFT JOIN cuotas c ON c.id = p.cuota_id
+            WHERE p.id BETWEEN %s AND %s AND p.cuota_id IS NOT NULL AND c.id IS NULL
+        """))
+    if (has('alumnos', 'id') and has('pagos', 'alumno_id', 'monto_pagado', 'estado_id')
+            and has('movimientos_ccaa', 'alumno_id', 'monto', 'tipo_movimiento')):
+        checks.append(('Alumnos cuya cuenta corriente no cuadra con sus pagos', 'alumnos', f"""
+            SELECT a.id, COALESCE(p.total, 0), COALESCE(m.total, 0) FROM alumnos a
+            LEFT JOIN (
+                SELECT alumno_id, SUM(monto_pagado) AS total FROM pagos
+                WHERE alumno_id BETWEEN %s AND %s AND estado_id = {ESTADO_PAGO_PAGADO}
+                GROUP BY alumno_id
+            ) p ON p.alumno_id = a.id
+            LEFT JOIN (
+                SELECT alumno_id, SUM(monto) AS total FROM movimientos_ccaa
+                WHERE alumno_id BETWEEN %s AND %s AND tipo_movimiento = 'PAGO'
+                GROUP BY alumno_id
+            ) m ON m.alumno_id = a.id
+            WHERE a.id BETWEEN %s AND %s
+              AND ABS(COALESCE(p.total, 0) - COALESCE(m.total, 0)) > {AMOUNT_TOLERANCE}
+        """))
+
+    return [(description, *_run_check(cursor, table, query)) for description, table, query in checks]
+
+
+def verify_database(cursor, catalog, db_config=None, exact=False, workers=4, checks=True):
+    """Verificar los datos creados: conteos por tabla y chequeos de integridad"""
+    print("\n📊 VERIFICACIÓN COMPLETA DE DATOS DEMO")
+    print("=" * 60)
+
+    tables = [table for table, _ in VERIFY_TABLES if catalog.has_table(table)]
+    started = time.perf_counter()
+    counts = estimated_counts(cursor, catalog.database, tables) if tables else {}
+    label = "estimados"
+    if exact and db_config and tables:
+        counts = {table: count for table, (count, _) in exact_counts(db_config, tables, workers).items()}
+        label = "exactos"
+
+    total_records = 0
+    for table, description in VERIFY_TABLES:
+        if table not in counts:
+            print(f"❌ {description}: Tabla no existe")
+            continue
+        count = counts[table]
+        status = "✅" if count > 0 else "⚠️"
+        print(f"{status} {description}: {count} registros")
+        total_records += count
+    print(f"\n🎯 TOTAL DE REGISTROS DEMO: {total_records} ({label}, {time.perf_counter() - started:.2f}s)")
+
+    if not checks:
+        return
+    print("\n🔎 CHEQUEOS DE INTEGRIDAD")
+    print("=" * 60)
+    started = time.perf_counter()
+    for description, problems, samples in integrity_checks(cursor, catalog):
+        if problems:
+            print(f"❌ {description}: {problems}")
+            for sample in samples:
+                print(f"   ↳ {', '.join(str(value) for value in sample)}")
+        else:
+            print(f"✅ {description}: 0")
+    print(f"⏱️ Chequeos en {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,165 @@
+"""
+Capa de inserción por lotes: agrupa filas por tabla y las envía como
+INSERT multi-fila, registrando filas, bytes y tiempos de cada tabla.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+from .bulk import load_data_infile, write_tsv_columns
+from .metrics import TableMetrics, cpu_time
+
+# Un lote ocupa en memoria sus tuplas, la lista de parámetros y el SQL armado
+BATCH_MEMORY_FACTOR = 3
+
+
+def estimate_row_bytes(row):
+    """Tamaño aproximado en memoria de una fila"""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+
+
+def insert_statement(table, columns, rows, ignore=False):
+    """SQL y parámetros de un INSERT multi-fila"""
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    verb = 'INSERT IGNORE' if ignore else 'INSERT'
+    query = (f"{verb} INTO {table} ({', '.join(columns)}) VALUES "
+             + ', '.join([placeholders] * len(rows)))
+    return query, [value for row in rows for value in row]
+
+
+def statement_bytes(query, params):
+    """Bytes aproximados de un INSERT enviado: el SQL y el texto de cada valor"""
+    return len(query) + sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in params)
+
+
+class DatabaseSink:
+    """Destino en vivo: cada lote es un INSERT multi-fila por el cursor"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def write(self, table, columns, rows, ignore=False):
+        """Enviar un lote; devuelve los bytes aproximados enviados"""
+        query, params = insert_statement(table, columns, rows, ignore)
+        self.cursor.execute(query, params)
+        return statement_bytes(query, params)
+
+    def close(self):
+        pass
+
+
+class BatchInserter:
+    """
+    Acumula filas por tabla y las inserta en bloques de batch_size filas. Con
+    max_bytes, el lote de cada tabla se achica para no superar ese presupuesto;
+    con checkpoint, cada lote enviado se informa para confirmar cada N lotes;
+    con progress, cada lote avanza la línea de progreso. Los lotes van a sink
+    (por defecto, la base de datos del cursor; ver populate.dump).
+    """
+
+    def __init__(self, cursor, batch_size=1000, ignore=False, max_bytes=None, checkpoint=None,
+                 progress=None, sink=None):
+        self.cursor = cursor
+        self.sink = sink or DatabaseSink(cursor)
+        self.batch_size = batch_size
+        self.ignore = ignore
+        self.max_bytes = max_bytes
+        self.checkpoint = checkpoint
+        self.progress = progress
+        self.buffers = {}
+        self.columns = {}
+        self.limits = {}
+        self.stats = {}
+
+    def add(self, table, columns, row):
+        """Agregar una fila; se envía al completar un lote"""
+        buffer = self.buffers.get(table)
+        if buffer is None:
+            buffer = self.buffers[table] = []
+            self.columns[table] = tuple(columns)
+            self.limits[table] = self.batch_limit(row)
+        buffer.append(row)
+        if len(buffer) >= self.limits[table]:
+            self.flush(table)
+
+    def batch_limit(self, row):
+        """Filas por lote según batch_size y el presupuesto de memoria"""
+        if not self.max_bytes:
+            return self.batch_size
+        per_row = estimate_row_bytes(row) * BATCH_MEMORY_FACTOR
+        return max(1, min(self.batch_size, self.max_bytes // per_row))
+
+    def insert_many(self, table, columns, rows):
+        """Agregar varias filas de una tabla y enviar lo pendiente"""
+        for row in rows:
+            self.add(table, columns, row)
+        self.flush(table)
+
+    def flush(self, table=None):
+        """Enviar filas pendientes de una tabla (o de todas)"""
+        tables = [table] if table else list(self.buffers)
+        for name in tables:
+            rows = self.buffers.get(name)
+            if rows:
+                self._send(name, self.columns[name], rows)
+                rows.clear()
+
+    def discard(self):
+        """Descartar las filas pendientes sin enviarlas (tras deshacer un lote)"""
+        for rows in self.buffers.values():
+            rows.clear()
+
+    def _send(self, table, columns, rows):
+        """Escribir un lote como INSERT multi-fila (un solo viaje al servidor en vivo)"""
+        started = time.perf_counter()
+        sent = self.sink.write(table, columns, rows, self.ignore)
+        self.record(table, len(rows), time.perf_counter() - started, sent)
+
+    def record(self, table, rows, seconds, sent=0):
+        """Registrar un lote enviado por esta u otra vía de carga"""
+        self.table_stats(table).add(rows, seconds, sent)
+        if self.checkpoint:
+            self.checkpoint.batch(table, rows)
+        if self.progress:
+            self.progress.advance(table, rows)
+
+    def table_stats(self, table):
+        stats = self.stats.get(table)
+        if stats is None:
+            stats = self.stats[table] = TableMetrics()
+        return stats
+
+    @contextmanager
+    def measure(self, table):
+        """Sumar el tiempo de pared y de CPU del bloque a la tabla"""
+        wall, cpu = time.perf_counter(), cpu_time()
+        try:
+            yield
+        finally:
+            stats = self.table_stats(table)
+            stats.wall_seconds += time.perf_counter() - wall
+            stats.cpu_seconds += cpu_time() - cpu
+
+
+def load_table(cursor, inserter, table, columns, rows_factory, bulk_tables=(), bulk_available=False,
+               cache_path=None, blocks_factory=None):
+    """
+    Cargar una tabla con LOAD DATA si está seleccionada y disponible, o con
+    INSERT por lotes. rows_factory entrega un iterador nuevo de filas en cada
+    llamada, para poder reintentar por INSERT si se rechaza LOCAL INFILE;
+    con blocks_factory, LOAD DATA toma bloques de columnas en su lugar.
+    Devuelve si LOCAL INFILE sigue disponible.
+    """
+    if bulk_available and table in bulk_tables:
+        if blocks_factory:
+            loaded = load_data_infile(cursor, table, columns, blocks_factory(), path=cache_path,
+                                      write=write_tsv_columns)
+        else:
+            loaded = load_data_infile(cursor, table, columns, rows_factory(), path=cache_path)
+        if loaded:
+            inserter.record(table, *loaded)
+            return True
+        bulk_available = False
+    inserter.insert_many(table, columns, rows_factory())
+    return bulk_available